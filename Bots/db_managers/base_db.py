@@ -5,7 +5,10 @@ PROPRIETARY AND CONFIDENTIAL.
 
 Single source of truth for:
   - PostgreSQL connection pool (get_conn)
-  - Async serial DB worker (db_worker / db_execute)
+  - Async DB scheduler (start_db_worker / db_execute / db_transaction)
+  - Streaming reads over server-side cursors (db_stream)
+  - Bounded thread-pool executor that runs the blocking psycopg calls
+  - Scheduler / pool gauges (queue_stats, pool_stats; per-op data in db_metrics)
 
 All domain db_manager modules import from here.
 """
@@ -14,12 +17,23 @@ import os
 import asyncio
 import logging
 import atexit
+import functools
+import itertools
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
 
 import psycopg
 from psycopg.rows import dict_row
 from psycopg_pool import ConnectionPool, PoolTimeout
 from dotenv import load_dotenv
 
+from . import db_metrics
+
 load_dotenv()
 
 # ── PostgreSQL credentials ────────────────────────────────────────────────────
@@ -34,19 +48,53 @@ POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN", "2"))
 POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX", "20"))
 POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30.0"))
 
+# Threads that run the synchronous *_sync functions. Never more than the pool
+# can serve, otherwise the extra threads would just block in getconn().
+EXECUTOR_WORKERS = min(int(os.getenv("DB_EXECUTOR_WORKERS", str(POOL_MAX_CONN))), POOL_MAX_CONN)
+
+# Write batching: batchable writes queued within BATCH_WINDOW (or up to
+# BATCH_MAX of them) share one connection and a single commit.
+BATCH_MAX    = int(os.getenv("DB_BATCH_MAX", "100"))
+BATCH_WINDOW = float(os.getenv("DB_BATCH_WINDOW_MS", "10")) / 1000
+
+# Share of executor slots bulk (background mirror) work may hold at once.
+BULK_MAX_SHARE    = float(os.getenv("DB_BULK_MAX_SHARE", "0.5"))
+BULK_MAX_INFLIGHT = max(1, int(EXECUTOR_WORKERS * BULK_MAX_SHARE))
+
+# Queue watermarks: once QUEUE_HIGH jobs are waiting, non-interactive producers
+# block until the backlog drains to QUEUE_LOW.
+QUEUE_HIGH = int(os.getenv("DB_QUEUE_HIGH", "2000"))
+QUEUE_LOW  = min(int(os.getenv("DB_QUEUE_LOW", str(QUEUE_HIGH // 2))), QUEUE_HIGH)
+
+# Rows fetched per round trip by db_stream().
+STREAM_FETCH_SIZE = int(os.getenv("DB_STREAM_FETCH_SIZE", "500"))
+
+# application_name of this process's connections. Change notifications carry
+# it, so a process can skip the echo of its own writes (see change_listener).
+INSTANCE_NAME = os.getenv("DB_INSTANCE_NAME") or f"concord-{os.getpid()}-{os.urandom(3).hex()}"
+
 logger = logging.getLogger("Concord")
 
 # ── Global Connection Pool ────────────────────────────────────────────────────
 _pool: ConnectionPool | None = None
+_executor: ThreadPoolExecutor | None = None
+_local = threading.local()   # per-thread pinned connection (see pinned_connection)
+
+
+def conninfo() -> str:
+    """libpq connection string for this process (pool and listener)."""
+    return (
+        f"host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD} "
+        f"application_name={INSTANCE_NAME}"
+    )
 
 
 def init_pool():
     """Initialize the global connection pool."""
     global _pool
     if _pool is None:
-        conninfo = f"host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} password={DB_PASSWORD}"
         _pool = ConnectionPool(
-            conninfo=conninfo,
+            conninfo=conninfo(),
             min_size=POOL_MIN_CONN,
             max_size=POOL_MAX_CONN,
             timeout=POOL_TIMEOUT,
@@ -56,8 +104,11 @@ def init_pool():
 
 
 def close_pool():
-    """Close the global connection pool."""
-    global _pool
+    """Close the global connection pool and the DB executor."""
+    global _pool, _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
     if _pool is not None:
         _pool.close()
         _pool = None
@@ -70,8 +121,12 @@ atexit.register(close_pool)
 
 def get_conn() -> psycopg.Connection:
     """Return a connection from the pool. Raises PoolTimeout with a clear message on exhaustion."""
+    pinned = getattr(_local, "pinned", None)
+    if pinned is not None:
+        return pinned
     if _pool is None:
         init_pool()
+    start = time.perf_counter()
     try:
         return _pool.getconn()  # type: ignore
     except PoolTimeout:
@@ -81,56 +136,604 @@ def get_conn() -> psycopg.Connection:
             "Consider increasing DB_POOL_MAX or reducing query frequency."
         )
         raise
+    finally:
+        db_metrics.add_checkout_wait(time.perf_counter() - start)
 
 
 def put_conn(conn: psycopg.Connection):
     """Return a connection to the pool."""
+    if isinstance(conn, _PinnedConnection):
+        return  # owned by pinned_connection(), released there
     if _pool is not None:
         _pool.putconn(conn)
 
 
-# ── Async serial DB worker ────────────────────────────────────────────────────
-# Each db_manager module that imports this module gets its own queue + worker
-# instance so that they remain independently serialized.  Call db_worker() once
-# as a background task (from cog_load) before calling db_execute().
+# ── Pinned connections ────────────────────────────────────────────────────────
+# While a thread holds a pinned connection, get_conn() hands out that same
+# connection and conn.commit() is deferred, so any number of unmodified
+# *_sync functions run inside one transaction with a single commit.
+# In-memory state that mirrors a write (caches, indexes) is updated through
+# after_commit(), so a rolled-back batch never leaves it ahead of the DB.
+
+
+class _PinnedConnection:
+    """Connection proxy whose commit() is deferred to pinned_connection()."""
+
+    def __init__(self, conn: psycopg.Connection):
+        self._conn = conn
+        self.on_commit: list = []   # (func, args) queued by after_commit()
+        self.state: dict = {}       # see transaction_state()
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@contextmanager
+def pinned_connection():
+    """Pin one pooled connection to this thread; commit once on clean exit.
+
+    Re-entrant: a nested call joins the outer transaction.
+    """
+    if getattr(_local, "pinned", None) is not None:
+        yield _local.pinned
+        return
+    conn = get_conn()
+    pinned = _local.pinned = _PinnedConnection(conn)
+    try:
+        yield pinned
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.pinned = None
+        put_conn(conn)
+    for func, args in pinned.on_commit:
+        try:
+            func(*args)
+        except Exception as e:
+            # Already committed: failing here would make the caller retry the writes.
+            logger.error(f"[ERR-DB-005] Post-commit hook {_op_name(func)} failed: {e}")
+
+
+def after_commit(func, *args) -> None:
+    """Run *func(*args)* once this thread's current writes are committed.
+
+    Inside pinned_connection() (a batch or db_transaction) that is after its
+    single real commit, and never if it rolls back; otherwise right away, so
+    call it after conn.commit().
+    """
+    pinned = getattr(_local, "pinned", None)
+    if pinned is None:
+        func(*args)
+    else:
+        pinned.on_commit.append((func, args))
+
+
+def transaction_state() -> dict | None:
+    """Scratch dict of this thread's open pinned transaction, or None outside one.
+
+    Lets a write see what earlier writes in the same batch did before their
+    after_commit() hooks have patched the caches.  Dropped on rollback.
+    """
+    pinned = getattr(_local, "pinned", None)
+    return None if pinned is None else pinned.state
+
+
+# ── DB executor ───────────────────────────────────────────────────────────────
+# psycopg calls are blocking, so they never run on the event loop thread.  The
+# worker hands each *_sync function to this bounded executor and awaits it,
+# keeping gateway heartbeats and interaction acks responsive during DB work.
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared DB executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=EXECUTOR_WORKERS,
+            thread_name_prefix="concord-db",
+        )
+        logger.info(f"[DB] Executor started ({EXECUTOR_WORKERS} threads)")
+    return _executor
+
 
-db_queue: asyncio.Queue = asyncio.Queue()
+async def run_sync(func, *args, **kwargs):
+    """Run a blocking DB function on the executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _op_name(func) -> str:
+    return getattr(func, "__qualname__", repr(func))
+
+
+def _instrumented(func, *args, **kwargs):
+    """Call *func* on this executor thread, recording checkout/exec time and rows."""
+    if getattr(_local, "pinned", None) is None:
+        db_metrics.take_checkout_wait()   # discard anything not from this call
+    # (inside a batch the pinned checkout is kept and charged to the first item)
+    start = time.perf_counter()
+    result, error = None, False
+    try:
+        result = func(*args, **kwargs)
+        return result
+    except BaseException:
+        error = True
+        raise
+    finally:
+        checkout = db_metrics.take_checkout_wait()
+        db_metrics.record(
+            _op_name(func),
+            checkout_wait=checkout,
+            exec_time=time.perf_counter() - start - checkout,
+            rows=db_metrics.row_count(result),
+            error=error,
+        )
+
+
+# ── DB scheduler ──────────────────────────────────────────────────────────────
+# One worker (started once via start_db_worker()) drains the shared db_queue.
+#   - readonly jobs run concurrently, up to EXECUTOR_WORKERS at a time
+#   - writes are serialized per key (e.g. ("task", task_id)), in submission
+#     order; writes without a key all share one lane and stay strictly ordered
+#   - batch=True writes queued close together run as one transaction
+#   - interactive work is always dispatched first, then normal, then bulk
+#   - the queue is bounded by watermarks; see _PriorityQueue.put()
+# A write whose key is busy is parked and re-queued when its predecessor ends.
+
+# ── Priority classes ──
+INTERACTIVE = "interactive"   # button clicks / modals racing Discord's 3s deadline
+NORMAL      = "normal"        # default
+BULK        = "bulk"          # discovery sweeps, message mirror, maintenance
+PRIORITIES  = (INTERACTIVE, NORMAL, BULK)
+
+# Default priority for db_execute() calls made from the current task.  Set it
+# once at the top of a handler; tasks spawned from there inherit it.
+db_priority: ContextVar[str] = ContextVar("db_priority", default=NORMAL)
+
+
+class _PriorityQueue:
+    """db_queue: one FIFO lane per priority class, bounded by watermarks.
+
+    get() serves interactive work first, then normal, then bulk — and bulk
+    only while fewer than BULK_MAX_INFLIGHT bulk jobs are running, so
+    background traffic can never occupy every connection.
+    """
+
+    def __init__(self):
+        self._lanes = {p: deque() for p in PRIORITIES}
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self.bulk_inflight = 0
+        self.throttled = False
+
+    def qsize(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def put_nowait(self, job, front: bool = False):
+        lane = self._lanes[job.priority]
+        if front:
+            lane.appendleft(job)
+        else:
+            lane.append(job)
+        if not self.throttled and self.qsize() >= QUEUE_HIGH:
+            self.throttled = True
+            self._room.clear()
+            logger.warning(f"[DB] Queue reached {QUEUE_HIGH} jobs — throttling background writes.")
+        self._wakeup.set()
+
+    async def put(self, job):
+        """Enqueue *job*; above the high watermark, non-interactive producers
+        wait for the backlog to drain."""
+        if job.priority != INTERACTIVE:
+            while self.throttled:
+                await self._room.wait()
+        self.put_nowait(job)
+
+    def _pick(self):
+        job = None
+        for priority in (INTERACTIVE, NORMAL):
+            if self._lanes[priority]:
+                job = self._lanes[priority].popleft()
+                break
+        else:
+            if self._lanes[BULK] and self.bulk_inflight < BULK_MAX_INFLIGHT:
+                job = self._lanes[BULK].popleft()
+        if job is not None and self.throttled and self.qsize() <= QUEUE_LOW:
+            self.throttled = False
+            self._room.set()
+            logger.info(f"[DB] Queue drained to {QUEUE_LOW} jobs — throttle released.")
+        return job
+
+    def get_nowait(self):
+        job = self._pick()
+        if job is None:
+            raise asyncio.QueueEmpty
+        return job
+
+    async def get(self):
+        while True:
+            job = self._pick()
+            if job is not None:
+                return job
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def bulk_started(self):
+        self.bulk_inflight += 1
+
+    def bulk_finished(self):
+        self.bulk_inflight -= 1
+        self._wakeup.set()
+
+
+db_queue = _PriorityQueue()
+
+_busy_keys: set = set()
+_parked: dict = {}           # key -> deque[_DBJob] waiting for that key
+_held: deque = deque()       # job pulled while gathering a batch, runs next
+_inflight: set = set()       # running job tasks (keeps references alive)
+_worker_task: asyncio.Task | None = None
+
+
+class _DBJob:
+    __slots__ = ("func", "args", "kwargs", "future", "readonly", "key", "batch", "priority",
+                 "resumed", "enqueued_at")
+
+    def __init__(self, func, args, kwargs, future, readonly, key, batch, priority):
+        self.func     = func
+        self.args     = args
+        self.kwargs   = kwargs
+        self.future   = future
+        self.readonly = readonly
+        self.key      = key
+        self.batch    = batch and not readonly and not asyncio.iscoroutinefunction(func)
+        self.priority = priority
+        self.resumed  = False   # True once the job already owns its key
+        self.enqueued_at = time.perf_counter()
+
+
+def _admit(job: _DBJob, claimed=()) -> bool:
+    """Claim *job*'s key for dispatch. False if it was cancelled or parked."""
+    if job.future.cancelled():
+        # Caller gave up before we started; pass its key on untouched.
+        if not job.readonly and job.resumed:
+            _release_key(job.key)
+        return False
+    if job.readonly or job.resumed or job.key in claimed:
+        return True
+    if job.key in _busy_keys:
+        _parked.setdefault(job.key, deque()).append(job)
+        return False
+    _busy_keys.add(job.key)
+    return True
+
+
+def _release_key(key) -> None:
+    """Hand *key* to the next parked write, or mark it free."""
+    parked = _parked.get(key)
+    if parked:
+        nxt = parked.popleft()
+        if not parked:
+            del _parked[key]
+        nxt.resumed = True
+        db_queue.put_nowait(nxt, front=True)
+    else:
+        _busy_keys.discard(key)
+
+
+def _record_queue_wait(job: _DBJob) -> None:
+    db_metrics.record(_op_name(job.func), queue_wait=time.perf_counter() - job.enqueued_at)
+
+
+async def _run_job(job: _DBJob, slots: asyncio.Semaphore) -> None:
+    _record_queue_wait(job)
+    try:
+        if asyncio.iscoroutinefunction(job.func):
+            start = time.perf_counter()
+            try:
+                result = await job.func(*job.args, **job.kwargs)
+            finally:
+                db_metrics.record(_op_name(job.func), exec_time=time.perf_counter() - start)
+        else:
+            result = await run_sync(_instrumented, job.func, *job.args, **job.kwargs)
+        if not job.future.done():
+            job.future.set_result(result)
+    except asyncio.CancelledError:
+        if not job.future.done():
+            job.future.cancel()
+        raise
+    except Exception as exc:
+        logger.exception(f"[ERR-DB-001] Database execution error in db_worker: {exc}")
+        if not job.future.done():
+            job.future.set_exception(exc)
+    finally:
+        slots.release()
+        if job.priority == BULK:
+            db_queue.bulk_finished()
+        if not job.readonly:
+            _release_key(job.key)
+
+
+def _run_in_transaction(steps: list) -> list:
+    """Run (func, args, kwargs) steps on one pinned connection with a single commit."""
+    db_metrics.take_checkout_wait()
+    with pinned_connection():
+        return [_instrumented(func, *args, **kwargs) for func, args, kwargs in steps]
+
+
+def _execute_batch_sync(jobs: list) -> list:
+    return _run_in_transaction([(job.func, job.args, job.kwargs) for job in jobs])
+
+
+async def _run_batch(jobs: list, keys: set, slots: asyncio.Semaphore) -> None:
+    for job in jobs:
+        _record_queue_wait(job)
+    try:
+        try:
+            results = await run_sync(_execute_batch_sync, jobs)
+        except Exception as exc:
+            # The whole transaction rolled back — retry each item on its own
+            # so one bad row only fails its own caller.
+            logger.warning(f"[DB] Batch of {len(jobs)} writes failed ({exc}); retrying individually.")
+            for job in jobs:
+                try:
+                    result = await run_sync(_instrumented, job.func, *job.args, **job.kwargs)
+                    if not job.future.done():
+                        job.future.set_result(result)
+                except Exception as item_exc:
+                    logger.exception(f"[ERR-DB-001] Database execution error in db_worker: {item_exc}")
+                    if not job.future.done():
+                        job.future.set_exception(item_exc)
+        else:
+            for job, result in zip(jobs, results):
+                if not job.future.done():
+                    job.future.set_result(result)
+    except asyncio.CancelledError:
+        for job in jobs:
+            if not job.future.done():
+                job.future.cancel()
+        raise
+    finally:
+        slots.release()
+        if jobs[0].priority == BULK:
+            db_queue.bulk_finished()
+        for key in keys:
+            _release_key(key)
+
+
+async def _gather_batch(first: _DBJob) -> tuple[list, set]:
+    """Collect batchable writes queued right behind *first*."""
+    jobs, keys = [first], {first.key}
+    waited = False
+    try:
+        while len(jobs) < BATCH_MAX:
+            try:
+                job: _DBJob = db_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if waited:
+                    break
+                waited = True
+                await asyncio.sleep(BATCH_WINDOW)
+                continue
+            if not job.batch:
+                _held.append(job)
+                break
+            if _admit(job, keys):
+                jobs.append(job)
+                keys.add(job.key)
+    except asyncio.CancelledError:
+        for job in jobs:
+            job.future.cancel()
+        raise
+    return jobs, keys
 
 
 async def db_worker() -> None:  # pragma: no cover — runs forever
-    """Consume the db_queue and execute DB operations serially."""
+    """Dispatch db_queue jobs: reads in parallel, writes ordered per key."""
     # Initialize pool on worker start
     init_pool()
+    slots = asyncio.Semaphore(EXECUTOR_WORKERS)
 
-    while True:
-        try:
-            func, args, kwargs, future = await db_queue.get()
-        except asyncio.CancelledError:
-            logger.info("[DB] db_worker cancelled — shutting down.")
-            return
+    try:
+        while True:
+            await slots.acquire()
+            job: _DBJob = _held.popleft() if _held else await db_queue.get()
 
-        try:
-            if asyncio.iscoroutinefunction(func):
-                result = await func(*args, **kwargs)
+            if not _admit(job):
+                slots.release()
+                continue
+
+            if job.batch:
+                jobs, keys = await _gather_batch(job)
+                task = asyncio.create_task(_run_batch(jobs, keys, slots))
             else:
-                result = func(*args, **kwargs)
-            if not future.done():
-                future.set_result(result)
-        except Exception as exc:
-            logger.exception(f"[ERR-DB-001] Database execution error in db_worker: {exc}")
-            if not future.done():
-                future.set_exception(exc)
-        finally:
-            db_queue.task_done()
+                task = asyncio.create_task(_run_job(job, slots))
+            if job.priority == BULK:
+                db_queue.bulk_started()
+            _inflight.add(task)
+            task.add_done_callback(_inflight.discard)
+    except asyncio.CancelledError:
+        logger.info("[DB] db_worker cancelled — shutting down.")
 
 
-async def db_execute(func, *args, **kwargs):
-    """Schedule *func* on the serial DB worker and await its result."""
+async def _supervise_db_worker() -> None:  # pragma: no cover — runs forever
+    """Keep db_worker alive; restart it if it ever dies unexpectedly."""
+    while True:
+        try:
+            await db_worker()
+            return
+        except Exception as exc:
+            logger.exception(f"[ERR-DB-003] db_worker crashed, restarting: {exc}")
+            await asyncio.sleep(1)
+
+
+def start_db_worker() -> asyncio.Task:
+    """Start the shared DB worker once; later calls return the running task."""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.create_task(_supervise_db_worker(), name="concord-db-worker")
+    return _worker_task
+
+
+async def db_execute(func, *args, readonly: bool = False, key=None, batch: bool = False,
+                     priority: str | None = None, **kwargs):
+    """Schedule *func* on the DB worker and await its result.
+
+    readonly=True marks a pure query that may run alongside other work.
+    Writes are ordered per *key*; omit it to use the shared global lane.
+    batch=True lets a write share a transaction with neighbouring batch
+    writes — only use it for self-contained statements that call
+    get_conn()/conn.commit()/put_conn() in the usual way.
+    priority is INTERACTIVE, NORMAL or BULK; defaults to db_priority.
+    """
+    priority = priority or db_priority.get()
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown DB priority: {priority!r}")
     future: asyncio.Future = asyncio.get_running_loop().create_future()
-    await db_queue.put((func, args, kwargs, future))
+    await db_queue.put(_DBJob(func, args, kwargs, future, readonly, key, batch, priority))
     return await future
 
 
+class Transaction:
+    """Steps collected inside ``async with db_transaction() as tx``.
+
+    tx.run() only records a step; the steps execute together when the block
+    exits, and tx.results then holds their return values in order.
+    """
+
+    def __init__(self):
+        self.steps: list = []
+        self.results: list | None = None
+
+    def run(self, func, *args, **kwargs) -> None:
+        if asyncio.iscoroutinefunction(func):
+            raise TypeError("db_transaction steps must be synchronous *_sync functions")
+        self.steps.append((func, args, kwargs))
+
+
+@asynccontextmanager
+async def db_transaction(key=None, priority: str | None = None):
+    """Group several *_sync functions into one atomic DB round trip.
+
+        async with db_transaction(key=("leave_user", user_id)) as tx:
+            tx.run(_withdraw_leave_sync, leave_id, by, reason)
+            tx.run(_refund_leave_balance_sync, user_id, reason, days)
+
+    The steps are scheduled once, share one pooled connection and commit
+    together — or roll back together if any step raises.  Nothing runs if
+    the block itself raises.  *key* orders the transaction like a write.
+    """
+    tx = Transaction()
+    yield tx
+    if tx.steps:
+        tx.results = await db_execute(_run_in_transaction, tx.steps, key=key, priority=priority)
+
+
+# ── Streaming reads ───────────────────────────────────────────────────────────
+# db_stream() keeps one pooled connection for the life of the iteration and
+# fetches through a named (server-side) cursor.  Every chunk is its own
+# readonly job, so other queue work is dispatched between chunks and memory
+# stays bounded by fetch_size however large the table grows.
+
+_stream_ids = itertools.count(1)
+
+
+def _stream_open_sync(name: str, query: str, params):
+    conn = get_conn()
+    try:
+        cur = conn.cursor(name=name)
+        cur.execute(query, params)
+        return conn, cur
+    except BaseException:
+        conn.rollback()
+        put_conn(conn)
+        raise
+
+
+def _stream_fetch_sync(cur, size: int) -> list:
+    return cur.fetchmany(size)
+
+
+def _stream_close_sync(conn, cur) -> None:
+    try:
+        cur.close()
+        conn.rollback()   # end the read transaction that held the cursor
+    finally:
+        put_conn(conn)
+
+
+async def db_stream(query: str, params=(), *, fetch_size: int | None = None,
+                    priority: str | None = None):
+    """Async-iterate the rows of *query* in chunks of *fetch_size*.
+
+        async for row in db_stream("SELECT * FROM tasks"):
+            ...
+
+    Breaking out early is fine; the cursor and its connection are released
+    when the iterator is closed.  Meant for large reads only — a stream holds
+    a pool connection until it finishes.
+    """
+    size = fetch_size or STREAM_FETCH_SIZE
+    conn, cur = await db_execute(_stream_open_sync, f"concord_stream_{next(_stream_ids)}",
+                                 query, params, readonly=True, priority=priority)
+    try:
+        while True:
+            rows = await db_execute(_stream_fetch_sync, cur, size, readonly=True, priority=priority)
+            for row in rows:
+                yield row
+            if len(rows) < size:
+                break
+    finally:
+        await db_execute(_stream_close_sync, conn, cur, readonly=True, priority=priority)
+
+
+# Write-behind buffers in front of the queue (the message mirror) register
+# here so their backlog and drops show up next to the queue's own.
+_buffers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register_buffer(buffer) -> None:
+    """Report *buffer* in queue_stats(): len() rows pending, .dropped rows dropped."""
+    _buffers.add(buffer)
+
+
+def unregister_buffer(buffer) -> None:
+    _buffers.discard(buffer)
+
+
+def queue_stats() -> dict:
+    """Snapshot of the scheduler queue (and registered buffers) for the dashboard."""
+    buffers = list(_buffers)
+    return {
+        "depth":     db_queue.qsize(),
+        "parked":    sum(len(jobs) for jobs in _parked.values()),
+        "inflight":  len(_inflight),
+        "throttled": db_queue.throttled,
+        "dropped":   sum(b.dropped for b in buffers),
+        "buffered":  sum(len(b) for b in buffers),
+    }
+
+
+def pool_stats() -> dict:
+    """Connection pool gauges: connections open / in use / idle, and waiting requests."""
+    if _pool is None:
+        return {"size": 0, "in_use": 0, "idle": 0, "waiting": 0, "max": POOL_MAX_CONN}
+    stats = _pool.get_stats()
+    size, idle = stats.get("pool_size", 0), stats.get("pool_available", 0)
+    return {
+        "size":    size,
+        "in_use":  size - idle,
+        "idle":    idle,
+        "waiting": stats.get("requests_waiting", 0),
+        "max":     POOL_MAX_CONN,
+    }
+
+
 # ── Synchronous helper for connection context ─────────────────────────────────
 
 class ConnectionContext:
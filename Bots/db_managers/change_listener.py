@@ -0,0 +1,126 @@
+"""
+Bots/db_managers/change_listener.py — Cross-Process Change Notifications
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Triggers installed by migration 8 send `NOTIFY concord_changes` for every
+row written to the mirrored structure, member_roles, tasks, leaves and
+users.  Each payload is a small JSON object:
+
+    {"table": "channels", "op": "UPDATE", "origin": "<application_name>",
+     "id": 123, "name": "leave-hr", ...}
+
+One ChangeListener per process holds a dedicated autocommit connection
+(outside the pool) that LISTENs and dispatches payloads to the handlers
+registered for their table.  A process ignores notifications from its own
+connections (origin == INSTANCE_NAME): its caches were already patched by
+the write itself.  After a reconnect, resync handlers run, since anything
+sent while disconnected was lost.
+
+Handlers are plain functions `handler(op, row)` running on the event loop;
+resync handlers may be coroutines.
+
+Disable with DB_LISTEN=0 (e.g. for one-off scripts).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Callable
+
+import psycopg
+
+from .base_db import conninfo, INSTANCE_NAME
+
+logger = logging.getLogger("Concord")
+
+CHANNEL = "concord_changes"
+LISTEN_ENABLED  = os.getenv("DB_LISTEN", "1") != "0"
+RECONNECT_DELAY = float(os.getenv("DB_LISTEN_RECONNECT_S", "5"))
+RECONNECT_MAX   = 60.0
+
+
+class ChangeListener:
+    def __init__(self):
+        self._handlers: dict[str, list[Callable]] = {}
+        self._resync: list[Callable] = []
+        self._task: asyncio.Task | None = None
+        self.connected = False
+        self.received = 0
+
+    def on(self, table: str, handler: Callable) -> None:
+        """Call *handler(op, row)* for every foreign write to *table*."""
+        self._handlers.setdefault(table, []).append(handler)
+
+    def on_resync(self, handler: Callable) -> None:
+        """Call *handler()* after a reconnect, to reload what may have been missed."""
+        self._resync.append(handler)
+
+    def dispatch(self, payload: str) -> None:
+        try:
+            row = json.loads(payload)
+        except ValueError:
+            logger.warning(f"[DB] Ignoring malformed change notification: {payload[:200]}")
+            return
+        if row.pop("origin", None) == INSTANCE_NAME:
+            return
+        table, op = row.pop("table", None), row.pop("op", None)
+        self.received += 1
+        for handler in self._handlers.get(table, ()):
+            try:
+                handler(op, row)
+            except Exception as e:
+                logger.error(f"[ERR-DB-004] Change handler for {table} failed: {e}")
+
+    async def _resync_all(self) -> None:
+        for handler in self._resync:
+            try:
+                result = handler()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"[ERR-DB-004] Change resync handler failed: {e}")
+
+    async def _listen(self, resync: bool) -> None:
+        async with await psycopg.AsyncConnection.connect(conninfo(), autocommit=True) as conn:
+            await conn.execute(f"LISTEN {CHANNEL}")
+            self.connected = True
+            logger.info(f"[DB] Listening for change notifications as {INSTANCE_NAME}.")
+            if resync:
+                await self._resync_all()
+            async for notify in conn.notifies():
+                self.dispatch(notify.payload)
+
+    async def _run(self) -> None:
+        delay, resync = RECONNECT_DELAY, False
+        while True:
+            self.connected = False
+            try:
+                await self._listen(resync)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.connected:
+                    delay = RECONNECT_DELAY
+                logger.warning(f"[DB] Change listener disconnected ({e}); retrying in {delay:.0f}s.")
+            # Whatever was sent while we were away is lost: reload on the next connect.
+            resync = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    def start(self) -> asyncio.Task | None:
+        if not LISTEN_ENABLED:
+            return None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="concord-change-listener")
+        return self._task
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+listener = ChangeListener()
@@ -0,0 +1,129 @@
+"""
+Bots/db_managers/db_metrics.py — DB Instrumentation
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Rolling per-operation metrics fed by the base_db scheduler:
+  - queue wait     (db_execute() call → dispatch, including time parked on a key)
+  - checkout wait  (time blocked in the pool's getconn())
+  - execution time (time in the *_sync function, excluding checkout)
+  - rows returned
+
+Operations are named by the func.__qualname__ handed to db_execute().
+"""
+
+import os
+import threading
+from collections import deque
+
+# Samples kept per histogram; percentiles describe this recent window.
+WINDOW = int(os.getenv("DB_METRICS_WINDOW", "1000"))
+
+_lock = threading.Lock()       # samples arrive from executor threads
+_tls  = threading.local()      # per-thread checkout wait accumulator
+
+
+class RollingHistogram:
+    """Latency/size distribution over the last WINDOW samples, plus lifetime totals."""
+
+    __slots__ = ("_samples", "count", "total")
+
+    def __init__(self, window: int = WINDOW):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def max(self) -> float:
+        return max(self._samples, default=0.0)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class OpStats:
+    __slots__ = ("queue_wait", "checkout_wait", "exec_time", "rows", "errors")
+
+    def __init__(self):
+        self.queue_wait    = RollingHistogram()
+        self.checkout_wait = RollingHistogram()
+        self.exec_time     = RollingHistogram()
+        self.rows          = RollingHistogram()
+        self.errors        = 0
+
+
+_ops: dict[str, OpStats] = {}
+
+
+def record(op: str, *, queue_wait: float | None = None, checkout_wait: float | None = None,
+           exec_time: float | None = None, rows: int | None = None, error: bool = False) -> None:
+    """Add one observation for *op*; omitted fields are left untouched. Times in seconds."""
+    with _lock:
+        stats = _ops.get(op)
+        if stats is None:
+            stats = _ops[op] = OpStats()
+        if queue_wait is not None:
+            stats.queue_wait.add(queue_wait)
+        if checkout_wait is not None:
+            stats.checkout_wait.add(checkout_wait)
+        if exec_time is not None:
+            stats.exec_time.add(exec_time)
+        if rows is not None:
+            stats.rows.add(rows)
+        if error:
+            stats.errors += 1
+
+
+def add_checkout_wait(seconds: float) -> None:
+    """Called by get_conn() on the executor thread."""
+    _tls.checkout = getattr(_tls, "checkout", 0.0) + seconds
+
+
+def take_checkout_wait() -> float:
+    """Return and reset this thread's accumulated checkout wait."""
+    waited = getattr(_tls, "checkout", 0.0)
+    _tls.checkout = 0.0
+    return waited
+
+
+def row_count(result) -> int:
+    """Rows returned by a *_sync function: list length, 1 for a single row, 0 for None."""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+def snapshot() -> dict[str, dict]:
+    """Per-op summary in milliseconds, e.g. for the dashboard or !dbstats."""
+    with _lock:
+        return {
+            op: {
+                "calls":        s.exec_time.count,
+                "errors":       s.errors,
+                "queue_p95":    s.queue_wait.percentile(95) * 1000,
+                "checkout_p95": s.checkout_wait.percentile(95) * 1000,
+                "exec_p50":     s.exec_time.percentile(50) * 1000,
+                "exec_p95":     s.exec_time.percentile(95) * 1000,
+                "exec_max":     s.exec_time.max() * 1000,
+                "exec_total":   s.exec_time.total * 1000,
+                "rows_avg":     s.rows.mean(),
+            }
+            for op, s in _ops.items()
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _ops.clear()
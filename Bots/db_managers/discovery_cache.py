@@ -0,0 +1,157 @@
+"""
+Bots/db_managers/discovery_cache.py — Discovery Name/ID Cache
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+In-memory index of the mirrored categories, channels and roles, serving the
+get_*_id_by_name() lookups without touching the database.
+
+Entries are scoped by (guild_id, kind) and indexed both ways:
+  - id   -> CacheRecord            (O(1) get / delete)
+  - name -> ids, plus a casefolded name index for case-insensitive lookups
+A name can map to several ids (same channel name in two categories or two
+guilds); renames move the id from the old name to the new one.
+
+Writes come from executor threads, reads from the event loop, so every
+operation holds one lock.
+"""
+
+import threading
+from typing import NamedTuple
+
+CATEGORY = "category"
+CHANNEL  = "channel"
+ROLE     = "role"
+KINDS    = (CATEGORY, CHANNEL, ROLE)
+
+
+class CacheRecord(NamedTuple):
+    id: int
+    name: str
+    guild_id: int | None
+    parent_id: int | None = None    # category_id for channels
+
+
+class _Scope:
+    """One (guild_id, kind) partition."""
+
+    __slots__ = ("by_id", "by_name", "by_folded")
+
+    def __init__(self):
+        self.by_id: dict[int, CacheRecord] = {}
+        # name -> {id: None}: an insertion-ordered set, so the first match is stable
+        self.by_name: dict[str, dict[int, None]] = {}
+        self.by_folded: dict[str, dict[int, None]] = {}
+
+    def add(self, record: CacheRecord) -> None:
+        self.by_id[record.id] = record
+        self.by_name.setdefault(record.name, {})[record.id] = None
+        self.by_folded.setdefault(record.name.casefold(), {})[record.id] = None
+
+    def discard(self, item_id: int) -> None:
+        record = self.by_id.pop(item_id)
+        _unlink(self.by_name, record.name, item_id)
+        _unlink(self.by_folded, record.name.casefold(), item_id)
+
+
+def _unlink(index: dict, name: str, item_id: int) -> None:
+    ids = index.get(name)
+    if ids is not None:
+        ids.pop(item_id, None)
+        if not ids:
+            del index[name]
+
+
+class DiscoveryCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scopes: dict[tuple, _Scope] = {}
+        self._where: dict[tuple, int | None] = {}   # (kind, id) -> guild_id
+
+    # ── Writes ──
+
+    def put(self, kind: str, item_id: int, name: str, guild_id: int | None = None,
+            parent_id: int | None = None) -> None:
+        """Insert or update an entry; a changed name or guild moves it."""
+        with self._lock:
+            self._remove(kind, item_id)
+            scope = self._scopes.get((guild_id, kind))
+            if scope is None:
+                scope = self._scopes[(guild_id, kind)] = _Scope()
+            scope.add(CacheRecord(item_id, name, guild_id, parent_id))
+            self._where[(kind, item_id)] = guild_id
+
+    def remove(self, kind: str, item_id: int) -> None:
+        with self._lock:
+            self._remove(kind, item_id)
+
+    def _remove(self, kind: str, item_id: int) -> None:
+        if (kind, item_id) not in self._where:
+            return
+        self._scopes[(self._where.pop((kind, item_id)), kind)].discard(item_id)
+
+    def replace(self, kind: str, records) -> None:
+        """Drop every entry of *kind* and load *records* (CacheRecord-shaped tuples).
+
+        The new indexes are built off to the side and swapped in under one
+        lock, so concurrent lookups see either the old entries or the new
+        ones, never an empty or partial scope.
+        """
+        scopes: dict[tuple, _Scope] = {}
+        where: dict[tuple, int | None] = {}
+        for record in records:
+            record = CacheRecord(*record)
+            if (kind, record.id) in where:   # a later duplicate wins, as with put()
+                scopes[(where[(kind, record.id)], kind)].discard(record.id)
+            scope = scopes.get((record.guild_id, kind))
+            if scope is None:
+                scope = scopes[(record.guild_id, kind)] = _Scope()
+            scope.add(record)
+            where[(kind, record.id)] = record.guild_id
+        with self._lock:
+            self._scopes = {k: s for k, s in self._scopes.items() if k[1] != kind}
+            self._scopes.update(scopes)
+            self._where = {k: g for k, g in self._where.items() if k[0] != kind}
+            self._where.update(where)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self._where.clear()
+
+    # ── Reads ──
+
+    def get(self, kind: str, item_id: int) -> CacheRecord | None:
+        with self._lock:
+            if (kind, item_id) not in self._where:
+                return None
+            return self._scopes[(self._where[(kind, item_id)], kind)].by_id[item_id]
+
+    def ids(self, kind: str, name: str, guild_id: int | None = None,
+            casefold: bool = False) -> list[int]:
+        """Ids named *name*, in one guild or (guild_id=None) across all of them."""
+        index_name = name.casefold() if casefold else name
+        with self._lock:
+            if guild_id is not None:
+                scopes = [self._scopes.get((guild_id, kind))]
+            else:
+                scopes = [s for (_, k), s in self._scopes.items() if k == kind]
+            found = []
+            for scope in scopes:
+                if scope is not None:
+                    index = scope.by_folded if casefold else scope.by_name
+                    found.extend(index.get(index_name, ()))
+            return found
+
+    def id_by_name(self, kind: str, name: str, guild_id: int | None = None,
+                   casefold: bool = False) -> int | None:
+        ids = self.ids(kind, name, guild_id, casefold)
+        return ids[0] if ids else None
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return sum(len(s.by_id) for (_, k), s in self._scopes.items() if k == kind)
+
+    def records(self, kind: str) -> list[CacheRecord]:
+        with self._lock:
+            return [r for (_, k), s in self._scopes.items() if k == kind for r in s.by_id.values()]
@@ -4,220 +4,285 @@ Copyright (c) 2026 Concord Desk. All rights reserved.
 PROPRIETARY AND CONFIDENTIAL.
 """
 
+import asyncio
 import logging
 import json
-
-from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, db_execute  # noqa: F401
+import os
+
+from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, start_db_worker, db_execute, after_commit, transaction_state, BULK  # noqa: F401
+from . import queries as Q
+from .migrations import ensure_schema
+from .discovery_cache import DiscoveryCache, CacheRecord, CATEGORY, CHANNEL, ROLE
+from .role_index import RoleIndex
+from . import discovery_snapshot
+from .discovery_events import (
+    EventBus, DiscoveryChange, MEMBER, CREATED, RENAMED, MOVED, DELETED, ROLES_CHANGED,
+)
+from .message_retention import run_retention, RetentionRule, snowflake_for
+from .change_listener import listener
 
 logger = logging.getLogger("Concord")
 
-# ─── In-Memory Cache (Hot Path) ─────────────────────────────────────────────────────────────
-# Caches name -> id mappings for discovery items to avoid DB hits on every lookup.
-_cache_categories = {}  # {name: id}
-_cache_channels   = {}  # {name: id}
-_cache_roles      = {}  # {name: id}
+# ─── In-Memory Cache (Hot Path) ───────────────────────────────────────────────
+# Serves get_*_id_by_name(); kept in step with every upsert/delete below.
+cache = DiscoveryCache()
+# Role membership by id, for set queries: role_index.members_with(all=[...], none=[...]).
+role_index = RoleIndex()
+# Structure/membership changes from live events, after they are written.
+bus = EventBus()
+# Days of discovery_changes history kept by the daily cleanup.
+CHANGES_KEEP_DAYS = int(os.getenv("DISCOVERY_CHANGES_KEEP_DAYS", "30"))
 
-# ─── Schema Initialization + Migration ─────────────────────────────────────────────────────
+# ─── Schema Initialization ────────────────────────────────────────────────────
 
-def _initialize_discovery_db_sync():
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS categories (
-                    id   BIGINT PRIMARY KEY,
-                    name TEXT
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS channels (
-                    id          BIGINT PRIMARY KEY,
-                    name        TEXT,
-                    type        TEXT,
-                    category_id BIGINT,
-                    CONSTRAINT fk_category FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS roles (
-                    id       BIGINT PRIMARY KEY,
-                    name     TEXT,
-                    color    TEXT,
-                    position INTEGER
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS members (
-                    id           BIGINT PRIMARY KEY,
-                    name         TEXT,
-                    display_name TEXT,
-                    joined_at    TEXT,
-                    roles        JSONB DEFAULT '[]'::jsonb
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS messages (
-                    id         BIGINT PRIMARY KEY,
-                    channel_id BIGINT,
-                    author_id  BIGINT,
-                    content    TEXT,
-                    created_at TEXT
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_events (
-                    id          BIGINT PRIMARY KEY,
-                    name        TEXT,
-                    description TEXT,
-                    start_time  TEXT,
-                    end_time    TEXT,
-                    status      INTEGER
-                )
-            ''')
-        conn.commit()
-    finally:
-        put_conn(conn)
+# DB warm-up running behind a cache loaded from the local snapshot.
+_warm_task: asyncio.Task | None = None
+# Set once the gateway's structure is in the cache; a later DB warm-up then
+# leaves categories/channels/roles alone instead of loading older rows.
+_gateway_structure = False
 
 async def initialize_discovery_db():
-    await db_execute(_initialize_discovery_db_sync)
-    await warm_discovery_cache()
+    """Load the local snapshot, then warm from the DB — in the background if it loaded."""
+    global _warm_task
+    if discovery_snapshot.load(cache, role_index):
+        _warm_task = asyncio.create_task(_initialize_from_db(), name="discovery-warm")
+    else:
+        await ensure_schema()
+        await warm_discovery_cache()
+
+async def _initialize_from_db():
+    try:
+        await ensure_schema()
+        await warm_discovery_cache()
+    except Exception as e:
+        # The snapshot keeps serving lookups; the next gateway snapshot refreshes it.
+        logger.error(f"[ERR-DSC-006] [Discovery] Background cache warm-up failed: {e}")
+
+async def wait_until_warm():
+    """Wait for a background warm-up started by initialize_discovery_db, if any."""
+    if _warm_task is not None:
+        await asyncio.shield(_warm_task)
+
+def load_gateway_structure(categories, channels, roles):
+    """Put the gateway's structure into the cache without touching the DB.
+
+    Rows as for sync_guild_snapshot.  Lets config resolution run before the
+    DB warm-up and reconcile have finished; the reconcile still writes them.
+    """
+    global _gateway_structure
+    _refresh_caches({"categories": categories, "channels": channels, "roles": roles})
+    _gateway_structure = True
+
+async def save_cache_snapshot():
+    """Write the cache and role index to the local snapshot file (off the event loop)."""
+    return await asyncio.to_thread(discovery_snapshot.save, cache, role_index)
 
 def _warm_discovery_cache_sync():
-    global _cache_categories, _cache_channels, _cache_roles
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            # Categories
-            cur.execute('SELECT id, name FROM categories')
-            _cache_categories = {row['name']: row['id'] for row in cur.fetchall()}
-            
-            # Channels
-            cur.execute('SELECT id, name FROM channels')
-            _cache_channels = {row['name']: row['id'] for row in cur.fetchall()}
-            
-            # Roles
-            cur.execute('SELECT id, name FROM roles')
-            _cache_roles = {row['name']: row['id'] for row in cur.fetchall()}
+            cur.execute('SELECT id, name, guild_id FROM categories')
+            categories = [CacheRecord(r['id'], r['name'], r['guild_id']) for r in cur.fetchall()]
+
+            cur.execute('SELECT id, name, guild_id, category_id FROM channels')
+            channels = [CacheRecord(r['id'], r['name'], r['guild_id'], r['category_id']) for r in cur.fetchall()]
+
+            cur.execute('SELECT id, name, guild_id FROM roles')
+            roles = [CacheRecord(r['id'], r['name'], r['guild_id']) for r in cur.fetchall()]
+
+            cur.execute('SELECT id FROM members')
+            member_ids = [r['id'] for r in cur.fetchall()]
+            cur.execute('SELECT member_id, role_id FROM member_roles')
+            member_roles = [(r['member_id'], r['role_id']) for r in cur.fetchall()]
     finally:
         put_conn(conn)
-            
-    logger.info(f"[Discovery] Cache warmed: {len(_cache_categories)} cats, {len(_cache_channels)} chans, {len(_cache_roles)} roles.")
+    if not _gateway_structure:
+        cache.replace(CATEGORY, categories)
+        cache.replace(CHANNEL, channels)
+        cache.replace(ROLE, roles)
+    role_index.replace(member_ids, member_roles)
+    logger.info(
+        f"[Discovery] Cache warmed: {len(categories)} cats, {len(channels)} chans, {len(roles)} roles, "
+        f"{len(member_ids)} members."
+    )
 
 async def warm_discovery_cache():
-    await db_execute(_warm_discovery_cache_sync)
+    await db_execute(_warm_discovery_cache_sync, readonly=True)
+
+# ─── Change Log ───────────────────────────────────────────────────────────────
+# Live writes compare against the cache to classify the change, append it to
+# discovery_changes in the same transaction and return it; the async wrapper
+# publishes it on `bus` once the write is done.  The cache itself is only
+# patched after the commit (after_commit), so a batch that rolls back and is
+# retried item by item classifies each write against committed state again.
+# Within a batch, each write also stages its result in transaction_state(),
+# so a later write to the same entity compares against it, not the cache.
+
+def _previous(kind, item_id) -> CacheRecord | None:
+    staged = transaction_state()
+    if staged is not None and (kind, item_id) in staged:
+        return staged[(kind, item_id)]
+    return cache.get(kind, item_id)
+
+def _stage(kind, item_id, record: CacheRecord | None) -> None:
+    staged = transaction_state()
+    if staged is not None:
+        staged[(kind, item_id)] = record
+
+def _structure_change(kind, item_id, name, guild_id, parent_id=None) -> DiscoveryChange | None:
+    before = _previous(kind, item_id)
+    if before is None:
+        return DiscoveryChange(kind, CREATED, item_id, guild_id, name)
+    if before.name != name:
+        return DiscoveryChange(kind, RENAMED, item_id, guild_id, name, before.name)
+    if before.parent_id != parent_id:
+        return DiscoveryChange(kind, MOVED, item_id, guild_id, name,
+                               detail={"from": before.parent_id, "to": parent_id})
+    return None
+
+def _deletion(kind, item_id) -> DiscoveryChange:
+    before = _previous(kind, item_id)
+    if before is None:
+        return DiscoveryChange(kind, DELETED, item_id)
+    return DiscoveryChange(kind, DELETED, item_id, before.guild_id, before.name)
+
+def _log_change(cur, change: DiscoveryChange | None) -> None:
+    if change is not None:
+        cur.execute(Q.DISCOVERY_CHANGE_LOG, (
+            change.kind, change.action, change.entity_id, change.guild_id, change.name, change.old_name,
+            json.dumps(change.detail) if change.detail is not None else None,
+        ), prepare=True)
+
+def _publish(change: DiscoveryChange | None) -> None:
+    if change is not None:
+        bus.publish(change)
 
 # ─── Upsert Functions ─────────────────────────────────────────────────────────
 
-def _upsert_category_sync(category_id, name):
+def _upsert_category_sync(category_id, name, guild_id=None):
+    change = _structure_change(CATEGORY, category_id, name, guild_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute('''
-                INSERT INTO categories (id, name) VALUES (%s, %s)
-                ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name
-            ''', (category_id, name))
+            cur.execute(Q.UPSERT_CATEGORY, (category_id, name, guild_id), prepare=True)
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    _cache_categories[name] = category_id
+    _stage(CATEGORY, category_id, CacheRecord(category_id, name, guild_id))
+    after_commit(cache.put, CATEGORY, category_id, name, guild_id)
+    return change
 
-def _upsert_channel_sync(channel_id, name, channel_type, category_id):
+def _upsert_channel_sync(channel_id, name, channel_type, category_id, guild_id=None):
+    change = _structure_change(CHANNEL, channel_id, name, guild_id, category_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute('''
-                INSERT INTO channels (id, name, type, category_id) VALUES (%s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET 
-                    name = EXCLUDED.name, 
-                    type = EXCLUDED.type, 
-                    category_id = EXCLUDED.category_id
-            ''', (channel_id, name, channel_type, category_id))
+            cur.execute(Q.UPSERT_CHANNEL, (channel_id, name, channel_type, category_id, guild_id), prepare=True)
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    _cache_channels[name] = channel_id
+    _stage(CHANNEL, channel_id, CacheRecord(channel_id, name, guild_id, category_id))
+    after_commit(cache.put, CHANNEL, channel_id, name, guild_id, category_id)
+    return change
 
-def _upsert_role_sync(role_id, name, color, position):
+def _upsert_role_sync(role_id, name, color, position, guild_id=None):
+    change = _structure_change(ROLE, role_id, name, guild_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute('''
-                INSERT INTO roles (id, name, color, position) VALUES (%s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET 
-                    name = EXCLUDED.name, 
-                    color = EXCLUDED.color, 
-                    position = EXCLUDED.position
-            ''', (role_id, name, str(color), position))
+            cur.execute(Q.UPSERT_ROLE, (role_id, name, str(color), position, guild_id), prepare=True)
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    _cache_roles[name] = role_id
+    _stage(ROLE, role_id, CacheRecord(role_id, name, guild_id))
+    after_commit(cache.put, ROLE, role_id, name, guild_id)
+    return change
 
-def _upsert_member_sync(member_id, name, display_name, joined_at, roles=None):
+def _upsert_member_sync(member_id, name, display_name, joined_at, roles=None, role_ids=None):
     conn = get_conn()
     try:
         with conn.cursor() as cur:
             if roles is not None:
                 roles_json = json.dumps(roles, ensure_ascii=False)
-                cur.execute('''
-                    INSERT INTO members (id, name, display_name, joined_at, roles)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT(id) DO UPDATE SET
-                        name         = EXCLUDED.name,
-                        display_name = EXCLUDED.display_name,
-                        joined_at    = EXCLUDED.joined_at,
-                        roles        = EXCLUDED.roles
-                ''', (member_id, name, display_name, str(joined_at), roles_json))
+                cur.execute(Q.UPSERT_MEMBER_WITH_ROLES, (member_id, name, display_name, str(joined_at), roles_json), prepare=True)
             else:
-                cur.execute('''
-                    INSERT INTO members (id, name, display_name, joined_at)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT(id) DO UPDATE SET
-                        name         = EXCLUDED.name,
-                        display_name = EXCLUDED.display_name,
-                        joined_at    = EXCLUDED.joined_at
-                ''', (member_id, name, display_name, str(joined_at)))
+                cur.execute(Q.UPSERT_MEMBER, (member_id, name, display_name, str(joined_at)), prepare=True)
+            if role_ids is not None:
+                # Full membership known: drop what is gone, add what is new.
+                role_ids = list(role_ids)
+                cur.execute(Q.MEMBER_ROLES_KEEP_ONLY, (member_id, role_ids), prepare=True)
+                cur.execute(Q.MEMBER_ROLES_ADD, (member_id, role_ids), prepare=True)
+        conn.commit()
+    finally:
+        put_conn(conn)
+    after_commit(role_index.set_member, member_id, role_ids)
+
+def _update_member_roles_sync(member_id, added, removed):
+    change = DiscoveryChange(MEMBER, ROLES_CHANGED, member_id,
+                             detail={"added": list(added), "removed": list(removed)})
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if removed:
+                cur.execute(Q.MEMBER_ROLES_REMOVE, (member_id, list(removed)), prepare=True)
+            if added:
+                cur.execute(Q.MEMBER_ROLES_ADD, (member_id, list(added)), prepare=True)
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
+    after_commit(role_index.update, member_id, added, removed)
+    return change
 
 # ─── Delete Functions ─────────────────────────────────────────────────────────
 
 def _delete_category_sync(category_id):
+    change = _deletion(CATEGORY, category_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
             cur.execute('DELETE FROM categories WHERE id = %s', (category_id,))
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    # Remove from cache (requires value search as cache is name -> id)
-    global _cache_categories
-    _cache_categories = {k: v for k, v in _cache_categories.items() if v != category_id}
+    _stage(CATEGORY, category_id, None)
+    after_commit(cache.remove, CATEGORY, category_id)
+    return change
 
 def _delete_channel_sync(channel_id):
+    change = _deletion(CHANNEL, channel_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
             cur.execute('DELETE FROM channels WHERE id = %s', (channel_id,))
+            cur.execute('DELETE FROM sweep_checkpoints WHERE channel_id = %s', (channel_id,))
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    # Remove from cache
-    global _cache_channels
-    _cache_channels = {k: v for k, v in _cache_channels.items() if v != channel_id}
+    _stage(CHANNEL, channel_id, None)
+    after_commit(cache.remove, CHANNEL, channel_id)
+    return change
 
 def _delete_role_sync(role_id):
+    change = _deletion(ROLE, role_id)
     conn = get_conn()
     try:
         with conn.cursor() as cur:
             cur.execute('DELETE FROM roles WHERE id = %s', (role_id,))
+            cur.execute('DELETE FROM member_roles WHERE role_id = %s', (role_id,))
+            _log_change(cur, change)
         conn.commit()
     finally:
         put_conn(conn)
-    # Remove from cache
-    global _cache_roles
-    _cache_roles = {k: v for k, v in _cache_roles.items() if v != role_id}
+    _stage(ROLE, role_id, None)
+    after_commit(cache.remove, ROLE, role_id)
+    after_commit(role_index.remove_role, role_id)
+    return change
 
 def _delete_member_sync(member_id):
     conn = get_conn()
@@ -227,23 +292,7 @@ def _delete_member_sync(member_id):
         conn.commit()
     finally:
         put_conn(conn)
-
-def _upsert_message_sync(message_id, channel_id, author_id, content, created_at):
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute('''
-                INSERT INTO messages (id, channel_id, author_id, content, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (id) DO UPDATE SET 
-                    channel_id = EXCLUDED.channel_id,
-                    author_id = EXCLUDED.author_id,
-                    content = EXCLUDED.content,
-                    created_at = EXCLUDED.created_at
-            ''', (message_id, channel_id, author_id, content, str(created_at)))
-        conn.commit()
-    finally:
-        put_conn(conn)
+    after_commit(role_index.remove_member, member_id)
 
 def _delete_message_sync(message_id):
     conn = get_conn()
@@ -283,157 +332,548 @@ def _delete_scheduled_event_sync(event_id):
 
 # ─── Async Wrappers ───────────────────────────────────────────────────────────
 
-async def upsert_category(category_id, name):
-    await db_execute(_upsert_category_sync, category_id, name)
+async def upsert_category(category_id, name, guild_id=None):
+    _publish(await db_execute(_upsert_category_sync, category_id, name, guild_id, key=("category", category_id), batch=True))
 
-async def upsert_channel(channel_id, name, channel_type, category_id):
-    await db_execute(_upsert_channel_sync, channel_id, name, channel_type, category_id)
+async def upsert_channel(channel_id, name, channel_type, category_id, guild_id=None):
+    _publish(await db_execute(_upsert_channel_sync, channel_id, name, channel_type, category_id, guild_id, key=("channel", channel_id), batch=True))
 
-async def upsert_role(role_id, name, color, position):
-    await db_execute(_upsert_role_sync, role_id, name, color, position)
+async def upsert_role(role_id, name, color, position, guild_id=None):
+    _publish(await db_execute(_upsert_role_sync, role_id, name, color, position, guild_id, key=("role", role_id), batch=True))
 
-async def upsert_member(member_id, name, display_name, joined_at, roles=None):
-    await db_execute(_upsert_member_sync, member_id, name, display_name, joined_at, roles)
+async def upsert_member(member_id, name, display_name, joined_at, roles=None, role_ids=None):
+    await db_execute(_upsert_member_sync, member_id, name, display_name, joined_at, roles, role_ids,
+                     key=("member", member_id), batch=True)
 
-async def upsert_message(message_id, channel_id, author_id, content, created_at):
-    await db_execute(_upsert_message_sync, message_id, channel_id, author_id, content, created_at)
+async def update_member_roles(member_id, added=(), removed=()):
+    """Apply a role diff (role ids) to member_roles without rewriting the rest."""
+    if added or removed:
+        _publish(await db_execute(_update_member_roles_sync, member_id, tuple(added), tuple(removed),
+                                  key=("member", member_id), batch=True))
 
 async def upsert_scheduled_event(event_id, name, description, start_time, end_time, status):
-    await db_execute(_upsert_scheduled_event_sync, event_id, name, description, start_time, end_time, status)
+    await db_execute(_upsert_scheduled_event_sync, event_id, name, description, start_time, end_time, status, key=("scheduled_event", event_id), batch=True)
 
 async def delete_category(category_id):
-    await db_execute(_delete_category_sync, category_id)
+    _publish(await db_execute(_delete_category_sync, category_id, key=("category", category_id)))
 
 async def delete_channel(channel_id):
-    await db_execute(_delete_channel_sync, channel_id)
+    _publish(await db_execute(_delete_channel_sync, channel_id, key=("channel", channel_id)))
 
 async def delete_role(role_id):
-    await db_execute(_delete_role_sync, role_id)
+    _publish(await db_execute(_delete_role_sync, role_id, key=("role", role_id)))
 
 async def delete_member(member_id):
-    await db_execute(_delete_member_sync, member_id)
+    await db_execute(_delete_member_sync, member_id, key=("member", member_id))
 
 async def delete_message(message_id):
-    await db_execute(_delete_message_sync, message_id)
+    await db_execute(_delete_message_sync, message_id, key=("message", message_id), batch=True)
 
 async def delete_scheduled_event(event_id):
-    await db_execute(_delete_scheduled_event_sync, event_id)
+    await db_execute(_delete_scheduled_event_sync, event_id, key=("scheduled_event", event_id))
+
+# ─── Cross-Process Changes ────────────────────────────────────────────────────
+# Writes made by another Concord process arrive as NOTIFY payloads (see
+# change_listener.py) and patch the cache and role index the same way a
+# local write would; structure changes are also published on `bus`.
+
+def _remote_structure(kind):
+    def _apply(op, row):
+        item_id = row["id"]
+        if op == "DELETE":
+            change = _deletion(kind, item_id)
+            cache.remove(kind, item_id)
+            if kind == ROLE:
+                role_index.remove_role(item_id)
+        else:
+            parent_id = row.get("category_id")
+            change = _structure_change(kind, item_id, row["name"], row["guild_id"], parent_id)
+            cache.put(kind, item_id, row["name"], row["guild_id"], parent_id)
+        _publish(change)
+    return _apply
+
+def _remote_member(op, row):
+    if op == "DELETE":
+        role_index.remove_member(row["id"])
+    else:
+        role_index.set_member(row["id"])
+
+def _remote_member_role(op, row):
+    if op == "INSERT":
+        role_index.update(row["member_id"], added=[row["role_id"]])
+    elif op == "DELETE":
+        role_index.update(row["member_id"], removed=[row["role_id"]])
+
+listener.on("categories", _remote_structure(CATEGORY))
+listener.on("channels", _remote_structure(CHANNEL))
+listener.on("roles", _remote_structure(ROLE))
+listener.on("members", _remote_member)
+listener.on("member_roles", _remote_member_role)
+listener.on_resync(warm_discovery_cache)
+
+# ─── Bulk Sync ────────────────────────────────────────────────────────────────
+# Used by the startup sweep.  Rows are tuples in the column order given in
+# _BULK_TABLES, as produced from discord objects (see _normalize_row()).
+#
+# sync_guild_snapshot() reconciles: it loads the current mirror, diffs it
+# against the live snapshot and writes only inserts, updates and deletes, so
+# a restart costs in proportion to what changed while the bot was offline.
+# Large change sets (e.g. the first boot) go through COPY into a temp
+# staging table and one INSERT ... ON CONFLICT instead of row-by-row.
+
+_BULK_TABLES = {
+    "categories":       ("id", "name", "guild_id"),
+    "channels":         ("id", "name", "type", "category_id", "guild_id"),
+    "roles":            ("id", "name", "color", "position", "guild_id"),
+    "members":          ("id", "name", "display_name", "joined_at", "roles"),
+    "scheduled_events": ("id", "name", "description", "start_time", "end_time", "status"),
+    # Not part of the snapshot; written in batches by MessageMirrorBuffer.
+    "messages":         ("id", "channel_id", "author_id", "content", "created_at"),
+}
+_SNAPSHOT_TABLES = ("categories", "channels", "roles", "members", "scheduled_events")
+
+# Change sets larger than this are written via COPY rather than executemany.
+COPY_THRESHOLD = 500
+
+
+def _normalize_row(table, row) -> tuple:
+    """Convert a row of discord values to the form stored (and read back) from the mirror."""
+    if table == "roles":
+        rid, name, color, position, guild_id = row
+        return (rid, name, str(color), position, guild_id)
+    if table == "members":
+        mid, name, display_name, joined_at, roles = row
+        return (mid, name, display_name, str(joined_at), list(roles or []))
+    if table == "scheduled_events":
+        eid, name, description, start_time, end_time, status = row
+        return (eid, name, description, str(start_time), str(end_time) if end_time else None, status)
+    return tuple(row)
+
+
+def _normalize_rows(table, rows) -> list:
+    """_normalize_row() every row; members seen in several guilds become one row.
+
+    The merged member keeps its first guild's name, display name and join
+    date and holds the union of its role names (first-seen order), so the
+    row is stable from one sync to the next and ids are unique for COPY.
+    """
+    rows = [_normalize_row(table, row) for row in rows]
+    if table != "members":
+        return rows
+    merged: dict = {}
+    for row in rows:
+        first = merged.get(row[0])
+        if first is None:
+            merged[row[0]] = row
+        else:
+            roles = first[4] + [r for r in row[4] if r not in first[4]]
+            merged[row[0]] = first[:4] + (roles,)
+    return list(merged.values())
+
+
+def _to_db(table, row) -> tuple:
+    if table == "members":
+        return row[:4] + (json.dumps(row[4], ensure_ascii=False),)
+    return row
+
+
+def diff_rows(current: dict, live: list) -> tuple[list, list, list]:
+    """Compare the mirror ({id: row}) with live rows. Returns (inserts, updates, deleted ids)."""
+    inserts, updates = [], []
+    seen = set()
+    for row in live:
+        seen.add(row[0])
+        old = current.get(row[0])
+        if old is None:
+            inserts.append(row)
+        elif old != row:
+            updates.append(row)
+    return inserts, updates, [rid for rid in current if rid not in seen]
+
+
+def _load_mirror_sync(cur, table) -> dict:
+    cur.execute(f"SELECT {', '.join(_BULK_TABLES[table])} FROM {table}")
+    return {row["id"]: tuple(row.values()) for row in cur.fetchall()}
+
+
+def _copy_merge(cur, table, rows) -> int:
+    """COPY *rows* into a staging table and merge them with one statement."""
+    columns = _BULK_TABLES[table]
+    cols = ", ".join(columns)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+    changed = " OR ".join(f"{table}.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in columns[1:])
+    cur.execute(f"CREATE TEMP TABLE _stage_{table} (LIKE {table}) ON COMMIT DROP")
+    with cur.copy(f"COPY _stage_{table} ({cols}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(_to_db(table, row))
+    cur.execute(f'''
+        INSERT INTO {table} ({cols}) SELECT {cols} FROM _stage_{table}
+        ON CONFLICT (id) DO UPDATE SET {updates}
+        WHERE {changed}
+    ''')
+    return cur.rowcount
+
+
+def _upsert_many(cur, table, rows) -> int:
+    if len(rows) > COPY_THRESHOLD:
+        return _copy_merge(cur, table, rows)
+    columns = _BULK_TABLES[table]
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+    cur.executemany(
+        f'''
+        INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))})
+        ON CONFLICT (id) DO UPDATE SET {updates}
+        ''',
+        [_to_db(table, row) for row in rows],
+    )
+    return len(rows)
+
+
+def _refresh_caches(snapshot: dict, replace: bool = True) -> None:
+    """Load synced rows into the cache; replace=False merges instead of replacing."""
+    records = {
+        CATEGORY: [CacheRecord(r[0], r[1], r[2]) for r in snapshot.get("categories", ())],
+        CHANNEL:  [CacheRecord(r[0], r[1], r[4], r[3]) for r in snapshot.get("channels", ())],
+        ROLE:     [CacheRecord(r[0], r[1], r[4]) for r in snapshot.get("roles", ())],
+    }
+    for kind, table in ((CATEGORY, "categories"), (CHANNEL, "channels"), (ROLE, "roles")):
+        if table not in snapshot:
+            continue
+        if replace:
+            cache.replace(kind, records[kind])
+        else:
+            for record in records[kind]:
+                cache.put(kind, *record)
+    if "members" in snapshot:
+        member_ids = [r[0] for r in snapshot["members"]]
+        if replace:
+            role_index.retain_members(member_ids)
+        for member_id in member_ids:
+            role_index.set_member(member_id)
+
+
+def _bulk_sync_sync(table, rows, prune=True):
+    """Merge *rows* into *table* via COPY. Returns (rows written, rows deleted)."""
+    rows = _normalize_rows(table, rows)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            written = _copy_merge(cur, table, rows)
+            deleted = 0
+            if prune:
+                cur.execute(f'''
+                    DELETE FROM {table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM _stage_{table} s WHERE s.id = t.id)
+                ''')
+                deleted = cur.rowcount
+        conn.commit()
+    finally:
+        put_conn(conn)
+    _refresh_caches({table: rows}, replace=prune)
+    return written, deleted
+
+
+def _reconcile_member_roles(cur, live) -> tuple[int, int]:
+    """Set-diff member_roles against live (member_id, role_id) pairs."""
+    cur.execute('SELECT member_id, role_id FROM member_roles')
+    current = {(r['member_id'], r['role_id']) for r in cur.fetchall()}
+    live = set(live)
+    added, removed = sorted(live - current), sorted(current - live)
+    if added:
+        cur.executemany('INSERT INTO member_roles (member_id, role_id) VALUES (%s, %s) ON CONFLICT DO NOTHING', added)
+    if removed:
+        cur.execute(
+            'DELETE FROM member_roles WHERE (member_id, role_id) IN '
+            '(SELECT * FROM unnest(%s::bigint[], %s::bigint[]))',
+            ([m for m, _ in removed], [r for _, r in removed]),
+        )
+    return len(added), len(removed)
+
+
+def _reconcile_snapshot_sync(snapshot: dict, member_roles=None) -> dict:
+    """Diff each table of *snapshot* against the mirror and apply only the changes.
+
+    Returns {table: (inserted, updated, deleted)}.
+    """
+    snapshot = {t: _normalize_rows(t, rows) for t, rows in snapshot.items()}
+    changes = {}
+    role_changes = None
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            for table in _SNAPSHOT_TABLES:   # parents first, so FKs resolve
+                if table not in snapshot:
+                    continue
+                inserts, updates, deleted = diff_rows(_load_mirror_sync(cur, table), snapshot[table])
+                if inserts or updates:
+                    _upsert_many(cur, table, inserts + updates)
+                changes[table] = (inserts, updates, deleted)
+            if member_roles is not None:   # after members (FK), before member deletes
+                role_changes = _reconcile_member_roles(cur, member_roles)
+            for table in reversed(_SNAPSHOT_TABLES):
+                if changes.get(table) and changes[table][2]:
+                    cur.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", (changes[table][2],))
+        conn.commit()
+    finally:
+        put_conn(conn)
+    _refresh_caches(snapshot)
+    if member_roles is not None:
+        role_index.replace([r[0] for r in snapshot.get("members", ())], member_roles)
+    counts = {t: (len(i), len(u), len(d)) for t, (i, u, d) in changes.items()}
+    if role_changes is not None:
+        counts["member_roles"] = (role_changes[0], 0, role_changes[1])
+    return counts
+
+
+def _upsert_messages_sync(rows) -> int:
+    """Write a batch of (id, channel_id, author_id, content, created_at) rows."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            written = _upsert_many(cur, "messages", rows)
+        conn.commit()
+        return written
+    finally:
+        put_conn(conn)
+
+
+async def bulk_upsert_categories(rows, prune=True):
+    """rows: (id, name, guild_id)."""
+    return await db_execute(_bulk_sync_sync, "categories", rows, prune, key=("discovery", "snapshot"))
+
+async def bulk_upsert_channels(rows, prune=True):
+    """rows: (id, name, type, category_id, guild_id)."""
+    return await db_execute(_bulk_sync_sync, "channels", rows, prune, key=("discovery", "snapshot"))
+
+async def bulk_upsert_roles(rows, prune=True):
+    """rows: (id, name, color, position, guild_id)."""
+    return await db_execute(_bulk_sync_sync, "roles", rows, prune, key=("discovery", "snapshot"))
+
+async def bulk_upsert_members(rows, prune=True):
+    """rows: (id, name, display_name, joined_at, role_names)."""
+    return await db_execute(_bulk_sync_sync, "members", rows, prune, key=("discovery", "snapshot"))
+
+async def bulk_upsert_scheduled_events(rows, prune=True):
+    """rows: (id, name, description, start_time, end_time, status)."""
+    return await db_execute(_bulk_sync_sync, "scheduled_events", rows, prune, key=("discovery", "snapshot"))
+
+
+async def sync_guild_snapshot(categories=None, channels=None, roles=None, members=None,
+                              scheduled_events=None, member_roles=None):
+    """Reconcile the mirrored guild structure with a full snapshot in one transaction.
+
+    Each argument is a row list as for the matching bulk_upsert_* function
+    and must cover every guild: mirror rows missing from it are deleted.
+    Tables passed as None are left alone, so structure and members can be
+    synced separately.  member_roles, if given, is the full list of
+    (member_id, role_id) pairs.  Returns {table: (inserted, updated, deleted)}.
+    """
+    tables = (categories, channels, roles, members, scheduled_events)
+    snapshot = {t: rows for t, rows in zip(_SNAPSHOT_TABLES, tables) if rows is not None}
+    changes = await db_execute(_reconcile_snapshot_sync, snapshot, member_roles, key=("discovery", "snapshot"))
+    for table, (inserted, updated, deleted) in changes.items():
+        if inserted or updated or deleted:
+            logger.info(f"[Discovery] Reconciled {table}: +{inserted} ~{updated} -{deleted}.")
+    if not any(sum(c) for c in changes.values()):
+        logger.info("[Discovery] Mirror already up to date; nothing to write.")
+    await save_cache_snapshot()
+    return changes
+
+# ─── Message Sweep Checkpoints ────────────────────────────────────────────────
+# Per-channel high-water mark (newest message id mirrored) so the history
+# sweep only fetches what arrived since the last run.
+
+def _get_sweep_checkpoints_sync():
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT channel_id, last_message_id FROM sweep_checkpoints')
+            return {row['channel_id']: row['last_message_id'] for row in cur.fetchall()}
+    finally:
+        put_conn(conn)
+
+def _set_sweep_checkpoint_sync(channel_id, last_message_id):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(Q.SWEEP_CHECKPOINT_SET, (channel_id, last_message_id), prepare=True)
+        conn.commit()
+    finally:
+        put_conn(conn)
+
+async def get_sweep_checkpoints():
+    """{channel_id: last_message_id} for every swept channel."""
+    return await db_execute(_get_sweep_checkpoints_sync, readonly=True)
+
+async def set_sweep_checkpoint(channel_id, last_message_id):
+    """Advance a channel's checkpoint (never moves backwards).
+
+    Shares the message mirror's write lane, so it commits after any
+    mirror flush queued before it.
+    """
+    await db_execute(_set_sweep_checkpoint_sync, channel_id, last_message_id, key=("messages", "mirror"))
 
 # ─── Query Functions ─────────────────────────────────────────────────────────
 
-async def get_category_id_by_name(name):
-    if name in _cache_categories:
-        return _cache_categories[name]
-        
+# Name lookups are answered from the cache alone.  With guild_id=None every
+# guild is searched; casefold=True ignores case.
+
+async def get_category_id_by_name(name, guild_id=None, casefold=False):
+    return cache.id_by_name(CATEGORY, name, guild_id, casefold)
+
+async def get_channel_id_by_name(name, guild_id=None, casefold=False):
+    return cache.id_by_name(CHANNEL, name, guild_id, casefold)
+
+async def get_role_id_by_name(name, guild_id=None, casefold=False):
+    return cache.id_by_name(ROLE, name, guild_id, casefold)
+
+async def get_recent_messages(channel_id, limit=50, before=None):
+    """Newest mirrored messages in a channel, optionally older than message id *before*."""
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT id FROM categories WHERE name = %s', (name,))
-                result = cur.fetchone()
-                return result['id'] if result else None
+                cur.execute(Q.RECENT_MESSAGES, (channel_id, before, limit), prepare=True)
+                return [dict(r) for r in cur.fetchall()]
         finally:
             put_conn(conn)
-    res = await db_execute(_fetch)
-    if res:
-        _cache_categories[name] = res
-    return res
+    return await db_execute(_fetch, readonly=True)
 
-async def get_channel_id_by_name(name):
-    if name in _cache_channels:
-        return _cache_channels[name]
+async def count_messages_by_author(since, author_id=None):
+    """Messages per author since *since* (a datetime) — {author_id: count}.
 
+    The time bound is converted to a snowflake, so this is a primary-key
+    (or, for one author, idx_messages_author) range scan.
+    """
+    lower = snowflake_for(since)
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT id FROM channels WHERE name = %s', (name,))
-                result = cur.fetchone()
-                return result['id'] if result else None
+                if author_id is not None:
+                    cur.execute(Q.MESSAGE_COUNT_FOR_AUTHOR_SINCE, (author_id, lower), prepare=True)
+                    return {author_id: cur.fetchone()['messages']}
+                cur.execute(Q.MESSAGE_COUNTS_SINCE, (lower,), prepare=True)
+                return {r['author_id']: r['messages'] for r in cur.fetchall()}
         finally:
             put_conn(conn)
-    res = await db_execute(_fetch)
-    if res:
-        _cache_channels[name] = res
-    return res
+    return await db_execute(_fetch, readonly=True)
 
-async def get_role_id_by_name(name):
-    if name in _cache_roles:
-        return _cache_roles[name]
+async def search_messages(query, channel_id=None, author_id=None, since=None, limit=10, offset=0):
+    """Mirrored messages matching *query*, best match first — list of dicts.
 
+    *query* uses web-search syntax ("quoted phrase", or, -exclude).
+    *channel_id* is one id or a collection of ids (e.g. the channels the
+    caller may read); *since* is a datetime.  Each row carries its `rank`
+    and a `snippet` with the matched words in **bold**.  Page with
+    *limit* / *offset*.
+    """
+    if not query or not query.strip():
+        return []
+    if channel_id is not None and not isinstance(channel_id, int):
+        channel_id = list(channel_id)
+        if not channel_id:
+            return []
+    channels = [channel_id] if isinstance(channel_id, int) else channel_id
+    lower = snowflake_for(since) if since is not None else 0
+    params = (query, lower, channels, channels, author_id, author_id, limit, offset)
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT id FROM roles WHERE name = %s', (name,))
-                result = cur.fetchone()
-                return result['id'] if result else None
+                cur.execute(Q.SEARCH_MESSAGES, params, prepare=True)
+                return [dict(r) for r in cur.fetchall()]
         finally:
             put_conn(conn)
-    res = await db_execute(_fetch)
-    if res:
-        _cache_roles[name] = res
-    return res
+    return await db_execute(_fetch, readonly=True)
 
 async def get_member_roles(member_id):
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT roles FROM members WHERE id = %s', (member_id,))
+                cur.execute(Q.MEMBER_ROLES, (member_id,), prepare=True)
                 result = cur.fetchone()
                 if result and result['roles']:
                     return result['roles'] if isinstance(result['roles'], list) else json.loads(result['roles'])
                 return []
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
+
+def _role_ids(role) -> list[int]:
+    """A role id, or every cached id of a role name (one per guild)."""
+    if isinstance(role, int):
+        return [role]
+    return cache.ids(ROLE, role)
+
+async def get_member_role_ids(member_id):
+    def _fetch():
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(Q.MEMBER_ROLE_IDS, (member_id,), prepare=True)
+                return [r['role_id'] for r in cur.fetchall()]
+        finally:
+            put_conn(conn)
+    return await db_execute(_fetch, readonly=True)
 
-async def member_has_role(member_id, role_name):
-    roles = await get_member_roles(member_id)
-    return role_name in roles
+async def member_has_role(member_id, role):
+    """role: a role id, or a name (resolved through the cache)."""
+    role_ids = _role_ids(role)
+    if not role_ids:
+        return False
+    def _fetch():
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(Q.MEMBER_HAS_ROLE, (member_id, role_ids), prepare=True)
+                return cur.fetchone() is not None
+        finally:
+            put_conn(conn)
+    return await db_execute(_fetch, readonly=True)
 
-async def get_members_with_role(role_name):
+async def get_members_with_role(role):
+    """role: a role id, or a name (resolved through the cache)."""
+    role_ids = _role_ids(role)
+    if not role_ids:
+        return []
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, name, display_name, roles FROM members WHERE roles ? %s",
-                    (role_name,)
-                )
+                cur.execute(Q.MEMBERS_WITH_ROLE, (role_ids,), prepare=True)
                 rows = cur.fetchall()
                 return [dict(r) for r in rows]
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
 
 # ─── Convenience Status Helpers ───────────────────────────────────────────────
 
 async def cleanup_old_messages(keep: int = 5000):
+    """Retain only the `keep` most recent messages, deleting in batches.
+
+    Shorthand for a single-rule run_retention(); the daily engine uses the
+    configured rules instead.
     """
-    Retain only the `keep` most recent messages by Discord snowflake ID.
-    Discord snowflake IDs are monotonically increasing, so higher ID = newer.
-    Runs as a periodic maintenance task to prevent unbounded table growth.
-    """
-    def _cleanup():
+    return await run_retention([RetentionRule(None, keep=keep)])
+
+
+async def prune_discovery_changes(keep_days: int = CHANGES_KEEP_DAYS):
+    """Drop change-log rows older than *keep_days*. Returns the number deleted."""
+    def _prune():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("""
-                    DELETE FROM messages
-                    WHERE id NOT IN (
-                        SELECT id FROM messages ORDER BY id DESC LIMIT %s
-                    )
-                """, (keep,))
+                cur.execute("DELETE FROM discovery_changes WHERE changed_at < now() - make_interval(days => %s)",
+                            (keep_days,))
                 deleted = cur.rowcount
             conn.commit()
             return deleted
         finally:
             put_conn(conn)
-    deleted = await db_execute(_cleanup)
-    if deleted:
-        logger.info(f"[Discovery] Pruned {deleted} old message record(s) from discovery DB.")
+    return await db_execute(_prune, key=("discovery", "changes"), priority=BULK)
 
 
 async def is_on_leave(member_id):
@@ -446,13 +886,14 @@ async def get_members_on_leave():
     return await get_members_with_role('On Leave')
 
 async def get_members_dar_pending():
+    dar_ids = _role_ids('D.A.R Submitted')
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT id, name, display_name FROM members WHERE NOT (roles ? 'D.A.R Submitted')")
+                cur.execute(Q.MEMBERS_DAR_PENDING, (dar_ids,), prepare=True)
                 rows = cur.fetchall()
                 return [dict(m) for m in rows]
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
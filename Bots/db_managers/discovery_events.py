@@ -0,0 +1,88 @@
+"""
+Bots/db_managers/discovery_events.py — Discovery Change Events
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Typed change events for the mirrored guild structure, and the in-process bus
+they are published on.  discovery_db_manager appends each change to the
+`discovery_changes` table in the same transaction as the write, then
+publishes it on `bus` once the write has completed, so subscribers (e.g. the
+leave and task config resolvers) can refresh without a restart.
+
+    bus.subscribe(handler, kinds={CHANNEL, ROLE})
+
+Handlers may be plain functions or coroutines; they run on the event loop,
+and an exception in one handler is logged without affecting the others.
+"""
+
+import asyncio
+import logging
+from typing import Callable, NamedTuple
+
+from .discovery_cache import CATEGORY, CHANNEL, ROLE  # noqa: F401
+
+logger = logging.getLogger("Concord")
+
+MEMBER = "member"
+
+# Actions
+CREATED       = "created"
+RENAMED       = "renamed"
+MOVED         = "moved"           # channel changed category
+DELETED       = "deleted"
+ROLES_CHANGED = "roles_changed"   # member gained/lost roles
+
+
+class DiscoveryChange(NamedTuple):
+    kind: str                   # CATEGORY / CHANNEL / ROLE / MEMBER
+    action: str
+    entity_id: int
+    guild_id: int | None = None
+    name: str | None = None
+    old_name: str | None = None
+    detail: dict | None = None  # MOVED: {"from", "to"}; ROLES_CHANGED: {"added", "removed"}
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers: list[tuple[Callable, frozenset | None]] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def subscribe(self, handler: Callable, kinds=None) -> Callable[[], None]:
+        """Call *handler(change)* for every change (or only those of *kinds*).
+
+        Returns a function that removes the subscription.
+        """
+        entry = (handler, frozenset(kinds) if kinds else None)
+        self._subscribers.append(entry)
+
+        def _unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+        return _unsubscribe
+
+    def publish(self, change: DiscoveryChange) -> None:
+        for handler, kinds in list(self._subscribers):
+            if kinds is not None and change.kind not in kinds:
+                continue
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    task = asyncio.create_task(self._run(handler, change))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                else:
+                    handler(change)
+            except Exception as e:
+                logger.error(f"[ERR-DSC-005] [Discovery] Change handler {handler.__qualname__} failed: {e}")
+
+    @staticmethod
+    async def _run(handler, change) -> None:
+        try:
+            await handler(change)
+        except Exception as e:
+            logger.error(f"[ERR-DSC-005] [Discovery] Change handler {handler.__qualname__} failed: {e}")
+
+    async def drain(self) -> None:
+        """Wait for running async handlers (tests, shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -0,0 +1,94 @@
+"""
+Bots/db_managers/discovery_snapshot.py — Local Discovery Cache Snapshot
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Persists the discovery cache (categories, channels, roles) and the role index
+(member ids, member_roles pairs) to a local file after each reconciliation,
+so a restart can serve name and role lookups before the database warm-up has
+finished.  The database stays the source of truth: a loaded snapshot is
+always replaced by the DB warm and the next gateway snapshot.
+
+Format: a marshal dump of plain dicts, lists and tuples (fast, stdlib,
+cannot run code on load).  Writes go to a temp file in the same directory
+and are swapped in with os.replace, so a crash never leaves a torn file.  A
+missing, unreadable or old-format file is ignored.
+
+Path: DISCOVERY_SNAPSHOT_PATH (default Database/discovery_snapshot.bin);
+an empty value disables the snapshot.
+"""
+
+import logging
+import marshal
+import os
+import time
+
+from .discovery_cache import DiscoveryCache, CacheRecord, KINDS
+from .role_index import RoleIndex
+
+logger = logging.getLogger("Concord")
+
+FORMAT = 1
+DEFAULT_PATH = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', 'Database', 'discovery_snapshot.bin'
+))
+SNAPSHOT_PATH = os.getenv("DISCOVERY_SNAPSHOT_PATH", DEFAULT_PATH)
+
+
+def save(cache: DiscoveryCache, role_index: RoleIndex, path: str | None = None) -> bool:
+    """Write the cache and role index to *path* atomically.  Returns False if disabled or failed."""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path:
+        return False
+    member_ids, pairs = role_index.export()
+    data = {
+        "format": FORMAT,
+        "saved_at": time.time(),
+        # marshal only takes exact tuples, not the CacheRecord subclass
+        "records": {kind: [tuple(r) for r in cache.records(kind)] for kind in KINDS},
+        "members": member_ids,
+        "member_roles": pairs,
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "wb") as f:
+            marshal.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"[Discovery] Could not save cache snapshot to {path}: {e}")
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def load(cache: DiscoveryCache, role_index: RoleIndex, path: str | None = None) -> bool:
+    """Fill the cache and role index from *path*.  Returns False (leaving both untouched) if unusable."""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return False
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = marshal.load(f)
+        if not isinstance(data, dict) or data.get("format") != FORMAT:
+            raise ValueError("unknown snapshot format")
+        records = {kind: [CacheRecord(*r) for r in data["records"].get(kind, ())] for kind in KINDS}
+        members, pairs = data["members"], data["member_roles"]
+    except (OSError, EOFError, ValueError, TypeError, KeyError) as e:
+        logger.warning(f"[Discovery] Ignoring cache snapshot {path}: {e}")
+        return False
+    for kind, kind_records in records.items():
+        cache.replace(kind, kind_records)
+    role_index.replace(members, pairs)
+    age = time.time() - data.get("saved_at", time.time())
+    logger.info(
+        f"[Discovery] Cache loaded from snapshot in {(time.perf_counter() - start) * 1000:.0f}ms "
+        f"({sum(len(r) for r in records.values())} entries, {len(members)} members, {age / 60:.0f}m old)."
+    )
+    return True
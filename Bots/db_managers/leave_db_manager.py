@@ -7,60 +7,16 @@ PROPRIETARY AND CONFIDENTIAL.
 import re
 import logging
 
-from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, db_execute  # noqa: F401
+from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, start_db_worker, db_execute, db_transaction  # noqa: F401
+from . import queries as Q
+from .migrations import ensure_schema
 
 logger = logging.getLogger("Concord")
 
 # ─── Schema Initialization ────────────────────────────────────────────────────
 
 async def initialize_leave_db():
-    def _init():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id BIGINT PRIMARY KEY,
-                        nickname TEXT,
-                        total_sick_leave REAL DEFAULT 0,
-                        total_casual_leave REAL DEFAULT 0,
-                        total_c_off REAL DEFAULT 0,
-                        last_leave_taken TEXT,
-                        off_duty_hours REAL DEFAULT 0
-                    )
-                ''')
-                
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS leaves (
-                        id SERIAL PRIMARY KEY,
-                        user_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE,
-                        leave_type TEXT,
-                        leave_reason TEXT,
-                        date_from TEXT,
-                        date_to TEXT,
-                        number_of_days_off REAL,
-                        resume_office_on TEXT,
-                        time_off TEXT,
-                        leave_status TEXT,
-                        reason_for_decline TEXT,
-                        approved_by TEXT,
-                        time_period TEXT,
-                        footer_text TEXT,
-                        cancelled_by TEXT,
-                        cancellation_reason TEXT
-                    )
-                ''')
-
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS holidays (
-                        date TEXT PRIMARY KEY,
-                        description TEXT NOT NULL
-                    )
-                ''')
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_init)
+    await ensure_schema()
 
 # ─── Holiday Helpers ──────────────────────────────────────────────────────────
 
@@ -70,11 +26,11 @@ async def is_holiday(date_str):
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT 1 FROM holidays WHERE date = %s", (date_str,))
+                cur.execute(Q.HOLIDAY_EXISTS, (date_str,), prepare=True)
                 return cur.fetchone() is not None
         finally:
             put_conn(conn)
-    return await db_execute(_check)
+    return await db_execute(_check, readonly=True)
 
 # ─── Core Database Methods ────────────────────────────────────────────────────
 
@@ -94,7 +50,7 @@ async def insert_dynamic_user(nickname, user_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_insert)
+    await db_execute(_insert, key=("leave_user", user_id))
 
 async def remove_dynamic_user(user_id):
     def _delete():
@@ -105,96 +61,103 @@ async def remove_dynamic_user(user_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_delete)
+    await db_execute(_delete, key=("leave_user", user_id))
 
 async def fetch_dynamic_user(user_id):
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('''
-                    SELECT last_leave_taken, total_casual_leave, total_sick_leave, total_c_off, off_duty_hours
-                    FROM users
-                    WHERE user_id = %s
-                ''', (user_id,))
+                cur.execute(Q.LEAVE_USER_SUMMARY, (user_id,), prepare=True)
                 return cur.fetchone()
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
 
 async def get_leave_status(nickname, leave_id):
     def _get():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('''
-                    SELECT leave_reason, number_of_days_off 
-                    FROM leaves
-                    WHERE id = %s AND leave_status = 'Accepted'
-                ''', (leave_id,))
+                cur.execute(Q.LEAVE_ACCEPTED_BY_ID, (leave_id,), prepare=True)
                 result = cur.fetchone()
                 return result if result else None
         finally:
             put_conn(conn)
-    return await db_execute(_get)
+    return await db_execute(_get, readonly=True)
 
 async def get_leave_full_details(nickname, leave_id):
     def _get():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT * FROM leaves WHERE id = %s", (leave_id,))
+                cur.execute(Q.LEAVE_BY_ID, (leave_id,), prepare=True)
                 return cur.fetchone()
         finally:
             put_conn(conn)
-    return await db_execute(_get)
+    return await db_execute(_get, readonly=True)
 
 async def get_pending_leave_status(nickname, leave_id):
     def _get():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('''
-                    SELECT leave_reason, number_of_days_off 
-                    FROM leaves
-                    WHERE id = %s AND leave_status = 'PENDING'
-                ''', (leave_id,))
+                cur.execute(Q.LEAVE_PENDING_BY_ID, (leave_id,), prepare=True)
                 result = cur.fetchone()
                 return result if result else None
         finally:
             put_conn(conn)
-    return await db_execute(_get)
+    return await db_execute(_get, readonly=True)
 
 async def check_leave_owner(nickname):
     def _check():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT user_id FROM users WHERE nickname = %s', (nickname,))
+                cur.execute(Q.LEAVE_USER_BY_NICKNAME, (nickname,), prepare=True)
                 result = cur.fetchone()
                 return result if result else None
         finally:
             put_conn(conn)
-    return await db_execute(_check)
+    return await db_execute(_check, readonly=True)
 
-async def withdraw_leave(nickname, leave_id, cancelled_by=None, cancellation_reason=None):
-    def _withdraw():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    UPDATE leaves 
-                    SET leave_status = 'Withdrawn', 
-                        cancelled_by = COALESCE(%s, cancelled_by), 
-                        cancellation_reason = COALESCE(%s, cancellation_reason) 
-                    WHERE id = %s
-                ''', (cancelled_by, cancellation_reason, leave_id))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_withdraw)
-
-async def request_withdraw_leave(nickname, leave_id, requested_by=None, reason=None):
+async def _leave_key(leave_id, user_id=None):
+    """Write key for a leave row: its owner's ("leave_user", user_id), the key every balance
+    write uses, so status, footer and balance changes for one user apply in order.
+    Looks the owner up when the caller doesn't have it."""
+    if user_id is None:
+        def _owner():
+            conn = get_conn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(Q.LEAVE_OWNER, (leave_id,), prepare=True)
+                    row = cur.fetchone()
+                    return row['user_id'] if row else None
+            finally:
+                put_conn(conn)
+        user_id = await db_execute(_owner, readonly=True)
+    return ("leave_user", user_id)
+
+def _withdraw_leave_sync(leave_id, cancelled_by=None, cancellation_reason=None):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute('''
+                UPDATE leaves 
+                SET leave_status = 'Withdrawn', 
+                    cancelled_by = COALESCE(%s, cancelled_by), 
+                    cancellation_reason = COALESCE(%s, cancellation_reason) 
+                WHERE id = %s
+            ''', (cancelled_by, cancellation_reason, leave_id))
+        conn.commit()
+    finally:
+        put_conn(conn)
+
+async def withdraw_leave(nickname, leave_id, cancelled_by=None, cancellation_reason=None, user_id=None):
+    await db_execute(_withdraw_leave_sync, leave_id, cancelled_by, cancellation_reason,
+                     key=await _leave_key(leave_id, user_id))
+
+async def request_withdraw_leave(nickname, leave_id, requested_by=None, reason=None, user_id=None):
     def _request_withdraw():
         conn = get_conn()
         try:
@@ -209,9 +172,9 @@ async def request_withdraw_leave(nickname, leave_id, requested_by=None, reason=N
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_request_withdraw)
+    await db_execute(_request_withdraw, key=await _leave_key(leave_id, user_id))
 
-async def confirm_withdraw_leave(nickname, leave_id):
+async def confirm_withdraw_leave(nickname, leave_id, user_id=None):
     def _confirm_withdraw():
         conn = get_conn()
         try:
@@ -220,9 +183,9 @@ async def confirm_withdraw_leave(nickname, leave_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_confirm_withdraw)
+    await db_execute(_confirm_withdraw, key=await _leave_key(leave_id, user_id))
 
-async def revert_cancellation_request(nickname, leave_id):
+async def revert_cancellation_request(nickname, leave_id, user_id=None):
     def _revert():
         conn = get_conn()
         try:
@@ -231,7 +194,7 @@ async def revert_cancellation_request(nickname, leave_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_revert)
+    await db_execute(_revert, key=await _leave_key(leave_id, user_id))
 
 async def reduce_leave_balance(user_id, leave_reason, amount):
     def _reduce():
@@ -247,49 +210,62 @@ async def reduce_leave_balance(user_id, leave_reason, amount):
             conn.commit()
         finally:
             put_conn(conn)
-    return await db_execute(_reduce)
+    return await db_execute(_reduce, key=("leave_user", user_id))
+
+def _refund_leave_balance_sync(user_id, leave_reason, amount):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if leave_reason == "sick":
+                cur.execute("UPDATE users SET total_sick_leave = total_sick_leave + %s WHERE user_id = %s", (amount, user_id))
+            elif leave_reason == "casual":
+                cur.execute("UPDATE users SET total_casual_leave = total_casual_leave + %s WHERE user_id = %s", (amount, user_id))
+            elif leave_reason == "c. off":
+                cur.execute("UPDATE users SET total_c_off = total_c_off + %s WHERE user_id = %s", (amount, user_id))
+        conn.commit()
+    finally:
+        put_conn(conn)
 
 async def refund_leave_balance(user_id, leave_reason, amount):
-    def _refund():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                if leave_reason == "sick":
-                    cur.execute("UPDATE users SET total_sick_leave = total_sick_leave + %s WHERE user_id = %s", (amount, user_id))
-                elif leave_reason == "casual":
-                    cur.execute("UPDATE users SET total_casual_leave = total_casual_leave + %s WHERE user_id = %s", (amount, user_id))
-                elif leave_reason == "c. off":
-                    cur.execute("UPDATE users SET total_c_off = total_c_off + %s WHERE user_id = %s", (amount, user_id))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    return await db_execute(_refund)
+    return await db_execute(_refund_leave_balance_sync, user_id, leave_reason, amount, key=("leave_user", user_id))
+
+def _update_last_leave_date_sync(user_id):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MAX(date_to) FROM leaves WHERE user_id = %s AND leave_status = 'Accepted'", (user_id,))
+            latest_date_row = cur.fetchone()
+            latest_date = latest_date_row['max'] if latest_date_row else None
+            if latest_date:
+                cur.execute("UPDATE users SET last_leave_taken = %s WHERE user_id = %s", (latest_date, user_id))
+        conn.commit()
+    finally:
+        put_conn(conn)
 
 async def update_last_leave_date_after_withdrawal(nickname, user_id):
-    def _update():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT MAX(date_to) FROM leaves WHERE user_id = %s AND leave_status = 'Accepted'", (user_id,))
-                latest_date_row = cur.fetchone()
-                latest_date = latest_date_row['max'] if latest_date_row else None
-                if latest_date:
-                    cur.execute("UPDATE users SET last_leave_taken = %s WHERE user_id = %s", (latest_date, user_id))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    return await db_execute(_update)
-
-async def update_footer_text(nickname, leave_id, footer_text):
-    def _update():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("UPDATE leaves SET footer_text = %s WHERE id = %s", (footer_text, leave_id))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_update)
+    return await db_execute(_update_last_leave_date_sync, user_id, key=("leave_user", user_id))
+
+async def withdraw_and_refund(nickname, leave_id, user_id, leave_reason=None, number_of_days_off=None,
+                              cancelled_by=None, cancellation_reason=None):
+    """Withdraw a leave, refund its days (when given) and recompute last_leave_taken — atomically.
+    Keyed on the user, like every other balance write, so they apply in order."""
+    async with db_transaction(key=("leave_user", user_id)) as tx:
+        tx.run(_withdraw_leave_sync, leave_id, cancelled_by, cancellation_reason)
+        if leave_reason and number_of_days_off is not None:
+            tx.run(_refund_leave_balance_sync, user_id, leave_reason.lower(), number_of_days_off)
+        tx.run(_update_last_leave_date_sync, user_id)
+
+def _update_footer_text_sync(leave_id, footer_text):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE leaves SET footer_text = %s WHERE id = %s", (footer_text, leave_id))
+        conn.commit()
+    finally:
+        put_conn(conn)
+
+async def update_footer_text(nickname, leave_id, footer_text, user_id=None):
+    await db_execute(_update_footer_text_sync, leave_id, footer_text, key=await _leave_key(leave_id, user_id))
 
 async def submit_leave_application(nickname, leave_details, data, user_id=None):
     if user_id is None:
@@ -327,7 +303,7 @@ async def submit_leave_application(nickname, leave_details, data, user_id=None):
             return new_id
         finally:
             put_conn(conn)
-    return await db_execute(_insert)
+    return await db_execute(_insert, key=("leave_user", user_id))
 
 async def add_off_duty_hours(user_id, cumulated_hours):
     def _update():
@@ -338,26 +314,34 @@ async def add_off_duty_hours(user_id, cumulated_hours):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_update)
+    await db_execute(_update, key=("leave_user", user_id))
+
+def _confirm_leave_acceptance_sync(leave_id, leave_reason, number_of_days_off, date_to, user_id):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE leaves SET leave_status = 'Accepted' WHERE id = %s", (leave_id,))
+            if leave_reason == "sick":
+                cur.execute("UPDATE users SET total_sick_leave = total_sick_leave + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
+            elif leave_reason == "casual":
+                cur.execute("UPDATE users SET total_casual_leave = total_casual_leave + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
+            elif leave_reason == "c. off":
+                cur.execute("UPDATE users SET total_c_off = total_c_off + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
+        conn.commit()
+    finally:
+        put_conn(conn)
 
 async def confirm_leave_acceptance(nickname, leave_id, leave_reason, number_of_days_off, date_to, user_id):
-    def _accept():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("UPDATE leaves SET leave_status = 'Accepted' WHERE id = %s", (leave_id,))
-                if leave_reason == "sick":
-                    cur.execute("UPDATE users SET total_sick_leave = total_sick_leave + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
-                elif leave_reason == "casual":
-                    cur.execute("UPDATE users SET total_casual_leave = total_casual_leave + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
-                elif leave_reason == "c. off":
-                    cur.execute("UPDATE users SET total_c_off = total_c_off + %s, last_leave_taken = %s WHERE user_id = %s", (number_of_days_off, date_to, user_id))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_accept)
+    await db_execute(_confirm_leave_acceptance_sync, leave_id, leave_reason, number_of_days_off, date_to, user_id,
+                     key=("leave_user", user_id))
+
+async def accept_leave(nickname, leave_id, leave_reason, number_of_days_off, date_to, user_id, footer_text):
+    """HR final approval: mark accepted, book the balance and store the final footer — atomically."""
+    async with db_transaction(key=("leave_user", user_id)) as tx:
+        tx.run(_confirm_leave_acceptance_sync, leave_id, leave_reason, number_of_days_off, date_to, user_id)
+        tx.run(_update_footer_text_sync, leave_id, footer_text)
 
-async def update_approval(nickname, leave_id, approved_by):
+async def update_approval(nickname, leave_id, approved_by, user_id=None):
     def _approve():
         conn = get_conn()
         try:
@@ -366,19 +350,19 @@ async def update_approval(nickname, leave_id, approved_by):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_approve)
+    await db_execute(_approve, key=await _leave_key(leave_id, user_id))
 
 async def get_footer_text(nickname, leave_id):
     def _fetch():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT footer_text FROM leaves WHERE id = %s", (leave_id,))
+                cur.execute(Q.LEAVE_FOOTER, (leave_id,), prepare=True)
                 result = cur.fetchone()
                 return result if result else None
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
 
 # ─── Data Export Helpers ──────────────────────────────────────────────────────
 
@@ -391,7 +375,7 @@ async def get_all_users():
                 return [r['nickname'] for r in cur.fetchall()]
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
 
 async def fetch_user_leave_data(nickname, start_of_month, end_of_month):
     """
@@ -418,4 +402,4 @@ async def fetch_user_leave_data(nickname, start_of_month, end_of_month):
                 return [dict(row) for row in cur.fetchall()]
         finally:
             put_conn(conn)
-    return await db_execute(_fetch)
+    return await db_execute(_fetch, readonly=True)
@@ -0,0 +1,138 @@
+"""
+Bots/db_managers/message_mirror.py — Write-Behind Message Mirror
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+MessageMirrorBuffer collects guild messages and edits in memory and writes
+them to the `messages` table in batches: every FLUSH_INTERVAL, or as soon as
+FLUSH_ROWS distinct messages are pending.  Repeated edits of one message
+merge into a single row (the latest wins), and each flush is one
+executemany — or one COPY + merge for large batches.
+
+The buffer is bounded: once MESSAGE_BUFFER_MAX rows are pending (e.g. during
+a DB outage) new messages are dropped, and live messages (live=True) are
+also dropped while the DB queue is over its high watermark.  Edits of a pending message
+always merge.  Pending rows and drops are reported by queue_stats().
+
+Flush latency and size are recorded in db_metrics as "message_mirror.flush",
+so they show up in !dbstats and on the dashboard.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from . import base_db
+from .base_db import db_execute, register_buffer, unregister_buffer, BULK
+from . import db_metrics
+from .discovery_db_manager import _upsert_messages_sync
+
+logger = logging.getLogger("Concord")
+
+FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_MS", "500")) / 1000
+FLUSH_ROWS     = int(os.getenv("MESSAGE_FLUSH_ROWS", "500"))
+BUFFER_MAX     = int(os.getenv("MESSAGE_BUFFER_MAX", "20000"))
+
+
+class MessageMirrorBuffer:
+    def __init__(self, interval: float = FLUSH_INTERVAL, max_rows: int = FLUSH_ROWS,
+                 max_size: int = BUFFER_MAX):
+        self.interval = interval
+        self.max_rows = max_rows
+        self.max_size = max(max_size, max_rows)
+        self._pending: dict[int, tuple] = {}    # message_id -> row
+        self._full = asyncio.Event()
+        self._flushing = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.flushed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, message_id, channel_id, author_id, content, created_at, live: bool = True) -> bool:
+        """Queue a message (or a newer version of one) for the next flush.
+
+        Returns False if a new message was dropped: the buffer is full, or
+        (live=True) db_queue is throttled; the history sweep passes live=False.
+        """
+        if message_id not in self._pending and (
+            len(self._pending) >= self.max_size or (live and base_db.db_queue.throttled)
+        ):
+            self.dropped += 1
+            return False
+        self._pending[message_id] = (message_id, channel_id, author_id, content, created_at)
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+        return True
+
+    def add_message(self, message, live: bool = True) -> bool:
+        return self.add(message.id, message.channel.id, message.author.id, message.content,
+                        message.created_at, live)
+
+    async def flush(self) -> int | None:
+        """Write everything pending now.
+
+        Returns the number of rows written, or None if the write failed (the
+        rows stay pending, up to max_size).  Flushes run one at a time, so a
+        successful flush means every row added before the call is written —
+        including rows an overlapping flush failed to write.
+        """
+        async with self._flushing:
+            return await self._flush()
+
+    async def _flush(self) -> int | None:
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, {}
+        self._full.clear()
+        start = time.perf_counter()
+        try:
+            written = await db_execute(_upsert_messages_sync, list(rows.values()),
+                                       key=("messages", "mirror"), priority=BULK)
+        except Exception as e:
+            # Put the batch back without clobbering anything newer or growing past max_size.
+            for message_id, row in rows.items():
+                if message_id in self._pending:
+                    continue
+                if len(self._pending) >= self.max_size:
+                    self.dropped += 1
+                    continue
+                self._pending[message_id] = row
+            db_metrics.record("message_mirror.flush", error=True)
+            logger.error(f"[ERR-DSC-004] [Discovery] Message mirror flush failed ({len(rows)} rows): {e}")
+            return None
+        db_metrics.record("message_mirror.flush", exec_time=time.perf_counter() - start, rows=written)
+        self.flushed += written
+        return written
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if await self.flush() is None and not self._closing:
+                await asyncio.sleep(self.interval)   # back off while the DB is failing
+
+    def start(self) -> asyncio.Task:
+        self._closing = False
+        register_buffer(self)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="concord-message-mirror")
+        return self._task
+
+    async def close(self) -> None:
+        """Stop the flush loop and write whatever is still pending."""
+        # Wake the loop rather than cancel it, so an in-flight flush completes.
+        self._closing = True
+        self._full.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pending:
+            written = await self.flush()
+            logger.info(f"[Discovery] Message mirror flushed {written or 0} row(s) on shutdown.")
+        unregister_buffer(self)
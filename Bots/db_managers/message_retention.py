@@ -0,0 +1,161 @@
+"""
+Bots/db_managers/message_retention.py — Message Mirror Retention
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Prunes the `messages` mirror according to retention rules.  For each rule the
+cutoff snowflake is computed once; rows below it are then deleted in batches
+of RETENTION_BATCH, each its own short BULK job, so the delete never holds a
+long transaction and other queue work runs between batches.
+
+Rules come from the environment:
+  MESSAGE_RETENTION_KEEP   keep at most this many messages outside rule
+                           channels (default 5000; 0 = no count limit)
+  MESSAGE_RETENTION_DAYS   drop messages older than this outside rule
+                           channels (default unset)
+  MESSAGE_RETENTION_RULES  per-channel overrides, e.g. "1234=30d,5678=1000"
+                           (Nd = keep N days, N = keep the newest N)
+
+Discord snowflakes are time-ordered (ms since DISCORD_EPOCH in the top 42
+bits), so an age limit is just an id cutoff on the primary key.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from .base_db import get_conn, put_conn, db_execute, BULK
+
+logger = logging.getLogger("Concord")
+
+DISCORD_EPOCH = 1420070400000   # 2015-01-01T00:00:00Z, in ms
+
+RETENTION_BATCH = int(os.getenv("MESSAGE_RETENTION_BATCH", "1000"))
+# Local (IST) hour the daily run is scheduled for — outside office hours.
+RETENTION_HOUR  = int(os.getenv("MESSAGE_RETENTION_HOUR", "3"))
+
+
+class RetentionRule(NamedTuple):
+    channel_id: int | None          # None: every channel without its own rule
+    keep: int | None = None         # newest N messages
+    max_age_days: float | None = None
+
+
+def snowflake_for(moment: datetime) -> int:
+    """Smallest snowflake that could have been created at *moment*."""
+    return max(0, int(moment.timestamp() * 1000) - DISCORD_EPOCH) << 22
+
+
+def parse_rules(text: str) -> list[RetentionRule]:
+    """Parse MESSAGE_RETENTION_RULES ("<channel_id>=<N>d|<N>", comma separated)."""
+    rules = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        channel, _, limit = item.partition("=")
+        limit = limit.strip().lower()
+        if limit.endswith("d"):
+            rules.append(RetentionRule(int(channel), max_age_days=float(limit[:-1])))
+        else:
+            rules.append(RetentionRule(int(channel), keep=int(limit)))
+    return rules
+
+
+def configured_rules() -> list[RetentionRule]:
+    keep = int(os.getenv("MESSAGE_RETENTION_KEEP", "5000")) or None
+    days = os.getenv("MESSAGE_RETENTION_DAYS")
+    default = RetentionRule(None, keep, float(days) if days else None)
+    return [default] + parse_rules(os.getenv("MESSAGE_RETENTION_RULES", ""))
+
+
+def seconds_until(hour: int, now: datetime) -> float:
+    """Seconds from *now* to the next *hour*:00 in now's timezone."""
+    target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+# ─── Cutoffs & batched deletes ────────────────────────────────────────────────
+
+def _scope(rule: RetentionRule, ruled: list) -> tuple[str, tuple]:
+    """WHERE fragment + params selecting the rows a rule governs."""
+    if rule.channel_id is not None:
+        return "channel_id = %s", (rule.channel_id,)
+    return "channel_id <> ALL(%s)", (ruled,)
+
+
+def _cutoff_sync(rule: RetentionRule, ruled: list, now: datetime) -> int | None:
+    """Id below which the rule deletes, or None if nothing is due."""
+    cutoffs = []
+    if rule.max_age_days is not None:
+        cutoffs.append(snowflake_for(now - timedelta(days=rule.max_age_days)))
+    if rule.keep is not None:
+        where, params = _scope(rule, ruled)
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT id FROM messages WHERE {where} ORDER BY id DESC OFFSET %s LIMIT 1",
+                    params + (max(rule.keep - 1, 0),),
+                )
+                row = cur.fetchone()
+        finally:
+            put_conn(conn)
+        if row:
+            cutoffs.append(row["id"] if rule.keep else row["id"] + 1)
+    return max(cutoffs) if cutoffs else None
+
+
+def _delete_batch_sync(rule: RetentionRule, ruled: list, cutoff: int, limit: int) -> int:
+    where, params = _scope(rule, ruled)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                DELETE FROM messages WHERE id IN (
+                    SELECT id FROM messages WHERE id < %s AND {where}
+                    ORDER BY id LIMIT %s
+                )
+                """,
+                (cutoff,) + params + (limit,),
+            )
+            deleted = cur.rowcount
+        conn.commit()
+        return deleted
+    finally:
+        put_conn(conn)
+
+
+async def apply_rule(rule: RetentionRule, ruled: list, now: datetime,
+                     batch: int = RETENTION_BATCH) -> int:
+    """Delete what *rule* no longer retains, one bounded batch per DB job."""
+    cutoff = await db_execute(_cutoff_sync, rule, ruled, now, readonly=True, priority=BULK)
+    if cutoff is None:
+        return 0
+    total = 0
+    while True:
+        deleted = await db_execute(_delete_batch_sync, rule, ruled, cutoff, batch,
+                                   key=("messages", "retention"), priority=BULK)
+        total += deleted
+        if deleted < batch:
+            return total
+
+
+async def run_retention(rules: list[RetentionRule] | None = None, now: datetime | None = None) -> int:
+    """Apply every rule once; logs and returns the number of rows deleted."""
+    rules = configured_rules() if rules is None else rules
+    now = now or datetime.now().astimezone()
+    ruled = [r.channel_id for r in rules if r.channel_id is not None]
+    start = time.perf_counter()
+    total = 0
+    for rule in rules:
+        total += await apply_rule(rule, ruled, now)
+    elapsed = time.perf_counter() - start
+    if total:
+        logger.info(
+            f"[Discovery] Retention pruned {total} message(s) in {elapsed:.1f}s "
+            f"({total / max(elapsed, 1e-6):.0f} rows/s)."
+        )
+    return total
@@ -0,0 +1,415 @@
+"""
+Bots/db_managers/migrations.py — Versioned Schema Migrations
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+The schema is defined by the ordered MIGRATIONS list below. Applied versions
+are recorded in the `schema_version` table, so a normal boot costs a single
+version query; only migrations newer than the recorded version are run.
+
+Rules for adding a migration:
+  - append it with the next version number — never edit or reorder one
+    that has shipped
+  - each migration runs in its own transaction under an advisory lock, so
+    concurrent starters apply it exactly once
+  - a step is either an SQL string or a callable taking the open cursor
+    (for data migrations)
+"""
+
+import asyncio
+import logging
+from typing import Callable, NamedTuple
+
+import psycopg
+
+from .base_db import get_conn, put_conn, db_execute
+
+logger = logging.getLogger("Concord")
+
+# pg_advisory_xact_lock key serialising migration runs across processes.
+_LOCK_KEY = 0x434F4E43  # "CONC"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    steps: tuple          # SQL strings and/or callables(cur)
+
+
+# ─── Migrations ───────────────────────────────────────────────────────────────
+
+_BASELINE_DISCOVERY = (
+    '''
+    CREATE TABLE IF NOT EXISTS categories (
+        id   BIGINT PRIMARY KEY,
+        name TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS channels (
+        id          BIGINT PRIMARY KEY,
+        name        TEXT,
+        type        TEXT,
+        category_id BIGINT,
+        CONSTRAINT fk_category FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE SET NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS roles (
+        id       BIGINT PRIMARY KEY,
+        name     TEXT,
+        color    TEXT,
+        position INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS members (
+        id           BIGINT PRIMARY KEY,
+        name         TEXT,
+        display_name TEXT,
+        joined_at    TEXT,
+        roles        JSONB DEFAULT '[]'::jsonb
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS messages (
+        id         BIGINT PRIMARY KEY,
+        channel_id BIGINT,
+        author_id  BIGINT,
+        content    TEXT,
+        created_at TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS scheduled_events (
+        id          BIGINT PRIMARY KEY,
+        name        TEXT,
+        description TEXT,
+        start_time  TEXT,
+        end_time    TEXT,
+        status      INTEGER
+    )
+    ''',
+)
+
+_BASELINE_TASKS = (
+    '''
+    CREATE TABLE IF NOT EXISTS tasks (
+        task_id SERIAL PRIMARY KEY,
+        channel_id BIGINT UNIQUE,
+        assignees TEXT,
+        assignee_ids TEXT,
+        details TEXT,
+        deadline TEXT,
+        temp_channel_link TEXT,
+        assigner TEXT,
+        assigner_id BIGINT,
+        status TEXT,
+        title TEXT,
+        global_state TEXT DEFAULT 'Active',
+        completion_vector TEXT DEFAULT '',
+        activity_log TEXT DEFAULT '',
+        reminders_sent TEXT DEFAULT '',
+        main_message_id TEXT DEFAULT '',
+        priority TEXT DEFAULT 'Normal',
+        acknowledged_by TEXT DEFAULT '',
+        checklist TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_message_id   ON tasks(main_message_id)',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_global_state  ON tasks(global_state)',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_assigner_id   ON tasks(assigner_id)',
+    '''
+    CREATE TABLE IF NOT EXISTS pending_tasks_channels (
+        user_id         BIGINT PRIMARY KEY,
+        channel_id      BIGINT UNIQUE,
+        tasks           TEXT DEFAULT '',
+        task_message_ids TEXT DEFAULT ''
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS assigner_dashboard_channels (
+        user_id          BIGINT PRIMARY KEY,
+        channel_id       BIGINT UNIQUE,
+        tasks            TEXT DEFAULT '',
+        task_message_ids TEXT DEFAULT ''
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS notification_queue (
+        id SERIAL PRIMARY KEY,
+        task_id INTEGER,
+        recipient_id BIGINT,
+        content TEXT,
+        scheduled_at TIMESTAMP,
+        sent BOOLEAN DEFAULT FALSE
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_notif_sent ON notification_queue(sent, scheduled_at)',
+    '''
+    CREATE TABLE IF NOT EXISTS task_drafts (
+        draft_id SERIAL PRIMARY KEY,
+        user_id BIGINT,
+        modal_data JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+)
+
+_BASELINE_LEAVE = (
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id BIGINT PRIMARY KEY,
+        nickname TEXT,
+        total_sick_leave REAL DEFAULT 0,
+        total_casual_leave REAL DEFAULT 0,
+        total_c_off REAL DEFAULT 0,
+        last_leave_taken TEXT,
+        off_duty_hours REAL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS leaves (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE,
+        leave_type TEXT,
+        leave_reason TEXT,
+        date_from TEXT,
+        date_to TEXT,
+        number_of_days_off REAL,
+        resume_office_on TEXT,
+        time_off TEXT,
+        leave_status TEXT,
+        reason_for_decline TEXT,
+        approved_by TEXT,
+        time_period TEXT,
+        footer_text TEXT,
+        cancelled_by TEXT,
+        cancellation_reason TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS holidays (
+        date TEXT PRIMARY KEY,
+        description TEXT NOT NULL
+    )
+    ''',
+)
+
+# Change notifications: one pg_notify per written row, carrying the table, the
+# operation, the writer's application_name and the columns named as trigger
+# arguments (kept small: NOTIFY payloads are capped at 8000 bytes).
+_NOTIFY_FUNCTION = '''
+    CREATE OR REPLACE FUNCTION concord_notify_change() RETURNS trigger AS $$
+    DECLARE
+        rec  jsonb := to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END);
+        body jsonb := jsonb_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP,
+            'origin', current_setting('application_name', true)
+        );
+        col  text;
+    BEGIN
+        FOREACH col IN ARRAY TG_ARGV LOOP
+            body := body || jsonb_build_object(col, rec -> col);
+        END LOOP;
+        PERFORM pg_notify('concord_changes', body::text);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+'''
+
+_NOTIFY_TABLES = {
+    "categories":   ("id", "name", "guild_id"),
+    "channels":     ("id", "name", "guild_id", "category_id"),
+    "roles":        ("id", "name", "guild_id"),
+    "members":      ("id",),
+    "member_roles": ("member_id", "role_id"),
+    "tasks":        ("task_id",),
+    "leaves":       ("id", "user_id"),
+    "users":        ("user_id",),
+}
+
+
+def _notify_trigger(table: str, columns: tuple) -> tuple:
+    args = ", ".join(f"'{c}'" for c in columns)
+    return (
+        f'DROP TRIGGER IF EXISTS concord_notify ON {table}',
+        f'CREATE TRIGGER concord_notify AFTER INSERT OR UPDATE OR DELETE ON {table} '
+        f'FOR EACH ROW EXECUTE FUNCTION concord_notify_change({args})',
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    # Baseline: the schema previously created on every boot. IF NOT EXISTS
+    # keeps it safe for databases that predate schema_version.
+    Migration(1, "baseline", _BASELINE_DISCOVERY + _BASELINE_TASKS + _BASELINE_LEAVE),
+    Migration(2, "lookup indexes", (
+        'CREATE INDEX IF NOT EXISTS idx_leaves_user_status   ON leaves(user_id, leave_status)',
+        'CREATE INDEX IF NOT EXISTS idx_users_nickname       ON users(nickname)',
+        'CREATE INDEX IF NOT EXISTS idx_task_drafts_created  ON task_drafts(created_at)',
+    )),
+    # Scope mirrored structure by guild; NULL until the next discovery sweep.
+    Migration(3, "guild scoping", (
+        'ALTER TABLE categories ADD COLUMN IF NOT EXISTS guild_id BIGINT',
+        'ALTER TABLE channels   ADD COLUMN IF NOT EXISTS guild_id BIGINT',
+        'ALTER TABLE roles      ADD COLUMN IF NOT EXISTS guild_id BIGINT',
+    )),
+    Migration(4, "message sweep checkpoints", (
+        '''
+        CREATE TABLE IF NOT EXISTS sweep_checkpoints (
+            channel_id      BIGINT PRIMARY KEY,
+            last_message_id BIGINT NOT NULL,
+            updated_at      TIMESTAMPTZ DEFAULT now()
+        )
+        ''',
+    )),
+    # Typed timestamps + per-channel / per-author range indexes.  Values were
+    # written with str(datetime) (or 'None'), both valid timestamptz input.
+    Migration(5, "messages typed and indexed", (
+        '''
+        ALTER TABLE messages ALTER COLUMN created_at TYPE TIMESTAMPTZ
+            USING NULLIF(created_at, 'None')::timestamptz
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (channel_id, id DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_messages_author  ON messages (author_id, id DESC)',
+    )),
+    # Role membership by id; members.roles (names) stays for display only.
+    # members has neither role ids nor a guild, so the backfill only resolves
+    # names held by exactly one role; the rest wait for the on_ready snapshot.
+    Migration(6, "member role membership", (
+        '''
+        CREATE TABLE IF NOT EXISTS member_roles (
+            member_id BIGINT NOT NULL REFERENCES members (id) ON DELETE CASCADE,
+            role_id   BIGINT NOT NULL,
+            PRIMARY KEY (member_id, role_id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_member_roles_role ON member_roles (role_id, member_id)',
+        '''
+        INSERT INTO member_roles (member_id, role_id)
+        SELECT m.id, r.id
+        FROM members m
+        CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(m.roles, '[]'::jsonb)) AS n(name)
+        JOIN roles r ON r.name = n.name
+        WHERE r.name IN (SELECT name FROM roles GROUP BY name HAVING count(*) = 1)
+        ON CONFLICT DO NOTHING
+        ''',
+    )),
+    # Append-only change log of the mirrored structure (see discovery_events.py).
+    Migration(7, "discovery change log", (
+        '''
+        CREATE TABLE IF NOT EXISTS discovery_changes (
+            id         BIGSERIAL PRIMARY KEY,
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            kind       TEXT NOT NULL,
+            action     TEXT NOT NULL,
+            entity_id  BIGINT NOT NULL,
+            guild_id   BIGINT,
+            name       TEXT,
+            old_name   TEXT,
+            detail     JSONB
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_discovery_changes_at ON discovery_changes (changed_at)',
+    )),
+    # NOTIFY concord_changes on writes to cached tables (see change_listener.py).
+    Migration(8, "change notifications", (_NOTIFY_FUNCTION,) + tuple(
+        step for table, columns in _NOTIFY_TABLES.items() for step in _notify_trigger(table, columns)
+    )),
+    # Full-text search over the mirror: a stored tsvector kept current by
+    # Postgres itself (no write path changes) and a GIN index to match it.
+    Migration(9, "message search", (
+        '''
+        ALTER TABLE messages ADD COLUMN IF NOT EXISTS search tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', COALESCE(content, ''))) STORED
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_messages_search ON messages USING GIN (search)',
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+def _current_version_sync() -> int:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            try:
+                cur.execute('SELECT COALESCE(MAX(version), 0) AS version FROM schema_version')
+                return cur.fetchone()['version']
+            except psycopg.errors.UndefinedTable:
+                conn.rollback()
+                return 0
+    finally:
+        put_conn(conn)
+
+
+def _run_step(cur, step) -> None:
+    if isinstance(step, str):
+        cur.execute(step)
+    else:
+        step(cur)
+
+
+def _apply_migrations_sync() -> int:
+    """Apply every pending migration, one transaction each. Returns the new version."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_xact_lock(%s)', (_LOCK_KEY,))
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version    INTEGER PRIMARY KEY,
+                    name       TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ DEFAULT now()
+                )
+            ''')
+        conn.commit()
+
+        version = 0
+        for migration in MIGRATIONS:
+            with conn.cursor() as cur:
+                # Re-check under the lock: another process may have won the race.
+                cur.execute('SELECT pg_advisory_xact_lock(%s)', (_LOCK_KEY,))
+                cur.execute('SELECT 1 FROM schema_version WHERE version = %s', (migration.version,))
+                if cur.fetchone() is None:
+                    for step in migration.steps:
+                        _run_step(cur, step)
+                    cur.execute(
+                        'INSERT INTO schema_version (version, name) VALUES (%s, %s)',
+                        (migration.version, migration.name),
+                    )
+                    logger.info(f"[DB] Applied migration {migration.version:03d} ({migration.name}).")
+            conn.commit()
+            version = migration.version
+        return version
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_conn(conn)
+
+
+_schema_lock: asyncio.Lock | None = None
+_schema_version: int | None = None
+
+
+async def ensure_schema() -> int:
+    """Bring the database to LATEST_VERSION. Cheap after the first call in a process."""
+    global _schema_lock, _schema_version
+    if _schema_version is not None:
+        return _schema_version
+    if _schema_lock is None:
+        _schema_lock = asyncio.Lock()
+    async with _schema_lock:
+        if _schema_version is None:
+            current = await db_execute(_current_version_sync, readonly=True)
+            if current < LATEST_VERSION:
+                logger.info(f"[DB] Schema at version {current}; migrating to {LATEST_VERSION}...")
+                current = await db_execute(_apply_migrations_sync)
+            _schema_version = current
+    return _schema_version
@@ -0,0 +1,246 @@
+"""
+Bots/db_managers/queries.py — Named Query Registry
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Hot-path SQL shared by the domain db_managers. Each statement is registered
+under a name and executed with ``cur.execute(SQL, params, prepare=True)``, so
+every pooled connection parses and plans it once and then reuses the
+server-side prepared statement (psycopg keeps the per-connection cache).
+
+QUERIES maps name → SQL, so tests and tooling can enumerate every statement
+(e.g. for EXPLAIN plan checks).
+"""
+
+QUERIES: dict[str, str] = {}
+
+
+def _q(name: str, sql: str) -> str:
+    if name in QUERIES:
+        raise ValueError(f"Duplicate query name: {name}")
+    QUERIES[name] = sql
+    return sql
+
+
+# ─── Tasks ────────────────────────────────────────────────────────────────────
+
+TASK_BY_CHANNEL = _q("task_by_channel", '''
+    SELECT
+        task_id, channel_id,
+        assignees, assignee_ids, details, deadline, temp_channel_link,
+        assigner, assigner_id, status, title, global_state,
+        completion_vector, activity_log, reminders_sent,
+        main_message_id, priority, acknowledged_by, checklist,
+        created_at, completed_at
+    FROM tasks WHERE channel_id = %s
+''')
+
+TASK_BY_ID = _q("task_by_id", 'SELECT * FROM tasks WHERE task_id = %s')
+
+TASK_ID_BY_CHANNEL = _q("task_id_by_channel", 'SELECT task_id FROM tasks WHERE channel_id = %s')
+
+TASKS_ALL = _q("tasks_all", "SELECT * FROM tasks")
+
+TASKS_ACTIVE = _q("tasks_active", "SELECT * FROM tasks WHERE global_state = 'Active'")
+
+TASKS_FOR_SYNC = _q("tasks_for_sync", "SELECT * FROM tasks WHERE global_state != 'Finalized'")
+
+# One participant's share of TASKS_FOR_SYNC.  assignee_ids is stored as
+# "id, id, ..." text, so the assignee match takes the id as a string.
+TASKS_FOR_SYNC_BY_ASSIGNEE = _q("tasks_for_sync_by_assignee", '''
+    SELECT * FROM tasks
+    WHERE global_state != 'Finalized' AND %s = ANY(string_to_array(assignee_ids, ', '))
+''')
+
+TASKS_FOR_SYNC_BY_ASSIGNER = _q("tasks_for_sync_by_assigner", '''
+    SELECT * FROM tasks WHERE global_state != 'Finalized' AND assigner_id = %s
+''')
+
+# Keyset pages (task_id after %s, LIMIT %s) for the engines that talk to
+# Discord per row: each page is its own short read on the primary key.
+TASKS_ACTIVE_PAGE = _q("tasks_active_page", '''
+    SELECT * FROM tasks WHERE global_state = 'Active' AND task_id > %s
+    ORDER BY task_id LIMIT %s
+''')
+
+TASKS_FINALIZED_PAGE = _q("tasks_finalized_page", '''
+    SELECT * FROM tasks
+    WHERE global_state = 'Finalized' AND completed_at IS NOT NULL AND task_id > %s
+    ORDER BY task_id LIMIT %s
+''')
+
+TASK_UPDATE = _q("task_update", '''
+    UPDATE tasks
+    SET channel_id = %s, assignees = %s, assignee_ids = %s, details = %s, deadline = %s,
+        temp_channel_link = %s, assigner = %s, assigner_id = %s,
+        status = %s, title = %s, global_state = %s, completion_vector = %s,
+        activity_log = %s, reminders_sent = %s, main_message_id = %s,
+        priority = %s, acknowledged_by = %s, checklist = %s
+    WHERE task_id = %s
+''')
+
+# ─── Leave ────────────────────────────────────────────────────────────────────
+
+HOLIDAY_EXISTS = _q("holiday_exists", "SELECT 1 FROM holidays WHERE date = %s")
+
+LEAVE_USER_SUMMARY = _q("leave_user_summary", '''
+    SELECT last_leave_taken, total_casual_leave, total_sick_leave, total_c_off, off_duty_hours
+    FROM users
+    WHERE user_id = %s
+''')
+
+LEAVE_USER_BY_NICKNAME = _q("leave_user_by_nickname", 'SELECT user_id FROM users WHERE nickname = %s')
+
+LEAVE_ACCEPTED_BY_ID = _q("leave_accepted_by_id", '''
+    SELECT leave_reason, number_of_days_off
+    FROM leaves
+    WHERE id = %s AND leave_status = 'Accepted'
+''')
+
+LEAVE_PENDING_BY_ID = _q("leave_pending_by_id", '''
+    SELECT leave_reason, number_of_days_off
+    FROM leaves
+    WHERE id = %s AND leave_status = 'PENDING'
+''')
+
+LEAVE_BY_ID = _q("leave_by_id", "SELECT * FROM leaves WHERE id = %s")
+
+LEAVE_OWNER = _q("leave_owner", "SELECT user_id FROM leaves WHERE id = %s")
+
+LEAVE_FOOTER = _q("leave_footer", "SELECT footer_text FROM leaves WHERE id = %s")
+
+# ─── Discovery ────────────────────────────────────────────────────────────────
+
+UPSERT_CATEGORY = _q("upsert_category", '''
+    INSERT INTO categories (id, name, guild_id) VALUES (%s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        guild_id = COALESCE(EXCLUDED.guild_id, categories.guild_id)
+''')
+
+UPSERT_CHANNEL = _q("upsert_channel", '''
+    INSERT INTO channels (id, name, type, category_id, guild_id) VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        type = EXCLUDED.type,
+        category_id = EXCLUDED.category_id,
+        guild_id = COALESCE(EXCLUDED.guild_id, channels.guild_id)
+''')
+
+UPSERT_ROLE = _q("upsert_role", '''
+    INSERT INTO roles (id, name, color, position, guild_id) VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        color = EXCLUDED.color,
+        position = EXCLUDED.position,
+        guild_id = COALESCE(EXCLUDED.guild_id, roles.guild_id)
+''')
+
+UPSERT_MEMBER_WITH_ROLES = _q("upsert_member_with_roles", '''
+    INSERT INTO members (id, name, display_name, joined_at, roles)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT(id) DO UPDATE SET
+        name         = EXCLUDED.name,
+        display_name = EXCLUDED.display_name,
+        joined_at    = EXCLUDED.joined_at,
+        roles        = EXCLUDED.roles
+''')
+
+UPSERT_MEMBER = _q("upsert_member", '''
+    INSERT INTO members (id, name, display_name, joined_at)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT(id) DO UPDATE SET
+        name         = EXCLUDED.name,
+        display_name = EXCLUDED.display_name,
+        joined_at    = EXCLUDED.joined_at
+''')
+
+# Both served by idx_messages_channel / idx_messages_author (user, id DESC) and
+# the snowflake primary key — "since" is always an id bound, never created_at.
+RECENT_MESSAGES = _q("recent_messages", '''
+    SELECT id, channel_id, author_id, content, created_at
+    FROM messages
+    WHERE channel_id = %s AND id < COALESCE(%s, 9223372036854775807)
+    ORDER BY id DESC
+    LIMIT %s
+''')
+
+# Ranked full-text search (migration 9): idx_messages_search finds the matches,
+# the optional channel list / author / snowflake lower bound narrow them.
+# ts_headline is only computed for the returned page, after the LIMIT.
+SEARCH_MESSAGES = _q("search_messages", '''
+    SELECT id, channel_id, author_id, content, created_at,
+           ts_rank_cd(search, q) AS rank,
+           ts_headline('english', content, q,
+                       'MaxFragments=1, MinWords=8, MaxWords=30, StartSel=**, StopSel=**') AS snippet
+    FROM messages, websearch_to_tsquery('english', %s) AS q
+    WHERE search @@ q
+      AND id >= %s
+      AND (%s::bigint[] IS NULL OR channel_id = ANY(%s::bigint[]))
+      AND (%s::bigint IS NULL OR author_id = %s)
+    ORDER BY rank DESC, id DESC
+    LIMIT %s OFFSET %s
+''')
+
+MESSAGE_COUNTS_SINCE = _q("message_counts_since", '''
+    SELECT author_id, COUNT(*) AS messages
+    FROM messages
+    WHERE id >= %s
+    GROUP BY author_id
+    ORDER BY messages DESC
+''')
+
+MESSAGE_COUNT_FOR_AUTHOR_SINCE = _q("message_count_for_author_since", '''
+    SELECT COUNT(*) AS messages FROM messages WHERE author_id = %s AND id >= %s
+''')
+
+SWEEP_CHECKPOINT_SET = _q("sweep_checkpoint_set", '''
+    INSERT INTO sweep_checkpoints (channel_id, last_message_id) VALUES (%s, %s)
+    ON CONFLICT (channel_id) DO UPDATE SET
+        last_message_id = GREATEST(sweep_checkpoints.last_message_id, EXCLUDED.last_message_id),
+        updated_at      = now()
+''')
+
+# Role membership lives in member_roles (member_id, role_id); role
+# parameters are bigint[] so one statement serves a name that maps to
+# several role ids (one per guild).
+MEMBERS_DAR_PENDING = _q("members_dar_pending", '''
+    SELECT id, name, display_name FROM members m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM member_roles mr WHERE mr.member_id = m.id AND mr.role_id = ANY(%s::bigint[])
+    )
+''')
+
+MEMBER_ROLE_IDS = _q("member_role_ids", 'SELECT role_id FROM member_roles WHERE member_id = %s')
+
+MEMBER_HAS_ROLE = _q("member_has_role", '''
+    SELECT 1 FROM member_roles WHERE member_id = %s AND role_id = ANY(%s::bigint[]) LIMIT 1
+''')
+
+MEMBER_ROLES_ADD = _q("member_roles_add", '''
+    INSERT INTO member_roles (member_id, role_id)
+    SELECT %s::bigint, unnest(%s::bigint[])
+    ON CONFLICT DO NOTHING
+''')
+
+MEMBER_ROLES_REMOVE = _q("member_roles_remove", '''
+    DELETE FROM member_roles WHERE member_id = %s AND role_id = ANY(%s::bigint[])
+''')
+
+MEMBER_ROLES_KEEP_ONLY = _q("member_roles_keep_only", '''
+    DELETE FROM member_roles WHERE member_id = %s AND role_id <> ALL(%s::bigint[])
+''')
+
+DISCOVERY_CHANGE_LOG = _q("discovery_change_log", '''
+    INSERT INTO discovery_changes (kind, action, entity_id, guild_id, name, old_name, detail)
+    VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb)
+''')
+
+MEMBER_ROLES = _q("member_roles", 'SELECT roles FROM members WHERE id = %s')
+
+MEMBERS_WITH_ROLE = _q("members_with_role", '''
+    SELECT id, name, display_name, roles FROM members m
+    WHERE EXISTS (
+        SELECT 1 FROM member_roles mr WHERE mr.member_id = m.id AND mr.role_id = ANY(%s::bigint[])
+    )
+''')
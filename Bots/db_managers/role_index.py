@@ -0,0 +1,156 @@
+"""
+Bots/db_managers/role_index.py — In-Memory Role Membership Index
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+Answers "which members have role X but none of Y/Z" without walking every
+guild member or touching the database.
+
+Two views of the same data:
+  - role id   -> set of member ids      (start a query from the smallest set)
+  - member id -> role bitset (an int)   (exclusions are one AND per member)
+Each role id is assigned a bit on first sight; bits of deleted roles are
+reused.  Members with no roles are still tracked (bitset 0), so a query
+with only exclusions covers everyone.
+
+Loaded by discovery_db_manager from member_roles at boot and on every
+snapshot, and patched by the same write paths that handle gateway events.
+Writes come from executor threads, reads from the event loop, so every
+operation holds one lock.
+"""
+
+import threading
+
+
+class RoleIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bits: dict[int, int] = {}         # role_id -> bit position
+        self._free: list[int] = []              # bit positions of deleted roles
+        self._holders: dict[int, set[int]] = {} # role_id -> member ids
+        self._masks: dict[int, int] = {}        # member_id -> role bitset
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def __contains__(self, member_id) -> bool:
+        return member_id in self._masks
+
+    # ── Writes ──
+
+    def replace(self, member_ids, pairs) -> None:
+        """Rebuild from every member id and every (member_id, role_id) pair."""
+        with self._lock:
+            self._bits.clear()
+            self._free.clear()
+            self._holders.clear()
+            self._masks = dict.fromkeys(member_ids, 0)
+            for member_id, role_id in pairs:
+                self._add(member_id, role_id)
+
+    def set_member(self, member_id: int, role_ids=None) -> None:
+        """Track a member; with role_ids, make that its exact role set."""
+        with self._lock:
+            if role_ids is None:
+                self._masks.setdefault(member_id, 0)
+                return
+            self._drop_member(member_id)
+            self._masks[member_id] = 0
+            for role_id in role_ids:
+                self._add(member_id, role_id)
+
+    def update(self, member_id: int, added=(), removed=()) -> None:
+        with self._lock:
+            self._masks.setdefault(member_id, 0)
+            for role_id in removed:
+                self._discard(member_id, role_id)
+            for role_id in added:
+                self._add(member_id, role_id)
+
+    def remove_member(self, member_id: int) -> None:
+        with self._lock:
+            self._drop_member(member_id)
+
+    def retain_members(self, member_ids) -> None:
+        """Drop every member not in *member_ids* (after a pruning sync)."""
+        keep = set(member_ids)
+        with self._lock:
+            for member_id in [m for m in self._masks if m not in keep]:
+                self._drop_member(member_id)
+
+    def remove_role(self, role_id: int) -> None:
+        with self._lock:
+            bit = self._bits.pop(role_id, None)
+            if bit is None:
+                return
+            for member_id in self._holders.pop(role_id, ()):
+                self._masks[member_id] &= ~(1 << bit)
+            self._free.append(bit)
+
+    def _add(self, member_id: int, role_id: int) -> None:
+        bit = self._bits.get(role_id)
+        if bit is None:
+            bit = self._bits[role_id] = self._free.pop() if self._free else len(self._bits)
+        self._masks[member_id] = self._masks.get(member_id, 0) | (1 << bit)
+        self._holders.setdefault(role_id, set()).add(member_id)
+
+    def _discard(self, member_id: int, role_id: int) -> None:
+        bit = self._bits.get(role_id)
+        if bit is not None and member_id in self._masks:
+            self._masks[member_id] &= ~(1 << bit)
+            self._holders[role_id].discard(member_id)
+
+    def _drop_member(self, member_id: int) -> None:
+        mask = self._masks.pop(member_id, 0)
+        if mask:
+            for role_id, bit in self._bits.items():
+                if mask >> bit & 1:
+                    self._holders[role_id].discard(member_id)
+
+    # ── Reads ──
+
+    def _mask(self, role_ids) -> int:
+        mask = 0
+        for role_id in role_ids:
+            bit = self._bits.get(role_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def members_with(self, all=(), none=(), any=()) -> set[int]:
+        """Member ids holding every role in *all*, at least one in *any* (if
+        given) and none in *none*."""
+        with self._lock:
+            if all:
+                if not set(all) <= self._bits.keys():
+                    return set()    # an unknown role: nobody holds it
+                candidates = min((self._holders[r] for r in all), key=len)
+                need = self._mask(all)
+            else:
+                candidates, need = self._masks.keys(), 0
+            exclude, want = self._mask(none), self._mask(any)
+            if any and not want:
+                return set()
+            masks = self._masks
+            return {
+                m for m in candidates
+                if masks[m] & need == need
+                and not masks[m] & exclude
+                and (not want or masks[m] & want)
+            }
+
+    def roles_of(self, member_id: int) -> set[int]:
+        with self._lock:
+            mask = self._masks.get(member_id, 0)
+            return {role_id for role_id, bit in self._bits.items() if mask >> bit & 1}
+
+    def export(self) -> tuple[list[int], list[tuple[int, int]]]:
+        """(member_ids, (member_id, role_id) pairs) — the input replace() takes."""
+        with self._lock:
+            pairs = [(m, r) for r, holders in self._holders.items() for m in holders]
+            return list(self._masks), pairs
+
+    def has(self, member_id: int, role_id: int) -> bool:
+        with self._lock:
+            bit = self._bits.get(role_id)
+            return bit is not None and bool(self._masks.get(member_id, 0) >> bit & 1)
@@ -6,95 +6,17 @@ PROPRIETARY AND CONFIDENTIAL.
 
 import logging
 
-from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, db_execute  # noqa: F401
+from .base_db import get_conn, put_conn, get_connection, db_queue, db_worker, start_db_worker, db_execute, db_transaction, STREAM_FETCH_SIZE  # noqa: F401
+from . import queries as Q
+from .migrations import ensure_schema
 
 logger = logging.getLogger("Concord")
 
 # ─── Schema Initialization ────────────────────────────────────────────────────
 
 async def initialize_task_db():
-    """Initializes the tasks database and required tables."""
-    def _init():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                # Create main tasks table
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS tasks (
-                        task_id SERIAL PRIMARY KEY,
-                        channel_id BIGINT UNIQUE,
-                        assignees TEXT,
-                        assignee_ids TEXT,
-                        details TEXT,
-                        deadline TEXT,
-                        temp_channel_link TEXT,
-                        assigner TEXT,
-                        assigner_id BIGINT,
-                        status TEXT,
-                        title TEXT,
-                        global_state TEXT DEFAULT 'Active',
-                        completion_vector TEXT DEFAULT '',
-                        activity_log TEXT DEFAULT '',
-                        reminders_sent TEXT DEFAULT '',
-                        main_message_id TEXT DEFAULT '',
-                        priority TEXT DEFAULT 'Normal',
-                        acknowledged_by TEXT DEFAULT '',
-                        checklist TEXT DEFAULT '',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        completed_at TIMESTAMP
-                    )
-                ''')
-                # Indexes on tasks
-                cur.execute('CREATE INDEX IF NOT EXISTS idx_tasks_message_id   ON tasks(main_message_id)')
-                cur.execute('CREATE INDEX IF NOT EXISTS idx_tasks_global_state  ON tasks(global_state)')
-                cur.execute('CREATE INDEX IF NOT EXISTS idx_tasks_assigner_id   ON tasks(assigner_id)')
-                
-                # Pending Tasks Channels (per-assignee view channel)
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS pending_tasks_channels (
-                        user_id         BIGINT PRIMARY KEY,
-                        channel_id      BIGINT UNIQUE,
-                        tasks           TEXT DEFAULT '',
-                        task_message_ids TEXT DEFAULT ''
-                    )
-                ''')
-
-                # Assigner Dashboard table
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS assigner_dashboard_channels (
-                        user_id          BIGINT PRIMARY KEY,
-                        channel_id       BIGINT UNIQUE,
-                        tasks            TEXT DEFAULT '',
-                        task_message_ids TEXT DEFAULT ''
-                    )
-                ''')
-
-                # Notification Queue
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS notification_queue (
-                        id SERIAL PRIMARY KEY,
-                        task_id INTEGER,
-                        recipient_id BIGINT,
-                        content TEXT,
-                        scheduled_at TIMESTAMP,
-                        sent BOOLEAN DEFAULT FALSE
-                    )
-                ''')
-                cur.execute('CREATE INDEX IF NOT EXISTS idx_notif_sent ON notification_queue(sent, scheduled_at)')
-
-                # Task Drafts table for reboot recovery
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS task_drafts (
-                        draft_id SERIAL PRIMARY KEY,
-                        user_id BIGINT,
-                        modal_data JSONB,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_init)
+    """Brings the shared schema (tasks tables included) up to date."""
+    await ensure_schema()
 
 async def store_task_draft(user_id, modal_data):
     """Stores task details in a draft for reboot recovery."""
@@ -116,7 +38,7 @@ async def store_task_draft(user_id, modal_data):
                 return d_id
         finally:
             put_conn(conn)
-    return await db_execute(_store)
+    return await db_execute(_store, key=("task_draft_user", user_id))
 
 async def retrieve_task_draft(draft_id):
     """Retrieves a task draft by its ID."""
@@ -128,7 +50,7 @@ async def retrieve_task_draft(draft_id):
                 return cur.fetchone()
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve, readonly=True)
 
 async def delete_task_draft(draft_id):
     """Deletes a task draft."""
@@ -140,7 +62,7 @@ async def delete_task_draft(draft_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_delete)
+    await db_execute(_delete, key=("task_draft", draft_id))
 
 # ─── Core Database Methods ────────────────────────────────────────────────────
 
@@ -183,196 +105,124 @@ async def store_task_in_database(task_data):
                 return new_id
         finally:
             put_conn(conn)
-    return await db_execute(_store)
+    return await db_execute(_store, key=("task_channel", task_data['channel_id']))
 
 async def retrieve_task_from_database(channel_id):
     def _retrieve():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('''
-                    SELECT
-                        assignees, assignee_ids, details, deadline, temp_channel_link,
-                        assigner, assigner_id, status, title, global_state,
-                        completion_vector, activity_log, reminders_sent,
-                        main_message_id, priority, acknowledged_by, checklist,
-                        created_at
-                    FROM tasks WHERE channel_id = %s
-                ''', (channel_id,))
+                cur.execute(Q.TASK_BY_CHANNEL, (channel_id,), prepare=True)
                 row = cur.fetchone()
-                if row:
-                    return {
-                        'channel_id': channel_id,
-                        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
-                        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
-                        'details': row['details'],
-                        'deadline': row['deadline'],
-                        'temp_channel_link': row['temp_channel_link'],
-                        'assigner': row['assigner'],
-                        'assigner_id': row['assigner_id'],
-                        'status': row['status'],
-                        'title': row['title'],
-                        'global_state': row['global_state'],
-                        'completion_vector': row['completion_vector'],
-                        'activity_log': row['activity_log'],
-                        'reminders_sent': row['reminders_sent'],
-                        'main_message_id': row['main_message_id'],
-                        'priority': row['priority'],
-                        'acknowledged_by': row['acknowledged_by'],
-                        'checklist': row['checklist'] or '',
-                        'created_at': row.get('created_at'),
-                    }
-                return None
+                return _row_to_task(row) if row else None
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve, readonly=True)
 
 async def retrieve_task_by_id(task_id):
     def _retrieve():
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute('SELECT * FROM tasks WHERE task_id = %s', (task_id,))
+                cur.execute(Q.TASK_BY_ID, (task_id,), prepare=True)
                 row = cur.fetchone()
-                if row:
-                    return {
-                        'task_id': row['task_id'],
-                        'channel_id': row['channel_id'],
-                        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
-                        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
-                        'details': row['details'],
-                        'deadline': row['deadline'],
-                        'temp_channel_link': row['temp_channel_link'],
-                        'assigner': row['assigner'],
-                        'assigner_id': row['assigner_id'],
-                        'status': row['status'],
-                        'title': row['title'],
-                        'global_state': row['global_state'],
-                        'completion_vector': row['completion_vector'],
-                        'activity_log': row['activity_log'],
-                        'reminders_sent': row['reminders_sent'],
-                        'main_message_id': row['main_message_id'],
-                        'priority': row['priority'],
-                        'acknowledged_by': row['acknowledged_by'],
-                        'checklist': row['checklist'] or '',
-                        'created_at': row.get('created_at'),
-                    }
-                return None
+                return _row_to_task(row) if row else None
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve, readonly=True)
+
+def _row_to_task(row) -> dict:
+    """Shape a tasks row into the dict the cogs work with."""
+    return {
+        'task_id': row['task_id'],
+        'channel_id': row['channel_id'],
+        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
+        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
+        'details': row['details'],
+        'deadline': row['deadline'],
+        'temp_channel_link': row['temp_channel_link'],
+        'assigner': row['assigner'],
+        'assigner_id': row['assigner_id'],
+        'status': row['status'],
+        'title': row['title'],
+        'global_state': row['global_state'],
+        'completion_vector': row['completion_vector'],
+        'activity_log': row['activity_log'],
+        'reminders_sent': row['reminders_sent'],
+        'main_message_id': row['main_message_id'],
+        'priority': row['priority'],
+        'acknowledged_by': row['acknowledged_by'],
+        'checklist': row['checklist'] or '',
+        'created_at': row.get('created_at'),
+        'completed_at': row.get('completed_at'),
+    }
+
+
+def _retrieve_tasks_sync(query, params=()):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, params, prepare=True)
+            return [_row_to_task(row) for row in cur.fetchall()]
+    finally:
+        put_conn(conn)
+
 
 async def retrieve_all_tasks_from_database():
-    def _retrieve():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute('SELECT * FROM tasks')
-                rows = cur.fetchall()
-                tasks = []
-                for row in rows:
-                    tasks.append({
-                        'task_id': row['task_id'],
-                        'channel_id': row['channel_id'],
-                        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
-                        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
-                        'details': row['details'],
-                        'deadline': row['deadline'],
-                        'temp_channel_link': row['temp_channel_link'],
-                        'assigner': row['assigner'],
-                        'assigner_id': row['assigner_id'],
-                        'status': row['status'],
-                        'title': row['title'],
-                        'global_state': row['global_state'],
-                        'completion_vector': row['completion_vector'],
-                        'activity_log': row['activity_log'],
-                        'reminders_sent': row['reminders_sent'],
-                        'main_message_id': row['main_message_id'],
-                        'priority': row['priority'],
-                        'acknowledged_by': row['acknowledged_by'],
-                        'checklist': row['checklist'] or '',
-                        'created_at': row.get('created_at'),
-                    })
-                return tasks
-        finally:
-            put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve_tasks_sync, Q.TASKS_ALL, readonly=True)
 
 async def retrieve_active_tasks_from_database():
     """Fetch only Active tasks — used by the reminder engine (Pending Review tasks don't need reminders)."""
-    def _retrieve():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM tasks WHERE global_state = 'Active'")
-                rows = cur.fetchall()
-                tasks = []
-                for row in rows:
-                    tasks.append({
-                        'task_id': row['task_id'],
-                        'channel_id': row['channel_id'],
-                        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
-                        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
-                        'details': row['details'],
-                        'deadline': row['deadline'],
-                        'temp_channel_link': row['temp_channel_link'],
-                        'assigner': row['assigner'],
-                        'assigner_id': row['assigner_id'],
-                        'status': row['status'],
-                        'title': row['title'],
-                        'global_state': row['global_state'],
-                        'completion_vector': row['completion_vector'],
-                        'activity_log': row['activity_log'],
-                        'reminders_sent': row['reminders_sent'],
-                        'main_message_id': row['main_message_id'],
-                        'priority': row['priority'],
-                        'acknowledged_by': row['acknowledged_by'],
-                        'checklist': row['checklist'] or '',
-                        'created_at': row.get('created_at'),
-                    })
-                return tasks
-        finally:
-            put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve_tasks_sync, Q.TASKS_ACTIVE, readonly=True)
 
 
 async def retrieve_tasks_for_sync():
     """Fetch all non-Finalized tasks (Active + Pending Review) for dashboard/pending sync.
     Tasks remain visible until the assigner explicitly approves — only Finalized tasks are excluded."""
-    def _retrieve():
+    return await db_execute(_retrieve_tasks_sync, Q.TASKS_FOR_SYNC, readonly=True)
+
+async def retrieve_assignee_tasks_for_sync(user_id):
+    """retrieve_tasks_for_sync() narrowed in SQL to tasks assigned to *user_id* (pending view)."""
+    return await db_execute(_retrieve_tasks_sync, Q.TASKS_FOR_SYNC_BY_ASSIGNEE, (str(user_id),), readonly=True)
+
+async def retrieve_assigner_tasks_for_sync(user_id):
+    """retrieve_tasks_for_sync() narrowed in SQL to tasks assigned by *user_id* (dashboard)."""
+    return await db_execute(_retrieve_tasks_sync, Q.TASKS_FOR_SYNC_BY_ASSIGNER, (user_id,), readonly=True)
+
+
+# ─── Paged Reads ──────────────────────────────────────────────────────────────
+# Constant-memory counterparts of the retrieve_* lists above for the background
+# engines: tasks arrive in pages of STREAM_FETCH_SIZE, each its own short read.
+
+async def _iter_task_pages(query):
+    """Yield tasks a keyset page at a time; no connection is held between pages."""
+    def _page(after):
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT * FROM tasks WHERE global_state != 'Finalized'")
-                rows = cur.fetchall()
-                tasks = []
-                for row in rows:
-                    tasks.append({
-                        'task_id': row['task_id'],
-                        'channel_id': row['channel_id'],
-                        'assignees': row['assignees'].split(', ') if row['assignees'] else [],
-                        'assignee_ids': [int(x) for x in row['assignee_ids'].split(', ') if x] if row['assignee_ids'] else [],
-                        'details': row['details'],
-                        'deadline': row['deadline'],
-                        'temp_channel_link': row['temp_channel_link'],
-                        'assigner': row['assigner'],
-                        'assigner_id': row['assigner_id'],
-                        'status': row['status'],
-                        'title': row['title'],
-                        'global_state': row['global_state'],
-                        'completion_vector': row['completion_vector'],
-                        'activity_log': row['activity_log'],
-                        'reminders_sent': row['reminders_sent'],
-                        'main_message_id': row['main_message_id'],
-                        'priority': row['priority'],
-                        'acknowledged_by': row['acknowledged_by'],
-                        'checklist': row['checklist'] or '',
-                        'created_at': row.get('created_at'),
-                    })
-                return tasks
+                cur.execute(query, (after, STREAM_FETCH_SIZE), prepare=True)
+                return cur.fetchall()
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+
+    after = 0
+    while True:
+        rows = await db_execute(_page, after, readonly=True)
+        for row in rows:
+            yield _row_to_task(row)
+        if len(rows) < STREAM_FETCH_SIZE:
+            return
+        after = rows[-1]['task_id']
+
+async def iter_active_tasks():
+    """Active tasks for the reminder engine, paged so Discord I/O never holds a connection."""
+    async for task in _iter_task_pages(Q.TASKS_ACTIVE_PAGE):
+        yield task
+
+async def iter_finalized_tasks():
+    """Finalized tasks with a completion time — candidates for archive cleanup, paged like iter_active_tasks()."""
+    async for task in _iter_task_pages(Q.TASKS_FINALIZED_PAGE):
+        yield task
 
 
 async def cleanup_stale_drafts(max_age_hours: int = 24):
@@ -390,51 +240,60 @@ async def cleanup_stale_drafts(max_age_hours: int = 24):
             return deleted
         finally:
             put_conn(conn)
-    deleted = await db_execute(_cleanup)
+    deleted = await db_execute(_cleanup, key=("task_drafts", "cleanup"))
     if deleted:
         logger.info(f"[Task] Cleaned up {deleted} stale draft(s) older than {max_age_hours}h.")
 
 
-async def update_task_in_database(task_data):
-    def _update():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    UPDATE tasks
-                    SET channel_id = %s, assignees = %s, assignee_ids = %s, details = %s, deadline = %s,
-                        temp_channel_link = %s, assigner = %s, assigner_id = %s,
-                        status = %s, title = %s, global_state = %s, completion_vector = %s,
-                        activity_log = %s, reminders_sent = %s, main_message_id = %s,
-                        priority = %s, acknowledged_by = %s, checklist = %s
-                    WHERE task_id = %s
-                ''', (
-                    task_data.get('channel_id') or None,
-                    ', '.join(task_data['assignees']),
-                    ', '.join(map(str, task_data.get('assignee_ids', []))),
-                    task_data['details'],
-                    task_data['deadline'],
-                    task_data['temp_channel_link'],
-                    task_data['assigner'],
-                    task_data.get('assigner_id'),
-                    task_data['status'],
-                    task_data['title'],
-                    task_data.get('global_state', 'Active'),
-                    task_data.get('completion_vector', ''),
-                    task_data.get('activity_log', ''),
-                    task_data.get('reminders_sent', ''),
-                    task_data.get('main_message_id', ''),
-                    task_data.get('priority', 'Normal'),
-                    task_data.get('acknowledged_by', ''),
-                    task_data.get('checklist', ''),
-                    task_data['task_id']
-                ))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_update)
+def _update_task_sync(task_data):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(Q.TASK_UPDATE, (
+                task_data.get('channel_id') or None,
+                ', '.join(task_data['assignees']),
+                ', '.join(map(str, task_data.get('assignee_ids', []))),
+                task_data['details'],
+                task_data['deadline'],
+                task_data['temp_channel_link'],
+                task_data['assigner'],
+                task_data.get('assigner_id'),
+                task_data['status'],
+                task_data['title'],
+                task_data.get('global_state', 'Active'),
+                task_data.get('completion_vector', ''),
+                task_data.get('activity_log', ''),
+                task_data.get('reminders_sent', ''),
+                task_data.get('main_message_id', ''),
+                task_data.get('priority', 'Normal'),
+                task_data.get('acknowledged_by', ''),
+                task_data.get('checklist', ''),
+                task_data['task_id']
+            ), prepare=True)
+        conn.commit()
+    finally:
+        put_conn(conn)
 
-async def delete_task_from_database(channel_id):
+async def update_task_in_database(task_data):
+    await db_execute(_update_task_sync, task_data, key=("task", int(task_data['task_id'])))
+
+async def _task_key(channel_id, task_id=None):
+    """Write key for a tasks row: ("task", task_id), the key every update and
+    completion uses. Looks the id up by channel when the caller doesn't have it."""
+    if task_id is None:
+        def _task_id():
+            conn = get_conn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(Q.TASK_ID_BY_CHANNEL, (channel_id,), prepare=True)
+                    row = cur.fetchone()
+                    return row['task_id'] if row else None
+            finally:
+                put_conn(conn)
+        task_id = await db_execute(_task_id, readonly=True)
+    return ("task", int(task_id) if task_id is not None else None)
+
+async def delete_task_from_database(channel_id, task_id=None):
     def _delete():
         conn = get_conn()
         try:
@@ -443,7 +302,7 @@ async def delete_task_from_database(channel_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_delete)
+    await db_execute(_delete, key=await _task_key(channel_id, task_id))
 
 async def store_pending_tasks_channel(user_id, channel_id, tasks=None, task_message_ids=None):
     def _store():
@@ -461,7 +320,7 @@ async def store_pending_tasks_channel(user_id, channel_id, tasks=None, task_mess
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_store)
+    await db_execute(_store, key=("pending_tasks", user_id))
 
 async def update_pending_tasks_channel(user_id, tasks, task_message_ids):
     def _update():
@@ -476,7 +335,7 @@ async def update_pending_tasks_channel(user_id, tasks, task_message_ids):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_update)
+    await db_execute(_update, key=("pending_tasks", user_id))
 
 async def retrieve_pending_tasks_channel(user_id):
     def _retrieve():
@@ -488,7 +347,7 @@ async def retrieve_pending_tasks_channel(user_id):
                 return row if row else None
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve, readonly=True)
 
 async def delete_pending_tasks_channel_from_database(user_id):
     def _delete():
@@ -499,7 +358,7 @@ async def delete_pending_tasks_channel_from_database(user_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_delete)
+    await db_execute(_delete, key=("pending_tasks", user_id))
 
 # ─── Assigner Dashboard Methods ───────────────────────────────────────────────
 
@@ -519,7 +378,7 @@ async def store_assigner_dashboard_channel(user_id, channel_id, tasks=None, task
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_store)
+    await db_execute(_store, key=("assigner_dashboard", user_id))
 
 async def update_assigner_dashboard_channel(user_id, tasks, task_message_ids):
     def _update():
@@ -534,7 +393,7 @@ async def update_assigner_dashboard_channel(user_id, tasks, task_message_ids):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_update)
+    await db_execute(_update, key=("assigner_dashboard", user_id))
 
 async def retrieve_assigner_dashboard_channel(user_id):
     def _retrieve():
@@ -546,7 +405,7 @@ async def retrieve_assigner_dashboard_channel(user_id):
                 return row if row else None
         finally:
             put_conn(conn)
-    return await db_execute(_retrieve)
+    return await db_execute(_retrieve, readonly=True)
 
 async def delete_assigner_dashboard_channel_from_database(user_id):
     def _delete():
@@ -557,22 +416,29 @@ async def delete_assigner_dashboard_channel_from_database(user_id):
             conn.commit()
         finally:
             put_conn(conn)
-    await db_execute(_delete)
+    await db_execute(_delete, key=("assigner_dashboard", user_id))
+
+def _mark_task_completed_sync(task_id):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute('''
+                UPDATE tasks 
+                SET global_state = 'Finalized', 
+                    status = 'Finalized',
+                    completed_at = CURRENT_TIMESTAMP 
+                WHERE task_id = %s
+            ''', (task_id,))
+        conn.commit()
+    finally:
+        put_conn(conn)
 
 async def mark_task_completed(task_id):
     """Sets the completed_at timestamp for the task."""
-    def _mark():
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    UPDATE tasks 
-                    SET global_state = 'Finalized', 
-                        status = 'Finalized',
-                        completed_at = CURRENT_TIMESTAMP 
-                    WHERE task_id = %s
-                ''', (task_id,))
-            conn.commit()
-        finally:
-            put_conn(conn)
-    await db_execute(_mark)
+    await db_execute(_mark_task_completed_sync, task_id, key=("task", int(task_id)))
+
+async def finalize_task(task_data):
+    """Finalize the task and stamp completed_at.  Only those columns are written: the
+    panel's task dict may be stale, so a full-row update could undo newer changes."""
+    task_id = int(task_data['task_id'])
+    await db_execute(_mark_task_completed_sync, task_id, key=("task", task_id))
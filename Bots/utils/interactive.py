@@ -0,0 +1,26 @@
+"""
+Bots/utils/interactive.py — Interactive-Priority View/Modal Bases
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+discord.py runs each View/Modal callback in its own task, so db_priority set
+in a cog's on_interaction listener does not reach it.  These bases set it in
+interaction_check, which runs in that same task just before the callback.
+"""
+
+import discord
+from discord.ui import View, Modal
+
+from Bots.db_managers.base_db import db_priority, INTERACTIVE
+
+
+class InteractiveView(View):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        db_priority.set(INTERACTIVE)
+        return True
+
+
+class InteractiveModal(Modal):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        db_priority.set(INTERACTIVE)
+        return True
@@ -0,0 +1,45 @@
+"""
+Bots/utils/readiness.py — Phased Discovery Readiness
+Copyright (c) 2026 Concord Desk. All rights reserved.
+PROPRIETARY AND CONFIDENTIAL.
+
+DiscoveryCog publishes its startup progress as three events on the bot:
+  structure  categories, channels and roles are mirrored (config resolution)
+  members    members, role membership and scheduled events are mirrored
+  history    the background message sweep has finished
+Cogs wait only on the phase they need:
+
+    await discovery_phases(self.bot).structure.wait()
+
+`bot.discovery_complete` is kept as an alias of the members phase — the point
+the old single event used to be set.
+"""
+
+import asyncio
+
+PHASES = ("structure", "members", "history")
+
+
+class DiscoveryPhases:
+    def __init__(self, members: asyncio.Event | None = None):
+        self.structure = asyncio.Event()
+        self.members   = members or asyncio.Event()
+        self.history   = asyncio.Event()
+
+    def clear(self) -> None:
+        for phase in PHASES:
+            getattr(self, phase).clear()
+
+    def status(self) -> dict[str, bool]:
+        return {phase: getattr(self, phase).is_set() for phase in PHASES}
+
+
+def discovery_phases(bot) -> DiscoveryPhases:
+    """The bot's DiscoveryPhases, created (with the discovery_complete alias) on first use."""
+    phases = getattr(bot, "discovery_phases", None)
+    if not isinstance(phases, DiscoveryPhases):
+        legacy = getattr(bot, "discovery_complete", None)
+        phases = DiscoveryPhases(legacy if isinstance(legacy, asyncio.Event) else None)
+        bot.discovery_phases = phases
+        bot.discovery_complete = phases.members
+    return phases
@@ -12,6 +12,7 @@ import discord
 from discord.ext import commands
 
 from Bots.utils.timezone import now_ist
+from Bots.utils.readiness import discovery_phases
 from Bots.db_managers import discovery_db_manager as discovery
 
 # Live config — populated by resolve_dar_config() on bot startup
@@ -70,12 +71,12 @@ class DARCog(commands.Cog, name="DAR"):
             self._bg_task.cancel()
 
     async def cog_load(self):
-        if not hasattr(self.bot, 'discovery_complete'):
-            self.bot.discovery_complete = asyncio.Event()
+        discovery_phases(self.bot)
 
     @commands.Cog.listener()
     async def on_ready(self):
-        await self.bot.discovery_complete.wait()
+        # Role ids only need the structure phase; the loop waits for members.
+        await discovery_phases(self.bot).structure.wait()
         await resolve_dar_config()
         self._bg_task = asyncio.create_task(self.check_role_expiry())
 
@@ -126,6 +127,8 @@ class DARCog(commands.Cog, name="DAR"):
     async def check_role_expiry(self):
         """Periodically checks for role expiry and sends reminders."""
         await self.bot.wait_until_ready()
+        # Reminders and role removal query the role index, filled in the members phase.
+        await discovery_phases(self.bot).members.wait()
         while not self.bot.is_closed():
             now = now_ist()
 
@@ -150,14 +153,19 @@ class DARCog(commands.Cog, name="DAR"):
     async def handle_role_removal(self):
         """Removes the DAR Submitted role from all members at 11:00 AM."""
         removed_members = []
-        for member in self.bot.get_all_members():
+        guild = next((g for g in self.bot.guilds if g.get_role(DAR_SUBMITTED_ROLE_ID)), None)
+        # Holders come from the discovery role index, not a walk of every member.
+        holders = discovery.role_index.members_with(all=[DAR_SUBMITTED_ROLE_ID]) if guild else ()
+        for member_id in holders:
+            member = guild.get_member(member_id)
+            if member is None:
+                continue
             try:
-                if DAR_SUBMITTED_ROLE_ID in [role.id for role in member.roles]:
-                    role = discord.utils.get(member.guild.roles, id=DAR_SUBMITTED_ROLE_ID)
-                    await member.remove_roles(role)
-                    removed_members.append(member.name)
-                    self.logger.info(f"[DAR] Removed role {role.name} from {member.name}.")
-                    await asyncio.sleep(0.5)  # Rate limit protection: 2 ops/sec
+                role = guild.get_role(DAR_SUBMITTED_ROLE_ID)
+                await member.remove_roles(role)
+                removed_members.append(member.name)
+                self.logger.info(f"[DAR] Removed role {role.name} from {member.name}.")
+                await asyncio.sleep(0.5)  # Rate limit protection: 2 ops/sec
             except discord.Forbidden:
                 self.logger.error(f"[ERR-DAR-005] [DAR] Missing permission to remove role from {member.name}.")
             except discord.HTTPException as e:
@@ -185,15 +193,13 @@ class DARCog(commands.Cog, name="DAR"):
 
     async def send_dar_reminders(self):
         """DMs all members who haven't submitted their DAR yet."""
-        for member in self.bot.get_all_members():
-            role_ids = [role.id for role in member.roles]
-            if (
-                member.id != self.bot.user.id
-                and DAR_SUBMITTED_ROLE_ID not in role_ids
-                and PA_ROLE_ID            not in role_ids
-                and ON_LEAVE_ROLE_ID      not in role_ids
-                and DAR_EXCLUDE_ROLE_ID   not in role_ids
-            ):
+        pending = discovery.role_index.members_with(
+            none=[DAR_SUBMITTED_ROLE_ID, PA_ROLE_ID, ON_LEAVE_ROLE_ID, DAR_EXCLUDE_ROLE_ID],
+        )
+        pending.discard(self.bot.user.id)
+        for member_id in sorted(pending):
+            member = self.bot.get_user(member_id)
+            if member is not None:
                 try:
                     await member.send("Reminder: You haven't submitted your D.A.R yet.")
                     self.logger.info(f"[DAR] Sent reminder to {member.name}.")
@@ -2,93 +2,292 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import os
+import re
+import time
 
 from Bots.db_managers import discovery_db_manager as db
+from Bots.db_managers.base_db import db_priority, BULK, INTERACTIVE, queue_stats, pool_stats
+from Bots.db_managers import db_metrics
+from Bots.db_managers.message_mirror import MessageMirrorBuffer
+from Bots.db_managers.change_listener import listener as change_listener
+from Bots.db_managers.message_retention import run_retention, seconds_until, RETENTION_HOUR
+from Bots.utils.timezone import now_ist
+from Bots.utils.readiness import discovery_phases
 
 logger = logging.getLogger("Concord")
 
+# History sweep: channels read at once (discord.py still honours each route's
+# rate-limit bucket), messages read from a never-swept channel, and how often
+# the per-channel checkpoint is advanced.
+SWEEP_CONCURRENCY = int(os.getenv("DISCOVERY_SWEEP_CONCURRENCY", "4"))
+SWEEP_BACKFILL    = int(os.getenv("DISCOVERY_SWEEP_BACKFILL", "50"))
+SWEEP_BATCH       = 100
+
+# !search: results per page, and how long the page buttons stay live.
+SEARCH_PAGE_SIZE = 5
+SEARCH_TIMEOUT_S = 180
+# Leading <#channel> / <@member> mentions in a !search are its filters.
+_SEARCH_FILTER = re.compile(r"\s*<(#|@!?)(\d+)>")
+
+
+async def _replay(messages):
+    for message in messages:
+        yield message
+
+
+def _split_search_filters(text):
+    """(channel_id, member_id, query) from !search arguments.
+
+    Only mentions before the first word count, so a query word that happens
+    to match a channel or member name is never taken as a filter.
+    """
+    channel_id = member_id = None
+    while (match := _SEARCH_FILTER.match(text)):
+        if match.group(1) == "#":
+            channel_id = int(match.group(2))
+        else:
+            member_id = int(match.group(2))
+        text = text[match.end():]
+    return channel_id, member_id, text.strip()
+
+
+def _search_embed(guild, query, rows, page):
+    embed = discord.Embed(title=f"Search: {query[:200]}", color=5810975)
+    for row in rows:
+        channel = guild.get_channel(row['channel_id'])
+        author = guild.get_member(row['author_id'])
+        when = discord.utils.format_dt(row['created_at'], 'd') if row['created_at'] else "unknown date"
+        snippet = (row['snippet'] or row['content'] or "*(no text)*")[:300]
+        link = f"https://discord.com/channels/{guild.id}/{row['channel_id']}/{row['id']}"
+        embed.add_field(
+            name=f"#{channel.name if channel else row['channel_id']} · "
+                 f"{author.display_name if author else row['author_id']}",
+            value=f"{snippet}\n{when} · [jump]({link})",
+            inline=False,
+        )
+    embed.set_footer(text=f"Page {page + 1}")
+    return embed
+
+
+class SearchView(discord.ui.View):
+    """◀ / ▶ pager over search_messages(); each page is fetched on demand."""
+
+    def __init__(self, author_id, guild, query, filters, rows):
+        super().__init__(timeout=SEARCH_TIMEOUT_S)
+        self.author_id, self.guild, self.query, self.filters = author_id, guild, query, filters
+        self.page, self.rows = 0, rows
+        self._sync_buttons()
+
+    async def fetch(self, page):
+        """Rows of *page*, plus one extra row to tell whether a next page exists."""
+        return await db.search_messages(
+            self.query, **self.filters, limit=SEARCH_PAGE_SIZE + 1, offset=page * SEARCH_PAGE_SIZE,
+        )
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.page == 0
+        self.next.disabled = len(self.rows) <= SEARCH_PAGE_SIZE
+
+    def embed(self):
+        return _search_embed(self.guild, self.query, self.rows[:SEARCH_PAGE_SIZE], self.page)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Run `!search` to page your own results.", ephemeral=True)
+            return False
+        db_priority.set(INTERACTIVE)
+        return True
+
+    async def _turn(self, interaction, page):
+        self.rows, self.page = await self.fetch(page), page
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, self.page + 1)
+
 
 class DiscoveryCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.bg_task = None
         self._sweep_task = None
         self._cleanup_task = None
+        self.mirror = MessageMirrorBuffer()
 
     async def cog_load(self):
-        self.bg_task = asyncio.create_task(db.db_worker())
+        db.start_db_worker()
         await db.initialize_discovery_db()
-        # Initialize the global discovery event
-        if not hasattr(self.bot, 'discovery_complete'):
-            self.bot.discovery_complete = asyncio.Event()
-        self.bot.discovery_complete.clear()
+        self.mirror.start()
+        # Patch caches from other processes' writes (LISTEN concord_changes)
+        change_listener.start()
+        # Readiness phases (bot.discovery_complete is the members phase)
+        discovery_phases(self.bot).clear()
 
     async def cog_unload(self):
-        for task in (self.bg_task, self._sweep_task, self._cleanup_task):
+        for task in (self._sweep_task, self._cleanup_task):
             if task:
                 task.cancel()
+        await self.mirror.close()
+        await change_listener.close()
+        # Keep live changes since the last reconciliation for the next boot.
+        await db.save_cache_snapshot()
 
     # ─── Initial Full Sweep ───────────────────────────────────────────────────
 
     @commands.Cog.listener()
     async def on_ready(self):
+        # Mirror traffic is background work; the sweep/cleanup tasks spawned
+        # below inherit the bulk lane from this context.
+        db_priority.set(BULK)
+        phases = discovery_phases(self.bot)
         logger.info("[Discovery] Starting initial server analysis...")
+        start = time.perf_counter()
+
+        # Phase 1 — structure: already in the gateway cache, and all that
+        # config resolution needs. It goes straight into the lookup cache so
+        # dependent cogs start without waiting on the DB.
+        categories, channels, roles = [], [], []
         for guild in self.bot.guilds:
-            for category in guild.categories:
-                await db.upsert_category(category.id, category.name)
+            categories += [(c.id, c.name, guild.id) for c in guild.categories]
+            channels += [
+                (c.id, c.name, str(c.type), getattr(c, 'category_id', None), guild.id)
+                for c in guild.channels
+            ]
+            roles += [(r.id, r.name, r.color, r.position, guild.id) for r in guild.roles]
+        db.load_gateway_structure(categories, channels, roles)
+        phases.structure.set()
+        logger.info(f"[Discovery] Structure ready in {time.perf_counter() - start:.1f}s.")
+
+        # The mirror is written once a DB warm-up behind the local snapshot
+        # has landed (it owns ensure_schema).
+        await db.wait_until_warm()
+        await self._sync_snapshot(categories=categories, channels=channels, roles=roles)
+
+        # Phase 3 — history: the sweep only needs channels, so it runs in the
+        # background alongside the member phase and sets its own event.
+        self._sweep_task = asyncio.create_task(self._sweep_messages())
+        self._cleanup_task = asyncio.create_task(self._message_cleanup_engine())
 
-            for channel in guild.channels:
-                category_id = getattr(channel, 'category_id', None)
-                await db.upsert_channel(channel.id, channel.name, str(channel.type), category_id)
+        # Phase 2 — members (chunking can take a while on large guilds).
+        members, events, member_roles = [], [], []
+        for guild in self.bot.guilds:
+            for member in await self._guild_members(guild):
+                role_names = [r.name for r in member.roles if r.name != '@everyone']
+                members.append((member.id, member.name, member.display_name, member.joined_at, role_names))
+                member_roles += [(member.id, r.id) for r in member.roles if not r.is_default()]
 
-            for role in guild.roles:
-                await db.upsert_role(role.id, role.name, role.color, role.position)
+            events += [
+                (e.id, e.name, e.description, e.start_time, e.end_time, e.status.value)
+                for e in guild.scheduled_events
+            ]
 
-            async for member in guild.fetch_members(limit=None):
-                role_names = [r.name for r in member.roles if r.name != '@everyone']
-                await db.upsert_member(member.id, member.name, member.display_name, member.joined_at, roles=role_names)
-                await asyncio.sleep(0.1)  # Rate limit: 10 members/sec to avoid API limits
+        await self._sync_snapshot(members=members, scheduled_events=events, member_roles=member_roles)
+        logger.info(f"[Discovery] Members ready in {time.perf_counter() - start:.1f}s; initial server discovery complete.")
+        phases.members.set()
 
-            for event in guild.scheduled_events:
-                await db.upsert_scheduled_event(
-                    event.id, event.name, event.description,
-                    event.start_time, event.end_time, event.status.value
-                )
+    async def _sync_snapshot(self, **tables):
+        """One transaction per call: diff against the mirror, write the changes."""
+        try:
+            await db.sync_guild_snapshot(**tables)
+        except Exception as e:
+            # Keep the previous mirror; live events still patch it.
+            logger.error(f"[ERR-DSC-003] [Discovery] Snapshot sync failed: {e}")
 
-        # Kick off async message sweeping so we don't block on_ready
-        self._sweep_task = asyncio.create_task(self._sweep_messages())
-        self._cleanup_task = asyncio.create_task(self._message_cleanup_engine())
+    async def _guild_members(self, guild):
+        """All members of *guild*, from the gateway member cache.
 
-        logger.info("[Discovery] Initial server discovery complete.")
-        self.bot.discovery_complete.set()
+        The cache is filled by member chunking (members intent); REST
+        fetch_members is only used if the guild cannot be chunked.
+        """
+        if not guild.chunked:
+            try:
+                await guild.chunk(cache=True)
+            except Exception as e:
+                logger.warning(f"[Discovery] Could not chunk {guild.name}: {e}")
+        if guild.chunked:
+            return list(guild.members)
+        logger.warning(f"[Discovery] Member cache incomplete for {guild.name}; falling back to REST fetch_members.")
+        return [member async for member in guild.fetch_members(limit=None)]
 
     async def _sweep_messages(self):
-        """Asynchronously sweep recent messages to populate the database without blocking."""
-        logger.info("[Discovery] Starting background message sweep...")
-        for guild in self.bot.guilds:
-            for channel in guild.text_channels:
+        """Mirror history newer than each channel's checkpoint, several channels at a time."""
+        checkpoints = await db.get_sweep_checkpoints()
+        channels = [channel for guild in self.bot.guilds for channel in guild.text_channels]
+        slots = asyncio.Semaphore(SWEEP_CONCURRENCY)
+        progress = {"channels": 0, "messages": 0}
+        start = time.perf_counter()
+        logger.info(f"[Discovery] Starting background message sweep of {len(channels)} channel(s)...")
+
+        async def _sweep(channel):
+            async with slots:
                 try:
-                    async for message in channel.history(limit=50):
-                        await db.upsert_message(
-                            message.id,
-                            message.channel.id,
-                            message.author.id,
-                            message.content,
-                            message.created_at
-                        )
+                    progress["messages"] += await self._sweep_channel(channel, checkpoints.get(channel.id))
                 except discord.Forbidden:
                     logger.debug(f"[Discovery] Missing read permissions for #{channel.name}")
                 except Exception as e:
                     logger.error(f"[ERR-DSC-001] [Discovery] Error sweeping #{channel.name}: {e}")
-        logger.info("[Discovery] Background message sweep complete.")
+            progress["channels"] += 1
+            if progress["channels"] % 25 == 0:
+                logger.info(
+                    f"[Discovery] Sweep progress: {progress['channels']}/{len(channels)} channels, "
+                    f"{progress['messages']} message(s)."
+                )
+
+        await asyncio.gather(*(_sweep(channel) for channel in channels))
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"[Discovery] Message sweep complete: {progress['messages']} new message(s) from "
+            f"{len(channels)} channel(s) in {elapsed:.1f}s ({progress['messages'] / max(elapsed, 1e-6):.0f} msg/s)."
+        )
+        discovery_phases(self.bot).history.set()
+
+    async def _sweep_channel(self, channel, checkpoint):
+        """Mirror *channel* messages after *checkpoint*, oldest first. Returns how many were read."""
+        if checkpoint:
+            history = channel.history(limit=None, after=discord.Object(id=checkpoint), oldest_first=True)
+        else:
+            # First visit: only the most recent SWEEP_BACKFILL messages, replayed
+            # oldest first so the checkpoint only ever moves forward over them.
+            recent = [message async for message in channel.history(limit=SWEEP_BACKFILL)]
+            history = _replay(reversed(recent))
+        high, count = checkpoint or 0, 0
+        async for message in history:
+            # live=False: sweep rows are only refused when the buffer is full,
+            # and then the sweep stops short instead of checkpointing past them.
+            if not self.mirror.add_message(message, live=False):
+                logger.warning(f"[Discovery] Mirror buffer full; sweep of #{channel.name} resumes next run.")
+                break
+            high = max(high, message.id)
+            count += 1
+            if count % SWEEP_BATCH == 0 and not await self._advance_checkpoint(channel.id, high):
+                return count
+        if count:
+            await self._advance_checkpoint(channel.id, high)
+        return count
+
+    async def _advance_checkpoint(self, channel_id, message_id) -> bool:
+        """Flush, then move the checkpoint — only if the flush succeeded."""
+        # The checkpoint must never get ahead of the mirror.
+        if await self.mirror.flush() is None:
+            logger.warning(f"[Discovery] Mirror flush failed; checkpoint of channel {channel_id} not advanced.")
+            return False
+        await db.set_sweep_checkpoint(channel_id, message_id)
+        return True
 
     async def _message_cleanup_engine(self):
-        """Runs once daily to prune the messages table, keeping the 5000 most recent entries."""
+        """Apply message (and change-log) retention once a day, at RETENTION_HOUR (IST)."""
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
-            await asyncio.sleep(86400)  # 24 hours
+            await asyncio.sleep(seconds_until(RETENTION_HOUR, now_ist()))
             try:
-                await db.cleanup_old_messages(keep=5000)
+                await run_retention()
+                await db.prune_discovery_changes()
             except Exception as e:
                 logger.error(f"[ERR-DSC-002] [Discovery] Message cleanup error: {e}")
 
@@ -97,22 +296,22 @@ class DiscoveryCog(commands.Cog):
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
         if isinstance(channel, discord.CategoryChannel):
-            await db.upsert_category(channel.id, channel.name)
+            await db.upsert_category(channel.id, channel.name, channel.guild.id)
             logger.info(f"[Discovery] Category created: {channel.name} ({channel.id})")
         else:
             category_id = getattr(channel, 'category_id', None)
-            await db.upsert_channel(channel.id, channel.name, str(channel.type), category_id)
+            await db.upsert_channel(channel.id, channel.name, str(channel.type), category_id, channel.guild.id)
             logger.info(f"[Discovery] Channel created: #{channel.name} ({channel.id})")
 
     @commands.Cog.listener()
     async def on_guild_channel_update(self, before, after):
         if isinstance(after, discord.CategoryChannel):
-            await db.upsert_category(after.id, after.name)
+            await db.upsert_category(after.id, after.name, after.guild.id)
             if before.name != after.name:
                 logger.info(f"[Discovery] Category renamed: {before.name} -> {after.name}")
         else:
             category_id = getattr(after, 'category_id', None)
-            await db.upsert_channel(after.id, after.name, str(after.type), category_id)
+            await db.upsert_channel(after.id, after.name, str(after.type), category_id, after.guild.id)
             if before.name != after.name:
                 logger.info(f"[Discovery] Channel renamed: #{before.name} -> #{after.name}")
 
@@ -129,12 +328,12 @@ class DiscoveryCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_guild_role_create(self, role):
-        await db.upsert_role(role.id, role.name, role.color, role.position)
+        await db.upsert_role(role.id, role.name, role.color, role.position, role.guild.id)
         logger.info(f"[Discovery] Role created: @{role.name} ({role.id})")
 
     @commands.Cog.listener()
     async def on_guild_role_update(self, before, after):
-        await db.upsert_role(after.id, after.name, after.color, after.position)
+        await db.upsert_role(after.id, after.name, after.color, after.position, after.guild.id)
         if before.name != after.name:
             logger.info(f"[Discovery] Role renamed: @{before.name} -> @{after.name}")
 
@@ -161,8 +360,12 @@ class DiscoveryCog(commands.Cog):
             await db.upsert_member(after.id, after.name, after.display_name, after.joined_at, roles=role_names)
 
         if roles_changed:
-            added   = [r.name for r in after.roles  if r not in before.roles]
-            removed = [r.name for r in before.roles if r not in after.roles]
+            added   = [r for r in after.roles  if r not in before.roles and not r.is_default()]
+            removed = [r for r in before.roles if r not in after.roles and not r.is_default()]
+            # Only the diff touches member_roles; the rest of the set is untouched.
+            await db.update_member_roles(after.id, [r.id for r in added], [r.id for r in removed])
+            added   = [r.name for r in added]
+            removed = [r.name for r in removed]
             if added:
                 logger.info(f"[Discovery] {after.display_name} gained roles: {', '.join(added)}")
             if removed:
@@ -182,19 +385,14 @@ class DiscoveryCog(commands.Cog):
     async def on_message(self, message):
         if message.guild is None:
             return
-        await db.upsert_message(
-            message.id,
-            message.channel.id,
-            message.author.id,
-            message.content,
-            message.created_at
-        )
+        self.mirror.add_message(message)
 
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload):
         if payload.guild_id is None:
             return
-        
+        db_priority.set(BULK)
+
         try:
             channel = self.bot.get_channel(payload.channel_id)
             if not channel:
@@ -207,13 +405,7 @@ class DiscoveryCog(commands.Cog):
                 # Often it's safer to fetch the message
                 try:
                     msg = await channel.fetch_message(payload.message_id)
-                    await db.upsert_message(
-                        msg.id,
-                        msg.channel.id,
-                        msg.author.id,
-                        msg.content,
-                        msg.created_at
-                    )
+                    self.mirror.add_message(msg)
                 except discord.NotFound:
                     pass
         except Exception as e:
@@ -242,5 +434,67 @@ class DiscoveryCog(commands.Cog):
         await db.delete_scheduled_event(event.id)
         logger.info(f"[Discovery] Scheduled Event deleted: {event.name}")
 
+    # ─── Message Search ───────────────────────────────────────────────────────
+
+    @commands.command(name="search")
+    @commands.guild_only()
+    async def search(self, ctx, *, query: str):
+        """Search mirrored messages: !search [#channel] [@member] <words, "phrase", -exclude>."""
+        db_priority.set(INTERACTIVE)
+        channel_id, author_id, query = _split_search_filters(query)
+        if not query:
+            await ctx.send('Usage: `!search [#channel] [@member] <words, "phrase", -exclude>`')
+            return
+        # Only channels whose history the caller can read in Discord.
+        readable = [
+            c.id for c in ctx.guild.text_channels
+            if c.permissions_for(ctx.author).read_message_history
+        ]
+        if channel_id is not None:
+            if channel_id not in readable:
+                await ctx.send("You can't read that channel's history.")
+                return
+            readable = channel_id
+        filters = {"channel_id": readable, "author_id": author_id}
+
+        view = SearchView(ctx.author.id, ctx.guild, query, filters, [])
+        try:
+            view.rows = await view.fetch(0)
+        except Exception as e:
+            logger.error(f"[ERR-DSC-007] [Discovery] Message search failed: {e}")
+            await ctx.send("Search failed; try again shortly.")
+            return
+        if not view.rows:
+            await ctx.send(f"No messages match `{query[:200]}`.")
+            return
+        view._sync_buttons()
+        await ctx.send(embed=view.embed(), view=view)
+
+    # ─── Diagnostics ──────────────────────────────────────────────────────────
+
+    @commands.command(name="dbstats")
+    @commands.has_permissions(administrator=True)
+    async def dbstats(self, ctx, limit: int = 10):
+        """Show DB queue/pool gauges and the slowest operations by p95 execution time."""
+        q, pool = queue_stats(), pool_stats()
+        ops = sorted(db_metrics.snapshot().items(), key=lambda kv: kv[1]["exec_p95"], reverse=True)
+
+        lines = [
+            f"queue {q['depth']} (parked {q['parked']}, running {q['inflight']})  "
+            f"buffered {q['buffered']}  dropped {q['dropped']}",
+            f"pool  {pool['in_use']}/{pool['max']} in use, {pool['idle']} idle, {pool['waiting']} waiting",
+            "",
+            f"{'operation':<32} {'calls':>6} {'q95':>6} {'co95':>6} {'p50':>6} {'p95':>6} {'max':>7} {'rows':>5}",
+        ]
+        for op, m in ops[:max(1, min(limit, 25))]:
+            lines.append(
+                f"{op[-32:]:<32} {m['calls']:>6} {m['queue_p95']:>6.1f} {m['checkout_p95']:>6.1f} "
+                f"{m['exec_p50']:>6.1f} {m['exec_p95']:>6.1f} {m['exec_max']:>7.1f} {m['rows_avg']:>5.0f}"
+            )
+        if not ops:
+            lines.append("(no DB calls recorded yet)")
+        await ctx.send("```\n" + "\n".join(lines)[:1900] + "\n```  *times in ms*")
+
+
 async def setup(bot):
     await bot.add_cog(DiscoveryCog(bot))
@@ -17,7 +17,10 @@ from openpyxl.styles import Alignment, Font
 from openpyxl.worksheet.table import Table, TableStyleInfo
 
 from Bots.utils.timezone import IST
+from Bots.utils.readiness import discovery_phases
 from Bots.db_managers import leave_db_manager as db
+from Bots.db_managers import discovery_db_manager as discovery
+from Bots.db_managers.discovery_events import CHANNEL, ROLE
 
 import cogs.leave_config as cfg
 from cogs.leave_config import resolve_leave_config
@@ -35,29 +38,36 @@ class LeaveCog(commands.Cog, name="Leave"):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._employee_sync = None
+        self._unsubscribe = None
+        self._schema_ready = None
 
     async def cog_load(self):
         """Start the DB worker and initialize."""
-        self.bot.loop.create_task(db.db_worker())
-        await db.initialize_leave_db()
-        # Ensure the discovery event exists on the bot
-        if not hasattr(self.bot, 'discovery_complete'):
-            self.bot.discovery_complete = asyncio.Event()
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        # Wait for DiscoveryCog to finish its initial sweep
-        logger.info("[Leave] Waiting for DiscoveryCog to complete initial sweep...")
-        await self.bot.discovery_complete.wait()
-        await resolve_leave_config()
-
+        db.start_db_worker()
+        # Migrate in the background so a slow DB doesn't hold up login;
+        # on_ready waits for it once config is resolved.
+        self._schema_ready = asyncio.create_task(db.initialize_leave_db())
+        # Ensure the discovery readiness events exist on the bot
+        discovery_phases(self.bot)
+        # Follow channel/role renames and recreations without a restart
+        self._unsubscribe = discovery.bus.subscribe(cfg.on_discovery_change, kinds={CHANNEL, ROLE})
+
+    async def cog_unload(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+        if self._employee_sync:
+            self._employee_sync.cancel()
+
+    async def _sync_employees(self):
+        """Register every employee once discovery has the member list."""
+        await discovery_phases(self.bot).members.wait()
         guild = self.bot.guilds[0] if self.bot.guilds else None
         if not guild:
             logger.warning("[ERR-LV-036] [Leave] No guilds found. Skipping member sync.")
             return
 
         emp_role = guild.get_role(cfg.EMP_ROLE_ID)
-        await db.create_dynamic_table()
 
         if emp_role:
             for member in emp_role.members:
@@ -65,6 +75,18 @@ class LeaveCog(commands.Cog, name="Leave"):
         else:
             logger.warning(f"[ERR-LV-037] [Leave] Employee role (ID: {cfg.EMP_ROLE_ID}) not found in server. Skipping bulk member sync.")
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Config and buttons need only the structure phase; the employee
+        # sync waits for members in the background.
+        logger.info("[Leave] Waiting for DiscoveryCog structure phase...")
+        await discovery_phases(self.bot).structure.wait()
+        await resolve_leave_config()
+        await self._schema_ready
+        self._employee_sync = asyncio.create_task(self._sync_employees())
+        if not self.bot.guilds:
+            return
+
         # Create base styled embed for Leave app logic
         leave_embed = discord.Embed(
             title="🌴 Leave Management System",
@@ -128,3 +128,28 @@ async def resolve_leave_config():
             logger.warning(f"[ERR-LV-005] [Leave Config] Role '{role_name}' not found in discovery.db — using fallback ID for '{key}'")
 
     logger.info("[Leave Config] Configuration resolved from discovery.db.")
+
+
+# ─── Live refresh ─────────────────────────────────────────────────────────────
+# Subscribed to the discovery event bus by LeaveCog: a channel or role change
+# touching a configured name or id re-runs resolve_leave_config().
+
+_WATCHED_NAMES = {
+    'leave-application', 'emp',
+    *_APPROVAL_CHANNEL_NAMES.values(),
+    *_DEPARTMENT_ROLE_NAMES.values(),
+    *_DIRECT_SECOND_APPROVAL_ROLE_NAMES.values(),
+}
+
+
+def _watched_ids() -> set:
+    return {
+        SUBMIT_CHANNEL_ID, EMP_ROLE_ID,
+        *APPROVAL_CHANNELS.values(), *DEPARTMENT_ROLES.values(), *DIRECT_SECOND_APPROVAL_ROLES.values(),
+    }
+
+
+async def on_discovery_change(change):
+    if {change.name, change.old_name} & _WATCHED_NAMES or change.entity_id in _watched_ids():
+        logger.info(f"[Leave Config] {change.kind} {change.entity_id} {change.action}; re-resolving.")
+        await resolve_leave_config()
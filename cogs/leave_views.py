@@ -18,6 +18,7 @@ from discord.ui import Button, View, Modal, TextInput
 
 from Bots.db_managers import leave_db_manager as db
 from Bots.db_managers import discovery_db_manager as discovery
+from Bots.utils.interactive import InteractiveView, InteractiveModal
 from Bots.utils.timezone import parse_date_flexible, parse_time_flexible
 
 import cogs.leave_config as cfg
@@ -110,7 +111,7 @@ async def _send_ephemeral(interaction: discord.Interaction, content: str, delay:
 
 # ─── Application entry view ───────────────────────────────────────────────────
 
-class LeaveApplicationView(View):
+class LeaveApplicationView(InteractiveView):
     def __init__(self):
         super().__init__(timeout=None)
 
@@ -147,7 +148,7 @@ class LeaveApplicationView(View):
 
 # ─── Generic reason modal ─────────────────────────────────────────────────────
 
-class ReasonModal(discord.ui.Modal):
+class ReasonModal(InteractiveModal):
     def __init__(self, title: str, label_text: str, callback_func):
         super().__init__(title=title)
         self.callback_func = callback_func
@@ -166,7 +167,7 @@ class ReasonModal(discord.ui.Modal):
 
 # ─── DM action view (applicant) ───────────────────────────────────────────────
 
-class DMLeaveActionView(discord.ui.View):
+class DMLeaveActionView(InteractiveView):
     def __init__(self, leave_id: int, stage: str, bot_ref=None):
         super().__init__(timeout=None)
         self.leave_id = leave_id
@@ -196,9 +197,9 @@ class DMLeaveActionView(discord.ui.View):
             if result:
                 leave_reason = result['leave_reason']
                 number_of_days_off = result['number_of_days_off']
-                await db.withdraw_leave(nickname, leave_id, cancelled_by=nickname, cancellation_reason=reason)
                 # Do not modify balance because it was only pending
-                await db.update_last_leave_date_after_withdrawal(nickname, modal_interaction.user.id)
+                await db.withdraw_and_refund(nickname, leave_id, modal_interaction.user.id,
+                                             cancelled_by=nickname, cancellation_reason=reason)
 
                 await modal_interaction.response.send_message(f"Leave {leave_id} cancelled successfully.", ephemeral=True, delete_after=10)
                 for item in self.children:
@@ -252,7 +253,8 @@ class DMLeaveActionView(discord.ui.View):
                 logger.info(f"[Leave] User: {nickname} (ID: {modal_interaction.user.id})")
 
                 # Update DB status
-                await db.request_withdraw_leave(nickname, leave_id, requested_by=nickname, reason=reason)
+                await db.request_withdraw_leave(nickname, leave_id, requested_by=nickname, reason=reason,
+                                               user_id=modal_interaction.user.id)
                 logger.info(f"[Leave] DB updated to 'Withdrawal Requested' for ID {leave_id}")
 
                 # Update local message
@@ -342,7 +344,7 @@ class DMLeaveActionView(discord.ui.View):
 
 # ─── HR cancellation request view ────────────────────────────────────────────
 
-class CancellationRequestView(View):
+class CancellationRequestView(InteractiveView):
     """Shown in the HR channel when a user requests cancellation of an HR-approved leave."""
     def __init__(self, user_id, leave_id, nickname, footer_text, bot_ref=None):
         super().__init__(timeout=None)
@@ -375,9 +377,8 @@ class CancellationRequestView(View):
                 existing_cancelled_by = leave_row.get('cancelled_by')
                 existing_reason = leave_row.get('cancellation_reason')
 
-                await db.withdraw_leave(self.nickname, self.leave_id, cancelled_by=existing_cancelled_by, cancellation_reason=existing_reason)
-                await db.refund_leave_balance(self.user_id, leave_reason.lower(), days_off)
-                await db.update_last_leave_date_after_withdrawal(self.nickname, self.user_id)
+                await db.withdraw_and_refund(self.nickname, self.leave_id, self.user_id, leave_reason, days_off,
+                                             cancelled_by=existing_cancelled_by, cancellation_reason=existing_reason)
 
             # Update the original HR approval message to show Cancelled status
             try:
@@ -431,7 +432,7 @@ class CancellationRequestView(View):
         await interaction.response.defer(ephemeral=True)
         bot = self._bot or interaction.client
         try:
-            await db.revert_cancellation_request(self.nickname, self.leave_id)
+            await db.revert_cancellation_request(self.nickname, self.leave_id, user_id=self.user_id)
 
             # Notify user via DM — leave remains active
             await update_persistent_dm(
@@ -454,7 +455,7 @@ class CancellationRequestView(View):
 
 # ─── Post-approval actions view (applicant) ───────────────────────────────────
 
-class ApprovedActionsView(View):
+class ApprovedActionsView(InteractiveView):
     def __init__(self, user_id, leave_details, nickname, bot_ref=None):
         super().__init__(timeout=None)
         self.user_id = user_id
@@ -471,10 +472,8 @@ class ApprovedActionsView(View):
                 leave_reason = result['leave_reason']
                 number_of_days_off = result['number_of_days_off']
                 hr_nickname = modal_interaction.user.display_name
-                await db.withdraw_leave(self.nickname, leave_id, cancelled_by=f"HR ({hr_nickname})", cancellation_reason=reason)
-                if leave_reason:
-                    await db.refund_leave_balance(self.user_id, leave_reason.lower(), number_of_days_off)
-                await db.update_last_leave_date_after_withdrawal(self.nickname, self.user_id)
+                await db.withdraw_and_refund(self.nickname, leave_id, self.user_id, leave_reason, number_of_days_off,
+                                             cancelled_by=f"HR ({hr_nickname})", cancellation_reason=reason)
                 await modal_interaction.response.send_message(f"Leave {leave_id} withdrawn.", ephemeral=True, delete_after=10)
                 for item in self.children:
                     item.disabled = True
@@ -505,7 +504,7 @@ class ApprovedActionsView(View):
 
 # ─── HOD / HR approval view ───────────────────────────────────────────────────
 
-class LeaveApprovalView(View):
+class LeaveApprovalView(InteractiveView):
     def __init__(self, user_id, leave_details, current_stage, nickname, bot_ref=None):
         super().__init__(timeout=None)
         self.user_id = user_id
@@ -528,7 +527,7 @@ class LeaveApprovalView(View):
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Validate interaction. Dispatching is handled by item callbacks, not here."""
-        return True
+        return await super().interaction_check(interaction)
 
     async def _ensure_buttons_attached(self, interaction: discord.Interaction):
         # Empty children and rebuild based on state
@@ -567,7 +566,7 @@ class LeaveApprovalView(View):
         bot = self._bot or interaction.client
 
         # Confirm withdrawal in DB
-        await db.confirm_withdraw_leave(self.nickname, leave_id)
+        await db.confirm_withdraw_leave(self.nickname, leave_id, user_id=self.user_id)
 
         # Re-fetch exact leave so we can decrement balance
         try:
@@ -607,7 +606,8 @@ class LeaveApprovalView(View):
             await interaction.response.defer(ephemeral=True)
             if approved:
                 self.leave_details['approved_by'] = interaction.user.display_name
-                await db.update_approval(self.nickname, self.leave_details['leave_id'], interaction.user.display_name)
+                await db.update_approval(self.nickname, self.leave_details['leave_id'], interaction.user.display_name,
+                                         user_id=self.user_id)
                 embed = create_leave_embed(self.leave_details, self.user_id, self.nickname, self.current_stage)
                 if 'Approved By' not in [f.name for f in embed.fields]:
                     embed.add_field(name="Approved By", value=interaction.user.display_name, inline=False)
@@ -654,7 +654,7 @@ class LeaveApprovalView(View):
                     new_footer = f"Stage: second | User ID: {self.user_id} | Nickname: {self.nickname} | Channel ID: {second_ch_id} | Message ID: {msg.id}{dm_id_part}"
                     embed.set_footer(text=new_footer)
                     await msg.edit(embed=embed)
-                    await db.update_footer_text(self.nickname, self.leave_details['leave_id'], new_footer)
+                    await db.update_footer_text(self.nickname, self.leave_details['leave_id'], new_footer, user_id=self.user_id)
                     await interaction.message.edit(
                         content="Leave Approved",
                         view=View().add_item(Button(label="Approved", style=discord.ButtonStyle.success, disabled=True)),
@@ -663,13 +663,6 @@ class LeaveApprovalView(View):
                     await update_persistent_dm(bot, self.user_id, self.leave_details, 'second', new_footer, status_msg="Recommended by HOD, pending HR approval.")
 
                 elif self.current_stage == 'second':
-                    # HR is the final approver — mark leave as fully approved
-                    await db.confirm_leave_acceptance(
-                        self.nickname, self.leave_details['leave_id'],
-                        self.leave_details.get('leave_reason', 'N/A').lower(),
-                        self.leave_details.get('number_of_days_off', 0.0),
-                        self.leave_details.get('date_to', self.leave_details.get('date_from', 'N/A')), self.user_id,
-                    )
                     # Carry forward the DM ID from the existing footer
                     existing_footer = interaction.message.embeds[0].footer.text if interaction.message.embeds else ""
                     dm_id_part = ""
@@ -677,7 +670,14 @@ class LeaveApprovalView(View):
                         dm_id_part = " | DM ID: " + existing_footer.split("DM ID: ")[1].split(" | ")[0].strip()
                     new_footer = f"Stage: final | User ID: {self.user_id} | Nickname: {self.nickname} | Message ID: {interaction.message.id}{dm_id_part}"
                     embed.set_footer(text=new_footer)
-                    await db.update_footer_text(self.nickname, self.leave_details['leave_id'], new_footer)
+                    # HR is the final approver — mark leave as fully approved
+                    await db.accept_leave(
+                        self.nickname, self.leave_details['leave_id'],
+                        self.leave_details.get('leave_reason', 'N/A').lower(),
+                        self.leave_details.get('number_of_days_off', 0.0),
+                        self.leave_details.get('date_to', self.leave_details.get('date_from', 'N/A')), self.user_id,
+                        new_footer,
+                    )
 
                     await interaction.message.edit(
                         content="Leave Fully Approved by HR",
@@ -700,7 +700,7 @@ class LeaveApprovalView(View):
 
 # ─── Approval / decline modals ────────────────────────────────────────────────
 
-class ApproveWithNotesModal(Modal):
+class ApproveWithNotesModal(InteractiveModal):
     def __init__(self, view_ref, interaction_ref, approved_by_name):
         super().__init__(title="Approve Leave Application")
         self._view = view_ref
@@ -715,7 +715,7 @@ class ApproveWithNotesModal(Modal):
         await self._view.handle_approval(interaction, True)
 
 
-class DeclineReasonModal(Modal):
+class DeclineReasonModal(InteractiveModal):
     def __init__(self, user_id, leave_details, current_stage, nickname, bot_ref=None):
         super().__init__(title="Reason for Decline")
         self.user_id = user_id
@@ -775,7 +775,7 @@ class DeclineReasonModal(Modal):
 
 # ─── Application modals ───────────────────────────────────────────────────────
 
-class WithdrawLeaveModal(Modal):
+class WithdrawLeaveModal(InteractiveModal):
     def __init__(self):
         super().__init__(title="Withdraw Leave Application")
         self.add_item(discord.ui.TextInput(label="Leave ID", style=discord.TextStyle.short, max_length=10, placeholder="Enter Leave ID"))
@@ -794,9 +794,8 @@ class WithdrawLeaveModal(Modal):
                 dynamic_result = await db.check_leave_owner(nickname)
                 if dynamic_result and dynamic_result['user_id'] != user_id:
                     await interaction.response.send_message("You can only withdraw your own leave applications.", ephemeral=True, delete_after=10)
-                await db.withdraw_leave(nickname, leave_id, cancelled_by=nickname, cancellation_reason=reason)
-                await db.refund_leave_balance(user_id, leave_reason.lower(), number_of_days_off)
-                await db.update_last_leave_date_after_withdrawal(nickname, user_id)
+                await db.withdraw_and_refund(nickname, leave_id, user_id, leave_reason, number_of_days_off,
+                                             cancelled_by=nickname, cancellation_reason=reason)
                 await interaction.response.send_message(f"Leave {leave_id} has been withdrawn.\nReason: {reason}", ephemeral=True, delete_after=10)
             else:
                 await interaction.response.send_message(f"Leave {leave_id} not found or not accepted.", ephemeral=True, delete_after=10)
@@ -806,7 +805,7 @@ class WithdrawLeaveModal(Modal):
             await interaction.response.send_message(f"An error occurred: {e}", ephemeral=True, delete_after=10)
 
 
-class FullDayLeaveModal(Modal):
+class FullDayLeaveModal(InteractiveModal):
     def __init__(self):
         super().__init__(title="FULL DAY LEAVE APPLICATION")
         self.add_item(TextInput(label="LEAVE REASON", style=discord.TextStyle.short, max_length=10, placeholder="CASUAL / SICK / C. OFF"))
@@ -878,7 +877,7 @@ class FullDayLeaveModal(Modal):
                 await _send_ephemeral(interaction, f"Call [ERR-LV-028] AN ERROR OCCURRED: {e}")
 
 
-class HalfDayLeaveModal(Modal):
+class HalfDayLeaveModal(InteractiveModal):
     def __init__(self):
         super().__init__(title="HALF DAY LEAVE APPLICATION")
         self.add_item(TextInput(label="LEAVE REASON", style=discord.TextStyle.short, max_length=10, placeholder="CASUAL / SICK / C. OFF"))
@@ -924,7 +923,7 @@ class HalfDayLeaveModal(Modal):
                 await _send_ephemeral(interaction, f"Call [ERR-LV-029] AN ERROR OCCURRED: {e}")
 
 
-class OffDutyLeaveModal(Modal):
+class OffDutyLeaveModal(InteractiveModal):
     def __init__(self):
         super().__init__(title="OFF DUTY APPLICATION")
         self.add_item(TextInput(label="LEAVE REASON", style=discord.TextStyle.short, max_length=10, placeholder="CASUAL / SICK / C. OFF"))
@@ -1027,7 +1026,8 @@ async def send_leave_application_to_approval_channel(interaction, leave_details,
     footer_text = f"Stage: {current_stage} | User ID: {interaction.user.id} | Nickname: {interaction.user.display_name} | Channel ID: {approval_ch_id} | Message ID: {message.id}"
     embed.set_footer(text=footer_text)
     await message.edit(embed=embed)
-    await db.update_footer_text(interaction.user.display_name, leave_details['leave_id'], footer_text)
+    await db.update_footer_text(interaction.user.display_name, leave_details['leave_id'], footer_text,
+                                user_id=interaction.user.id)
 
     # Send DM to the user with Leave ID and Date
     dm_msg_id = None
@@ -1053,7 +1053,8 @@ async def send_leave_application_to_approval_channel(interaction, leave_details,
         footer_text += f" | DM ID: {dm_msg_id}"
         embed.set_footer(text=footer_text)
         await message.edit(embed=embed)
-        await db.update_footer_text(interaction.user.display_name, leave_details['leave_id'], footer_text)
+        await db.update_footer_text(interaction.user.display_name, leave_details['leave_id'], footer_text,
+                                    user_id=interaction.user.id)
 
 
 async def update_persistent_dm(bot, user_id, leave_details, next_stage, footer_text, status_msg=None, color=None):
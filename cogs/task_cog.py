@@ -17,18 +17,23 @@ logger = logging.getLogger("Concord")
 
 # IST Timezone — single source of truth
 from Bots.utils.timezone import IST, now_ist, parse_datetime_flexible
+from Bots.utils.readiness import discovery_phases
+from Bots.utils.interactive import InteractiveView, InteractiveModal
+from Bots.db_managers.discovery_events import CATEGORY, CHANNEL, ROLE
 
 from Bots.db_managers import discovery_db_manager as discovery
+from Bots.db_managers.base_db import db_priority, INTERACTIVE, BULK
 from Bots.db_managers.task_db_manager import (
     store_task_in_database,
     retrieve_task_from_database,
     update_task_in_database,
-    retrieve_all_tasks_from_database,
-    retrieve_active_tasks_from_database,
-    retrieve_tasks_for_sync,
+    iter_active_tasks,
+    iter_finalized_tasks,
+    retrieve_assignee_tasks_for_sync,
+    retrieve_assigner_tasks_for_sync,
     cleanup_stale_drafts,
     delete_task_from_database,
-    mark_task_completed,
+    finalize_task,
     retrieve_task_by_id,
     store_task_draft,
     retrieve_task_draft,
@@ -123,6 +128,19 @@ async def resolve_task_config():
     logger.info("[Task Config] Configuration successfully resolved from discovery.db.")
 
 
+# Names resolve_task_config() looks up; a discovery change touching one of
+# them (or a resolved id) re-runs it — see TaskCog.cog_load().
+_CONFIG_NAMES = {'task-commands', 'Task Vault', 'Task Dashboard', 'Pending tasks', 'emp', *DEPARTMENTS}
+
+
+async def on_discovery_change(change):
+    resolved_ids = {COMMAND_CHANNEL_ID, ACTIVE_TASKS_ID, DASHBOARD_CATEGORY_ID, PENDING_CATEGORY_ID,
+                    EMP_ROLE_ID, *DEPARTMENTS.values()}
+    if {change.name, change.old_name} & _CONFIG_NAMES or change.entity_id in resolved_ids:
+        logger.info(f"[Task Config] {change.kind} {change.entity_id} {change.action}; re-resolving.")
+        await resolve_task_config()
+
+
 # ── Module-level helpers ──────────────────────────────────────────────────────
 
 def format_deadline(date_str: str) -> str:
@@ -135,7 +153,7 @@ def format_deadline(date_str: str) -> str:
 
 # ── Top-level modals ──────────────────────────────────────────────────────────
 
-class AssigneeDeadlineModal(ui.Modal, title="Set Task Deadline"):
+class AssigneeDeadlineModal(InteractiveModal, title="Set Task Deadline"):
     """Modal for assignee to enter deadline when acknowledging (Normal/Low priority)."""
 
     deadline_date = ui.TextInput(
@@ -239,10 +257,14 @@ class TaskCog(commands.Cog, name="Tasks"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._bg_tasks: list[asyncio.Task] = []
+        self._schema_ready: asyncio.Task | None = None
+        self._unsubscribe = None
 
     async def cog_unload(self):
         for task in self._bg_tasks:
             task.cancel()
+        if self._unsubscribe:
+            self._unsubscribe()
 
     # -------------------------------------------------------------------------
     # Ephemeral helper
@@ -274,11 +296,14 @@ class TaskCog(commands.Cog, name="Tasks"):
 
     async def cog_load(self):
         from Bots.db_managers import task_db_manager as db
-        self._bg_tasks.append(asyncio.create_task(db.db_worker()))
-        await db.initialize_task_db()
-        # Ensure discovery event exists
-        if not hasattr(self.bot, 'discovery_complete'):
-            self.bot.discovery_complete = asyncio.Event()
+        db.start_db_worker()
+        # Migrate in the background so a slow DB doesn't hold up login;
+        # on_ready waits for it once config is resolved.
+        self._schema_ready = asyncio.create_task(db.initialize_task_db())
+        # Ensure the discovery readiness events exist
+        discovery_phases(self.bot)
+        # Follow channel/category/role renames and recreations without a restart
+        self._unsubscribe = discovery.bus.subscribe(on_discovery_change, kinds={CATEGORY, CHANNEL, ROLE})
 
     def is_active_window(self) -> bool:
         """Checks if the current time is within the active notification window (9AM-6PM IST, Mon-Fri)."""
@@ -314,20 +339,20 @@ class TaskCog(commands.Cog, name="Tasks"):
                     conn.commit()
                 finally:
                     put_conn(conn)
-            await db_execute(_queue)
+            await db_execute(_queue, key=("notification_recipient", recipient_id))
             logger.info(f"[Task Queue] Queued notification for task {task_id} to user {recipient_id}")
 
     # Start engines handled in on_ready
 
     async def task_archive_cleanup_engine(self):
         """Background task to archive and delete finalized tasks after 24 hours."""
+        db_priority.set(BULK)
         while True:
             try:
                 # Run every hour
                 await asyncio.sleep(3600)
                 
-                tasks = await retrieve_all_tasks_from_database()
-                for task in tasks:
+                async for task in iter_finalized_tasks():
                     if str(task.get('channel_id', '0')) in ('0', ''):
                         continue  # skip stale draft rows with no real channel
                     if task.get('global_state') == 'Finalized' and task.get('completed_at'):
@@ -355,7 +380,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                                 else:
                                     await temp_channel.delete()
                             
-                            await delete_task_from_database(int(task["channel_id"]))
+                            await delete_task_from_database(int(task["channel_id"]), task_id=task.get("task_id"))
                             
             except Exception as e:
                 logger.error(f"[ERR-TSK-003] [Task Cleanup] Engine error: {e}")
@@ -366,9 +391,11 @@ class TaskCog(commands.Cog, name="Tasks"):
 
     @commands.Cog.listener()
     async def on_ready(self):
-        await self.bot.discovery_complete.wait()
+        # Config resolution needs channels and roles only, not the member sweep.
+        await discovery_phases(self.bot).structure.wait()
         await resolve_task_config()
-        
+        await self._schema_ready
+
         # Start background engines — store handles so cog_unload can cancel them
         self._bg_tasks.append(asyncio.create_task(self.check_and_remove_invalid_tasks()))
         self._bg_tasks.append(asyncio.create_task(self.task_reminder_engine()))
@@ -394,7 +421,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                 logger.info("[Task] Command buttons already exist in the command channel.")
                 return
 
-        view = ui.View(timeout=None)
+        view = InteractiveView(timeout=None)
         view.add_item(ui.Button(label="Assign Task", style=discord.ButtonStyle.green, custom_id="assign_task_button"))
         view.add_item(ui.Button(label="View Tasks", style=discord.ButtonStyle.primary, custom_id="view_tasks_button"))
 
@@ -416,6 +443,9 @@ class TaskCog(commands.Cog, name="Tasks"):
         if not custom_id:
             return
 
+        # Button/modal handlers race Discord's 3s deadline: jump the DB queue.
+        db_priority.set(INTERACTIVE)
+
         if custom_id == "assign_task_button":
             return await self.handle_assign_task(interaction)
         elif custom_id == "view_tasks_button":
@@ -546,7 +576,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                     self_select.view.selected_assignees = self_select.values  # type: ignore
                     await select_interaction.response.send_modal(TaskDetailsModal(self_select.values, interaction))
 
-            class TaskDetailsModal(ui.Modal, title="Task Details"):
+            class TaskDetailsModal(InteractiveModal, title="Task Details"):
                 def __init__(self_modal, assignees, original_interaction):
                     super().__init__()
                     self_modal.assignees = assignees
@@ -626,7 +656,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                     await self.process_task_assignment(modal_interaction, task_data, assigner_deadline=assigner_deadline)
 
             # Create view with assignee select
-            view = ui.View(timeout=None)
+            view = InteractiveView(timeout=None)
             view.selected_assignees = None  # type: ignore
             view.add_item(AssigneeSelect())
             
@@ -819,7 +849,7 @@ class TaskCog(commands.Cog, name="Tasks"):
     # ── Dashboard Interaction Handlers ────────────────────────────────────────
 
     async def handle_dash_mod(self, interaction: discord.Interaction, task):
-        class ModifyDeadlineModal(ui.Modal, title="Modify Deadline"):
+        class ModifyDeadlineModal(InteractiveModal, title="Modify Deadline"):
             new_deadline_date = ui.TextInput(label="New Deadline Date", style=discord.TextStyle.short, placeholder="DD/MM/YYYY  e.g. 27/03/2026", max_length=10, required=True)
             new_deadline_time = ui.TextInput(label="New Deadline Time", style=discord.TextStyle.short, placeholder="HH:MM AM/PM  e.g. 02:30 PM", max_length=8, required=True)
             async def on_submit(self_modal, modal_interaction: discord.Interaction):
@@ -861,7 +891,7 @@ class TaskCog(commands.Cog, name="Tasks"):
             else:
                 await chan.delete()
 
-        await delete_task_from_database(int(task["channel_id"]))
+        await delete_task_from_database(int(task["channel_id"]), task_id=task.get("task_id"))
         logger.info(f"[Task] Task #{task.get('task_id')} cancelled by {interaction.user.display_name}")
         await self._send_ephemeral(interaction, "Task cancelled and thread locked.")
         
@@ -893,7 +923,7 @@ class TaskCog(commands.Cog, name="Tasks"):
         if interaction.user.id not in task["assignee_ids"]:
             return await self._send_ephemeral(interaction, "Only those assigned can report blockers.")
         
-        class BlockerModal(ui.Modal, title="Report Blocker"):
+        class BlockerModal(InteractiveModal, title="Report Blocker"):
             reason = ui.TextInput(label="Reason", style=discord.TextStyle.long, placeholder="What is blocking you?", required=True)
             async def on_submit(self_modal, modal_interaction: discord.Interaction):
                 await modal_interaction.response.defer(ephemeral=True)
@@ -924,7 +954,7 @@ class TaskCog(commands.Cog, name="Tasks"):
         if interaction.user.id not in task["assignee_ids"]:
             return await self._send_ephemeral(interaction, "Only those assigned can reject this task.")
 
-        class RejectionModal(ui.Modal, title="Reject Task"):
+        class RejectionModal(InteractiveModal, title="Reject Task"):
             reason = ui.TextInput(label="Reason for Rejection", style=discord.TextStyle.long, placeholder="Why are you rejecting this task?", required=True)
             async def on_submit(self_modal, modal_interaction: discord.Interaction):
                 await modal_interaction.response.defer(ephemeral=True)
@@ -1058,7 +1088,7 @@ class TaskCog(commands.Cog, name="Tasks"):
         if interaction.user.id not in task["assignee_ids"]:
             return await self._send_ephemeral(interaction, "Only those assigned can request a new deadline.")
             
-        class ReqDeadlineModal(ui.Modal, title="Request New Deadline"):
+        class ReqDeadlineModal(InteractiveModal, title="Request New Deadline"):
             reason = ui.TextInput(label="Reason & Suggested Date", style=discord.TextStyle.long, required=True)
             async def on_submit(inner_self, modal_interaction: discord.Interaction):
                 await modal_interaction.response.defer(ephemeral=True)
@@ -1073,12 +1103,12 @@ class TaskCog(commands.Cog, name="Tasks"):
                 if chan:
                     # Construct the inline View here instead of global to easily pass contextual params if it's alive
                     # Note: Because the user wants to use these robustly, I'll pass the UI inline during req.
-                    view = ui.View(timeout=None)
+                    view = InteractiveView(timeout=None)
                     
                     approve_btn = ui.Button(label="Approve Deadline", style=discord.ButtonStyle.success, custom_id=f"approve_deadline_{task['task_id']}")
                     async def approve_cb(i: discord.Interaction):
                         if i.user.id != task["assigner_id"]: return await self_cog._send_ephemeral(i, "Only the assigner can approve.")
-                        class ModDeadlineModal(ui.Modal, title="Modify Deadline"):
+                        class ModDeadlineModal(InteractiveModal, title="Modify Deadline"):
                             new_dl_date = ui.TextInput(label="New Deadline Date", style=discord.TextStyle.short, placeholder="DD/MM/YYYY  e.g. 27/03/2026", max_length=10)
                             new_dl_time = ui.TextInput(label="New Deadline Time", style=discord.TextStyle.short, placeholder="HH:MM AM/PM  e.g. 02:30 PM", max_length=8)
                             async def on_submit(inner_self, mi: discord.Interaction):
@@ -1113,7 +1143,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                     deny_btn = ui.Button(label="Deny Deadline", style=discord.ButtonStyle.danger, custom_id=f"deny_deadline_{task['task_id']}")
                     async def deny_cb(i: discord.Interaction):
                         if i.user.id != task["assigner_id"]: return await self_cog._send_ephemeral(i, "Only the assigner can deny.")
-                        class DenyModal(ui.Modal, title="Deny Reason"):
+                        class DenyModal(InteractiveModal, title="Deny Reason"):
                             reason_deny = ui.TextInput(label="Reason", style=discord.TextStyle.long)
                             async def on_submit(inner_self, mi: discord.Interaction):
                                 await mi.response.defer()
@@ -1225,8 +1255,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                         send_messages_in_threads=False
                     )
 
-            all_tasks = await retrieve_tasks_for_sync()
-            user_tasks = [t for t in all_tasks if user_id in t.get("assignee_ids", [])]
+            user_tasks = await retrieve_assignee_tasks_for_sync(user_id)
             
             # Extract existing messages safely
             existing_msg_ids = []
@@ -1242,7 +1271,7 @@ class TaskCog(commands.Cog, name="Tasks"):
             for batch_start in range(0, len(user_tasks), BATCH_SIZE):
                 batch = user_tasks[batch_start:batch_start + BATCH_SIZE]
                 embeds = []
-                view = ui.View(timeout=None)
+                view = InteractiveView(timeout=None)
 
                 for task in batch:
                     embed = self._build_pending_embed(task, guild)
@@ -1388,9 +1417,8 @@ class TaskCog(commands.Cog, name="Tasks"):
                         send_messages_in_threads=False
                     )
 
-            all_tasks = await retrieve_tasks_for_sync()
             # Dashboard shows tasks you ASSIGNED
-            user_tasks = [t for t in all_tasks if user_id == t.get("assigner_id")]
+            user_tasks = await retrieve_assigner_tasks_for_sync(user_id)
             
             # Extract existing messages safely
             existing_msg_ids = []
@@ -1406,7 +1434,7 @@ class TaskCog(commands.Cog, name="Tasks"):
             for batch_start in range(0, len(user_tasks), BATCH_SIZE):
                 batch = user_tasks[batch_start:batch_start + BATCH_SIZE]
                 embeds = []
-                view = ui.View(timeout=None)
+                view = InteractiveView(timeout=None)
 
                 for task in batch:
                     embed = self._build_dashboard_embed(task)
@@ -1689,7 +1717,7 @@ class TaskCog(commands.Cog, name="Tasks"):
             logger.error(f"[ERR-TSK-022] [Task #{task.get('task_id', '?')}] Error updating main task message: {e}")
 
     def get_main_task_view(self, task):
-        view = ui.View(timeout=None)
+        view = InteractiveView(timeout=None)
         global_state = task.get("global_state", "Active")
         
         # ----------------------------------------------------
@@ -1719,7 +1747,7 @@ class TaskCog(commands.Cog, name="Tasks"):
 
             if current_deadline:
                 # Assigner has set a deadline — let assignee accept or propose a different one
-                class AcknowledgeDeadlineView(ui.View):
+                class AcknowledgeDeadlineView(InteractiveView):
                     def __init__(self_view):
                         super().__init__(timeout=120)
 
@@ -1759,7 +1787,7 @@ class TaskCog(commands.Cog, name="Tasks"):
 
                     @ui.button(label="📝 Propose Different Deadline", style=discord.ButtonStyle.secondary)
                     async def propose_btn(self_view, btn_i: discord.Interaction, button: ui.Button):
-                        class ProposeDeadlineModal(ui.Modal, title="Propose New Deadline"):
+                        class ProposeDeadlineModal(InteractiveModal, title="Propose New Deadline"):
                             proposed_date = ui.TextInput(
                                 label="Proposed Date",
                                 style=discord.TextStyle.short,
@@ -1809,7 +1837,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                                         pass
 
                                 if chan:
-                                    deadline_view = ui.View(timeout=None)
+                                    deadline_view = InteractiveView(timeout=None)
 
                                     accept_dl_btn = ui.Button(label="✅ Accept Proposed Deadline", style=discord.ButtonStyle.success, custom_id=f"approve_deadline_{task['task_id']}")
                                     async def accept_dl_cb(dl_i: discord.Interaction):
@@ -1948,10 +1976,9 @@ class TaskCog(commands.Cog, name="Tasks"):
                 if i.user.id != task.get("assigner_id"):
                     return await self._send_ephemeral(i, f"Only {task.get('assigner', 'the assigner')} can approve this task.")
                 await i.response.defer(ephemeral=True)
-                await mark_task_completed(int(task["task_id"]))
-
                 task["global_state"] = "Finalized"
                 task["status"] = "Finalized"
+                await finalize_task(task)
 
                 temp_channel = self.bot.get_channel(int(task["channel_id"]))
                 if temp_channel:
@@ -1968,7 +1995,7 @@ class TaskCog(commands.Cog, name="Tasks"):
             async def revise_cb(i: discord.Interaction):
                 if i.user.id != task.get("assigner_id"):
                     return await self._send_ephemeral(i, f"Only {task.get('assigner', 'the assigner')} can request a revision.")
-                class RevisionModal(ui.Modal, title="Request Revision"):
+                class RevisionModal(InteractiveModal, title="Request Revision"):
                     feedback = ui.TextInput(label="Feedback", style=discord.TextStyle.long, required=True, placeholder="What needs to be fixed?")
                     async def on_submit(inner_self, modal_interaction: discord.Interaction):
                         await modal_interaction.response.defer()
@@ -2024,7 +2051,7 @@ class TaskCog(commands.Cog, name="Tasks"):
         return view
 
     def get_assigner_control_view(self, task):
-        view = ui.View(timeout=None)
+        view = InteractiveView(timeout=None)
         self_cog = self
         
         class AddAssigneeSelect(ui.UserSelect):
@@ -2094,11 +2121,10 @@ class TaskCog(commands.Cog, name="Tasks"):
                 return
                 
             await i.response.defer()
-            await mark_task_completed(int(task["task_id"]))
-
             # Update local state for immediate UI refresh
             task["global_state"] = "Finalized"
             task["status"] = "Finalized"
+            await finalize_task(task)
 
             temp_channel = self_cog.bot.get_channel(int(task["channel_id"]))
             if temp_channel:
@@ -2112,7 +2138,7 @@ class TaskCog(commands.Cog, name="Tasks"):
         
         modify_button = ui.Button(label="Modify Deadline", style=discord.ButtonStyle.secondary, custom_id=f"modify_deadline_panel_{task['task_id']}")
         async def modify_cb(i: discord.Interaction):
-            class ModifyDeadlineModal(ui.Modal, title="Modify Deadline"):
+            class ModifyDeadlineModal(InteractiveModal, title="Modify Deadline"):
                 new_deadline_date = ui.TextInput(label="New Deadline Date", style=discord.TextStyle.short, placeholder="DD/MM/YYYY  e.g. 27/03/2026", max_length=10, required=True)
                 new_deadline_time = ui.TextInput(label="New Deadline Time", style=discord.TextStyle.short, placeholder="HH:MM AM/PM  e.g. 02:30 PM", max_length=8, required=True)
                 async def on_submit(inner_self, modal_interaction: discord.Interaction):
@@ -2168,6 +2194,7 @@ class TaskCog(commands.Cog, name="Tasks"):
 
     async def task_reminder_engine(self):
         await self.bot.wait_until_ready()
+        db_priority.set(BULK)
         
         while not self.bot.is_closed():
             try:
@@ -2184,7 +2211,7 @@ class TaskCog(commands.Cog, name="Tasks"):
                         finally:
                             put_conn(conn)
                     
-                    queued = await db_execute(_get_queue)
+                    queued = await db_execute(_get_queue, readonly=True)
                     for q in queued:
                         try:
                             user = await self.bot.fetch_user(q['recipient_id'])
@@ -2200,15 +2227,14 @@ class TaskCog(commands.Cog, name="Tasks"):
                                     conn.commit()
                                 finally:
                                     put_conn(conn)
-                            await db_execute(_mark_sent)
+                            await db_execute(_mark_sent, key=("notification", q['id']))
                         except Exception as e:
                             logger.error(f"[ERR-TSK-027] [Task Queue] Failed delivery of {q['id']}: {e}")
 
                 # 2. Main Logic Process
-                tasks = await retrieve_active_tasks_from_database()
                 now = datetime.now(IST)
 
-                for task in tasks:
+                async for task in iter_active_tasks():
                     if task.get("status") == "Blocked":
                         # Blocker Protocol: Pause assignee nags, nag assigner
                         # Implementation detail: Skip the normal flow and maybe add a special assigner nag
@@ -12,6 +12,8 @@ from datetime import datetime, timedelta, timezone
 
 # IST Timezone — single source of truth
 from Bots.utils.timezone import IST
+from Bots.db_managers.base_db import queue_stats, pool_stats
+from Bots.db_managers import db_metrics
 from dotenv import load_dotenv
 from collections import deque
 
@@ -159,6 +161,7 @@ def generate_layout() -> Layout:
     layout.split_column(
         Layout(name="header", size=5),
         Layout(name="cogs",   size=3),
+        Layout(name="db",     size=3),
         Layout(name="main"),
         Layout(name="errors", size=9),
     )
@@ -270,6 +273,26 @@ def render_dashboard() -> Layout:
 
     layout["cogs"].update(Panel(cog_grid, style="blue", padding=(0, 1)))
 
+    # ── DB gauges ─────────────────────────────────────────────────────────────
+    q, pool = queue_stats(), pool_stats()
+    ops     = db_metrics.snapshot()
+    slowest = max(ops.items(), key=lambda kv: kv[1]["exec_p95"], default=None)
+
+    db_grid = Table.grid(expand=True, padding=(0, 3))
+    for _ in range(4):
+        db_grid.add_column(justify="center", ratio=1)
+    db_grid.add_row(
+        Text(f"Queue  {q['depth']}  ({q['parked']} parked, {q['inflight']} running, {q['buffered']} buffered)",
+             style="bold red" if q["throttled"] else "white"),
+        Text(f"Pool  {pool['in_use']}/{pool['max']} in use  {pool['idle']} idle  {pool['waiting']} waiting",
+             style="bold yellow" if pool["waiting"] else "white"),
+        Text(f"Dropped {q['dropped']}",
+             style="yellow" if q["dropped"] else "dim white"),
+        Text(f"Slowest p95  {slowest[0]}  {slowest[1]['exec_p95']:.0f} ms" if slowest else "Slowest p95  —",
+             style="dim white", no_wrap=True, overflow="ellipsis"),
+    )
+    layout["db"].update(Panel(db_grid, title="[bold blue]Database[/]", style="blue", padding=(0, 1)))
+
     # ── Log panels ────────────────────────────────────────────────────────────
     layout["system_box"].update(_log_panel(
         dashboard_state.logs_system, "[bold magenta]Core & Discovery[/]", "magenta"))
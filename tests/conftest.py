@@ -9,7 +9,7 @@ import inspect
 from unittest.mock import patch
 
 # Inline DB executor so it resolves immediately instead of queueing
-async def mock_db_execute(func, *args, **kwargs):
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
     if inspect.iscoroutinefunction(func):
         return await func(*args, **kwargs)
     return func(*args, **kwargs)
@@ -23,3 +23,8 @@ def patch_db_execute_global():
                 with patch('Bots.db_managers.leave_db_manager.db_execute', side_effect=mock_db_execute, create=True):
                     with patch('Bots.db_managers.discovery_db_manager.db_execute', side_effect=mock_db_execute, create=True):
                         yield
+
+@pytest.fixture(autouse=True)
+def isolate_discovery_snapshot(tmp_path, monkeypatch):
+    # Syncs save the local cache snapshot; keep it out of the working tree
+    monkeypatch.setattr('Bots.db_managers.discovery_snapshot.SNAPSHOT_PATH', str(tmp_path / 'discovery_snapshot.bin'))
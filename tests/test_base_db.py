@@ -0,0 +1,397 @@
+"""
+tests/test_base_db.py
+Shared DB infrastructure tests — executor worker, no PostgreSQL required.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import base_db, db_metrics
+
+# Captured at import time: conftest patches base_db.db_execute for every test.
+_real_db_execute = base_db.db_execute
+
+
+@pytest.fixture(autouse=True)
+def patch_db_execute_global():
+    """Override the conftest fixture — these tests exercise the real worker."""
+    # Each test runs on a fresh event loop, so give it a fresh queue too.
+    with patch('Bots.db_managers.base_db.init_pool'), \
+         patch('Bots.db_managers.base_db.db_queue', base_db._PriorityQueue()), \
+         patch('Bots.db_managers.base_db._busy_keys', set()), \
+         patch('Bots.db_managers.base_db._parked', {}), \
+         patch('Bots.db_managers.base_db._held', base_db.deque()), \
+         patch('Bots.db_managers.base_db._worker_task', None):
+        yield
+
+
+async def _with_worker(coro):
+    worker = asyncio.create_task(base_db.db_worker())
+    try:
+        return await asyncio.wait_for(coro, timeout=5)
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+
+# ─── Executor ─────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_sync_func_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+
+    def _which_thread(x):
+        return threading.get_ident(), x * 2
+
+    thread_id, value = await _with_worker(_real_db_execute(_which_thread, 21))
+    assert value == 42
+    assert thread_id != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_exception_propagates_to_caller():
+    def _boom():
+        raise ValueError("bad query")
+
+    with pytest.raises(ValueError, match="bad query"):
+        await _with_worker(_real_db_execute(_boom))
+
+
+@pytest.mark.asyncio
+async def test_coroutine_func_is_awaited():
+    async def _coro(a, b=0):
+        return a + b
+
+    assert await _with_worker(_real_db_execute(_coro, 1, b=2)) == 3
+
+
+# ─── Scheduler ────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def _read():
+        barrier.wait()  # only passes if both reads are in flight together
+        return True
+
+    results = await _with_worker(asyncio.gather(
+        _real_db_execute(_read, readonly=True),
+        _real_db_execute(_read, readonly=True),
+    ))
+    assert results == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_writes_with_same_key_keep_submission_order():
+    order = []
+
+    def _write(n, delay):
+        time.sleep(delay)
+        order.append(n)
+
+    await _with_worker(asyncio.gather(
+        _real_db_execute(_write, 1, 0.05, key=("task", 7)),
+        _real_db_execute(_write, 2, 0.0, key=("task", 7)),
+        _real_db_execute(_write, 3, 0.0, key=("task", 7)),
+    ))
+    assert order == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_writes_with_different_keys_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def _write():
+        barrier.wait()
+
+    await _with_worker(asyncio.gather(
+        _real_db_execute(_write, key=("leave", 1)),
+        _real_db_execute(_write, key=("leave", 2)),
+    ))
+
+
+@pytest.mark.asyncio
+async def test_start_db_worker_is_idempotent():
+    first = base_db.start_db_worker()
+    try:
+        assert base_db.start_db_worker() is first
+    finally:
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+
+
+# ─── Write batching ───────────────────────────────────────────────────────────
+
+@pytest.fixture
+def fake_pool():
+    pool = MagicMock()
+    conn = MagicMock()
+    pool.getconn.return_value = conn
+    with patch('Bots.db_managers.base_db._pool', pool):
+        yield pool, conn
+
+
+def _insert(n, fail=False):
+    conn = base_db.get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO t VALUES (%s)", (n,))
+        if fail:
+            raise RuntimeError(f"row {n} rejected")
+        conn.commit()
+        return n
+    finally:
+        base_db.put_conn(conn)
+
+
+@pytest.mark.asyncio
+async def test_batched_writes_share_one_connection_and_commit(fake_pool):
+    pool, conn = fake_pool
+    results = await _with_worker(asyncio.gather(*(
+        _real_db_execute(_insert, n, key=("message", n), batch=True) for n in range(5)
+    )))
+    assert results == [0, 1, 2, 3, 4]
+    assert pool.getconn.call_count == 1
+    assert conn.commit.call_count == 1
+    pool.putconn.assert_called_once_with(conn)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_individual_writes(fake_pool):
+    pool, conn = fake_pool
+    results = await _with_worker(asyncio.gather(
+        _real_db_execute(_insert, 1, key=("message", 1), batch=True),
+        _real_db_execute(_insert, 2, True, key=("message", 2), batch=True),
+        _real_db_execute(_insert, 3, key=("message", 3), batch=True),
+        return_exceptions=True,
+    ))
+    assert results[0] == 1 and results[2] == 3
+    assert isinstance(results[1], RuntimeError)
+    conn.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_after_commit_hooks_run_only_once_the_batch_commits(fake_pool):
+    pool, conn = fake_pool
+    applied = []
+
+    def _write(n, fail=False):
+        result = _insert(n, fail)
+        base_db.after_commit(applied.append, n)
+        return result
+
+    await _with_worker(asyncio.gather(
+        _real_db_execute(_write, 1, key=("message", 1), batch=True),
+        _real_db_execute(_write, 2, True, key=("message", 2), batch=True),
+        return_exceptions=True,
+    ))
+    # The batch rolled back without applying anything; the retry of 1 applied once.
+    assert applied == [1]
+
+
+# ─── Transactions ─────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_transaction_steps_share_one_connection_and_commit(fake_pool):
+    pool, conn = fake_pool
+
+    async def _block():
+        async with base_db.db_transaction(key=("leave", 1)) as tx:
+            tx.run(_insert, 1)
+            tx.run(_insert, 2)
+        return tx.results
+
+    with patch('Bots.db_managers.base_db.db_execute', _real_db_execute):
+        assert await _with_worker(_block()) == [1, 2]
+    assert pool.getconn.call_count == 1
+    assert conn.commit.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction_step_rolls_back_every_step(fake_pool):
+    pool, conn = fake_pool
+
+    async def _block():
+        async with base_db.db_transaction() as tx:
+            tx.run(_insert, 1)
+            tx.run(_insert, 2, True)
+
+    with patch('Bots.db_managers.base_db.db_execute', _real_db_execute):
+        with pytest.raises(RuntimeError):
+            await _with_worker(_block())
+    conn.rollback.assert_called_once()
+    conn.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_transaction_block_error_runs_nothing(fake_pool):
+    pool, conn = fake_pool
+    with pytest.raises(ValueError):
+        async with base_db.db_transaction() as tx:
+            tx.run(_insert, 1)
+            raise ValueError("validation failed")
+    pool.getconn.assert_not_called()
+
+
+# ─── Priority lanes ───────────────────────────────────────────────────────────
+
+def _job(priority):
+    return base_db._DBJob(lambda: None, (), {}, None, False, None, False, priority)
+
+
+@pytest.mark.asyncio
+async def test_interactive_work_is_dispatched_before_queued_bulk():
+    queue = base_db._PriorityQueue()
+    for priority in (base_db.BULK, base_db.NORMAL, base_db.INTERACTIVE):
+        queue.put_nowait(_job(priority))
+    assert [queue.get_nowait().priority for _ in range(3)] == [
+        base_db.INTERACTIVE, base_db.NORMAL, base_db.BULK,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_is_held_back_at_its_inflight_cap():
+    queue = base_db._PriorityQueue()
+    queue.put_nowait(_job(base_db.BULK))
+    queue.bulk_inflight = base_db.BULK_MAX_INFLIGHT
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+    queue.bulk_finished()
+    assert queue.get_nowait().priority == base_db.BULK
+
+
+@pytest.mark.asyncio
+async def test_priority_defaults_to_the_callers_context():
+    seen = []
+    queue = base_db._PriorityQueue()
+
+    async def _capture(job):
+        seen.append(job.priority)
+        job.future.set_result(None)
+
+    queue.put = _capture
+    with patch('Bots.db_managers.base_db.db_queue', queue):
+        await _real_db_execute(lambda: None)
+        base_db.db_priority.set(base_db.INTERACTIVE)
+        await _real_db_execute(lambda: None)
+        await _real_db_execute(lambda: None, priority=base_db.BULK)
+        with pytest.raises(ValueError):
+            await _real_db_execute(lambda: None, priority="urgent")
+    assert seen == [base_db.NORMAL, base_db.INTERACTIVE, base_db.BULK]
+
+
+@pytest.mark.asyncio
+async def test_view_and_modal_callbacks_run_at_interactive_priority():
+    from Bots.utils.interactive import InteractiveView, InteractiveModal
+
+    async def _callback_task(item):
+        # discord.py: interaction_check, then the callback, in one fresh task
+        assert await item.interaction_check(MagicMock())
+        return base_db.db_priority.get()
+
+    for item in (InteractiveView(timeout=None), InteractiveModal(title="Reason")):
+        assert await asyncio.create_task(_callback_task(item)) == base_db.INTERACTIVE
+
+
+# ─── Backpressure ─────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_producers_wait_while_throttled_but_interactive_bypasses():
+    with patch('Bots.db_managers.base_db.QUEUE_HIGH', 2), \
+         patch('Bots.db_managers.base_db.QUEUE_LOW', 1):
+        fillers = [asyncio.create_task(_real_db_execute(lambda: None)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        blocked = asyncio.create_task(_real_db_execute(lambda: "normal"))
+        urgent = asyncio.create_task(_real_db_execute(lambda: "click", priority=base_db.INTERACTIVE))
+        await asyncio.sleep(0)
+        assert base_db.db_queue.qsize() == 3   # the interactive job got in
+
+        results = await _with_worker(asyncio.gather(*fillers, blocked, urgent))
+        assert results[-2:] == ["normal", "click"]
+
+
+# ─── Metrics ──────────────────────────────────────────────────────────────────
+
+def _fetch_rows():
+    return [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+@pytest.mark.asyncio
+async def test_db_execute_records_per_operation_metrics():
+    db_metrics.reset()
+    await _with_worker(_real_db_execute(_fetch_rows, readonly=True))
+
+    stats = db_metrics.snapshot()["_fetch_rows"]
+    assert stats["calls"] == 1
+    assert stats["rows_avg"] == 3
+    assert stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_wait_is_charged_to_the_operation(fake_pool):
+    db_metrics.reset()
+    pool, conn = fake_pool
+    pool.getconn.side_effect = lambda: time.sleep(0.02) or conn
+
+    def _write():
+        conn = base_db.get_conn()
+        base_db.put_conn(conn)
+
+    await _with_worker(_real_db_execute(_write))
+
+    stats = db_metrics.snapshot()["test_pool_checkout_wait_is_charged_to_the_operation.<locals>._write"]
+    assert stats["checkout_p95"] >= 20
+    assert stats["exec_p95"] < stats["checkout_p95"]
+
+
+def test_rolling_histogram_keeps_only_the_recent_window():
+    hist = db_metrics.RollingHistogram(window=3)
+    for value in (100, 1, 2, 3):
+        hist.add(value)
+    assert hist.max() == 3
+    assert hist.count == 4
+
+
+# ─── Streaming ────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_stream_fetches_in_chunks_and_releases_its_connection(fake_pool):
+    pool, conn = fake_pool
+    cur = conn.cursor.return_value
+    cur.fetchmany.side_effect = [[{"id": 1}, {"id": 2}], [{"id": 3}, {"id": 4}], [{"id": 5}]]
+
+    async def _consume():
+        with patch('Bots.db_managers.base_db.db_execute', _real_db_execute):
+            return [row["id"] async for row in base_db.db_stream("SELECT id FROM t", fetch_size=2)]
+
+    assert await _with_worker(_consume()) == [1, 2, 3, 4, 5]
+    assert conn.cursor.call_args.kwargs["name"].startswith("concord_stream_")
+    assert cur.fetchmany.call_count == 3
+    cur.close.assert_called_once()
+    pool.putconn.assert_called_once_with(conn)
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_early_still_releases_its_connection(fake_pool):
+    pool, conn = fake_pool
+    cur = conn.cursor.return_value
+    cur.fetchmany.return_value = [{"id": 1}, {"id": 2}]
+
+    async def _first():
+        with patch('Bots.db_managers.base_db.db_execute', _real_db_execute):
+            stream = base_db.db_stream("SELECT id FROM t", fetch_size=2)
+            row = await anext(stream)
+            await stream.aclose()
+            return row
+
+    assert await _with_worker(_first()) == {"id": 1}
+    cur.close.assert_called_once()
+    pool.putconn.assert_called_once_with(conn)
@@ -0,0 +1,88 @@
+"""
+tests/test_change_listener.py
+Cross-process change notification tests. The end-to-end check needs a live
+PostgreSQL with the Concord schema (CONCORD_TEST_DSN), otherwise it is skipped.
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import change_listener
+from Bots.db_managers.change_listener import ChangeListener
+from Bots.db_managers.base_db import INSTANCE_NAME
+
+
+def _payload(table, op, origin="concord-other", **row):
+    return json.dumps({"table": table, "op": op, "origin": origin, **row})
+
+
+def test_foreign_writes_reach_their_table_handlers():
+    listener = ChangeListener()
+    channels, roles = MagicMock(), MagicMock()
+    listener.on("channels", channels)
+    listener.on("roles", roles)
+
+    listener.dispatch(_payload("channels", "UPDATE", id=1, name="leave-hr"))
+    channels.assert_called_once_with("UPDATE", {"id": 1, "name": "leave-hr"})
+    roles.assert_not_called()
+
+
+def test_own_writes_and_bad_payloads_are_ignored():
+    listener = ChangeListener()
+    handler = MagicMock()
+    listener.on("channels", handler)
+    listener.dispatch(_payload("channels", "DELETE", origin=INSTANCE_NAME, id=1))
+    listener.dispatch("not json")
+    handler.assert_not_called()
+    assert listener.received == 0
+
+
+def test_a_failing_handler_does_not_stop_the_others():
+    listener = ChangeListener()
+    after = MagicMock()
+    listener.on("tasks", MagicMock(side_effect=RuntimeError("boom")))
+    listener.on("tasks", after)
+    listener.dispatch(_payload("tasks", "INSERT", task_id=5))
+    after.assert_called_once_with("INSERT", {"task_id": 5})
+
+
+@pytest.mark.asyncio
+async def test_resync_handlers_may_be_coroutines():
+    listener = ChangeListener()
+    calls = []
+
+    async def _reload():
+        calls.append("async")
+
+    listener.on_resync(_reload)
+    listener.on_resync(lambda: calls.append("sync"))
+    await listener._resync_all()
+    assert calls == ["async", "sync"]
+
+
+@pytest.mark.skipif(not os.getenv("CONCORD_TEST_DSN"), reason="CONCORD_TEST_DSN not set")
+@pytest.mark.asyncio
+async def test_trigger_notifies_a_listening_process(monkeypatch):
+    import psycopg
+    dsn = os.environ["CONCORD_TEST_DSN"]
+    monkeypatch.setattr(change_listener, "conninfo", lambda: dsn)
+    listener = ChangeListener()
+    received = asyncio.Queue()
+    listener.on("categories", lambda op, row: received.put_nowait((op, row)))
+    task = asyncio.create_task(listener._run())
+    try:
+        while not listener.connected:
+            await asyncio.sleep(0.05)
+        with psycopg.connect(dsn, application_name="concord-test-writer") as conn:
+            conn.execute("INSERT INTO categories (id, name, guild_id) VALUES (-1, 'notify-test', 1)")
+            conn.execute("DELETE FROM categories WHERE id = -1")
+        assert await asyncio.wait_for(received.get(), 5) == ("INSERT", {"id": -1, "name": "notify-test", "guild_id": 1})
+        assert (await asyncio.wait_for(received.get(), 5))[0] == "DELETE"
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
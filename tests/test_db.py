@@ -12,9 +12,10 @@ from unittest.mock import patch, MagicMock
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from Bots.db_managers import task_db_manager as db_manager
+from Bots.db_managers import queries as Q
 
 # Make the queue worker run inline for easier testing
-async def mock_db_execute(func, *args, **kwargs):
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
     if inspect.iscoroutinefunction(func):
         return await func(*args, **kwargs)
     return func(*args, **kwargs)
@@ -86,6 +87,15 @@ async def test_retrieve_task(mock_conn):
     assert res['title'] == 'Retrieved'
     cur.execute.assert_called()
 
+@pytest.mark.asyncio
+async def test_retrieve_task_by_id_uses_prepared_statement(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = make_db_row(task_id=7)
+
+    res = await db_manager.retrieve_task_by_id(7)
+    assert res['task_id'] == 7
+    cur.execute.assert_called_with(Q.TASK_BY_ID, (7,), prepare=True)
+
 @pytest.mark.asyncio
 async def test_retrieve_all_tasks(mock_conn):
     conn, cur = mock_conn
@@ -95,6 +105,40 @@ async def test_retrieve_all_tasks(mock_conn):
     assert len(res) == 2
     assert res[1]['title'] == 'Task B'
 
+@pytest.mark.asyncio
+async def test_participant_sync_reads_filter_in_sql(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchall.return_value = [make_db_row(task_id=3)]
+    assert [t['task_id'] for t in await db_manager.retrieve_assignee_tasks_for_sync(2)] == [3]
+    cur.execute.assert_called_with(Q.TASKS_FOR_SYNC_BY_ASSIGNEE, ('2',), prepare=True)
+    await db_manager.retrieve_assigner_tasks_for_sync(999)
+    cur.execute.assert_called_with(Q.TASKS_FOR_SYNC_BY_ASSIGNER, (999,), prepare=True)
+
+@pytest.mark.asyncio
+async def test_iter_active_tasks_pages_by_task_id(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchall.side_effect = [
+        [make_db_row(task_id=1), make_db_row(task_id=4)],
+        [make_db_row(task_id=9)],
+    ]
+    with patch.object(db_manager, 'STREAM_FETCH_SIZE', 2):
+        tasks = [t async for t in db_manager.iter_active_tasks()]
+    assert [t['task_id'] for t in tasks] == [1, 4, 9]
+    assert tasks[0]['assignee_ids'] == [1, 2]
+    assert [c.args for c in cur.execute.call_args_list] == [
+        (Q.TASKS_ACTIVE_PAGE, (0, 2)),
+        (Q.TASKS_ACTIVE_PAGE, (4, 2)),
+    ]
+
+@pytest.mark.asyncio
+async def test_iter_finalized_tasks_holds_no_connection_between_pages(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchall.side_effect = [[make_db_row(task_id=3)]]
+    with patch('Bots.db_managers.task_db_manager.put_conn') as put_conn:
+        async for task in db_manager.iter_finalized_tasks():
+            put_conn.assert_called_once_with(conn)     # page read and returned before the caller runs
+    cur.execute.assert_called_once_with(Q.TASKS_FINALIZED_PAGE, (0, db_manager.STREAM_FETCH_SIZE), prepare=True)
+
 # ─── Update & Delete ──────────────────────────────────────────────────────────
 
 @pytest.mark.asyncio
@@ -114,6 +158,31 @@ async def test_delete_task(mock_conn):
     cur.execute.assert_called_with('DELETE FROM tasks WHERE channel_id = %s', (555,))
     conn.commit.assert_called()
 
+@pytest.mark.asyncio
+async def test_task_row_writes_share_the_task_key(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = {'task_id': 7}
+    keys = []
+    async def recording_execute(func, *args, key=None, **kwargs):
+        keys.append(key)
+        return await mock_db_execute(func, *args, **kwargs)
+    with patch('Bots.db_managers.task_db_manager.db_execute', side_effect=recording_execute):
+        await db_manager.update_task_in_database(make_db_row(task_id='7'))
+        await db_manager.finalize_task(make_db_row(task_id=7))
+        await db_manager.delete_task_from_database(555, task_id=7)
+        await db_manager.delete_task_from_database(555)   # id looked up by channel
+    assert [k for k in keys if k is not None] == [("task", 7)] * 4
+
+@pytest.mark.asyncio
+async def test_finalize_task(mock_conn):
+    conn, cur = mock_conn
+    task = make_db_row(assignees=['UserA'], assignee_ids=[1], global_state='Finalized', status='Finalized')
+    await db_manager.finalize_task(task)
+    cur.execute.assert_called_once()                 # no full-row UPDATE from the panel's copy
+    statement, params = cur.execute.call_args.args
+    assert 'completed_at = CURRENT_TIMESTAMP' in statement
+    assert params == (1,)
+
 # ─── Channels ─────────────────────────────────────────────────────────────────
 
 @pytest.mark.asyncio
@@ -0,0 +1,77 @@
+"""
+tests/test_discovery_cache.py
+DiscoveryCache index tests.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers.discovery_cache import DiscoveryCache, CacheRecord, CHANNEL, ROLE
+
+
+def test_same_name_in_two_guilds_is_kept_apart():
+    cache = DiscoveryCache()
+    cache.put(CHANNEL, 1, "general", guild_id=100)
+    cache.put(CHANNEL, 2, "general", guild_id=200)
+    assert cache.id_by_name(CHANNEL, "general", guild_id=200) == 2
+    assert cache.ids(CHANNEL, "general") == [1, 2]
+
+
+def test_rename_moves_the_id_to_the_new_name():
+    cache = DiscoveryCache()
+    cache.put(ROLE, 7, "Interns", guild_id=100)
+    cache.put(ROLE, 7, "Trainees", guild_id=100)
+    assert cache.ids(ROLE, "Interns") == []
+    assert cache.get(ROLE, 7) == CacheRecord(7, "Trainees", 100)
+
+
+def test_remove_only_drops_that_id():
+    cache = DiscoveryCache()
+    cache.put(CHANNEL, 1, "notes", guild_id=100, parent_id=10)
+    cache.put(CHANNEL, 2, "notes", guild_id=100, parent_id=11)
+    cache.remove(CHANNEL, 1)
+    cache.remove(CHANNEL, 99)   # unknown ids are ignored
+    assert cache.ids(CHANNEL, "notes") == [2]
+    assert cache.count(CHANNEL) == 1
+
+
+def test_case_insensitive_lookup_is_opt_in():
+    cache = DiscoveryCache()
+    cache.put(ROLE, 3, "D.A.R Submitted", guild_id=100)
+    assert cache.id_by_name(ROLE, "d.a.r submitted") is None
+    assert cache.id_by_name(ROLE, "d.a.r submitted", casefold=True) == 3
+
+
+def test_replace_swaps_one_kind_only():
+    cache = DiscoveryCache()
+    cache.put(CHANNEL, 1, "old", guild_id=100)
+    cache.put(ROLE, 5, "emp", guild_id=100)
+    cache.replace(CHANNEL, [CacheRecord(2, "new", 100)])
+    assert cache.id_by_name(CHANNEL, "old") is None
+    assert cache.id_by_name(CHANNEL, "new") == 2
+    assert cache.id_by_name(ROLE, "emp") == 5
+
+
+def test_replace_never_exposes_a_partial_scope():
+    cache = DiscoveryCache()
+    cache.put(CHANNEL, 1, "leave-hr", guild_id=100)
+    seen = []
+
+    def _records():
+        # Lookups made while the new index is being built still see the old one.
+        for n in range(3):
+            seen.append(cache.id_by_name(CHANNEL, "leave-hr"))
+            yield CacheRecord(10 + n, f"chan-{n}", 100)
+        yield CacheRecord(1, "leave-hr", 100)
+
+    cache.replace(CHANNEL, _records())
+    assert seen == [1, 1, 1]
+    assert cache.count(CHANNEL) == 4
+
+
+def test_replace_keeps_the_last_of_duplicate_ids():
+    cache = DiscoveryCache()
+    cache.replace(CHANNEL, [CacheRecord(1, "a", 100), CacheRecord(1, "b", 200, 7)])
+    assert cache.get(CHANNEL, 1) == CacheRecord(1, "b", 200, 7)
+    assert cache.ids(CHANNEL, "a") == []
@@ -0,0 +1,289 @@
+"""
+tests/test_discovery_cog.py
+Discovery cog tests — no real Discord connection required.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock, patch, call
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from cogs import discovery_cog
+from cogs.discovery_cog import DiscoveryCog
+from Bots.utils.readiness import discovery_phases
+from Bots.db_managers.discovery_cache import DiscoveryCache
+
+
+def make_guild(chunked=True, members=()):
+    guild = MagicMock()
+    guild.name = "Concord"
+    guild.chunked = chunked
+    guild.members = list(members)
+    guild.chunk = AsyncMock()
+    return guild
+
+
+async def _rest_members(*members):
+    for member in members:
+        yield member
+
+
+# ─── Member source ────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_members_come_from_gateway_cache_when_chunked():
+    guild = make_guild(members=["alice", "bob"])
+    assert await DiscoveryCog(MagicMock())._guild_members(guild) == ["alice", "bob"]
+    guild.chunk.assert_not_called()
+    guild.fetch_members.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unchunked_guild_is_chunked_before_reading_cache():
+    guild = make_guild(chunked=False, members=["alice"])
+
+    async def _chunk(cache=True):
+        guild.chunked = True
+    guild.chunk.side_effect = _chunk
+
+    assert await DiscoveryCog(MagicMock())._guild_members(guild) == ["alice"]
+    guild.fetch_members.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rest_is_the_fallback_when_chunking_fails():
+    guild = make_guild(chunked=False)
+    guild.chunk.side_effect = RuntimeError("members intent disabled")
+    guild.fetch_members = MagicMock(return_value=_rest_members("carol"))
+
+    assert await DiscoveryCog(MagicMock())._guild_members(guild) == ["carol"]
+
+
+# ─── History sweep ────────────────────────────────────────────────────────────
+
+def make_channel(channel_id, message_ids):
+    channel = MagicMock()
+    channel.id = channel_id
+    channel.name = f"chan-{channel_id}"
+
+    def _history(**kwargs):
+        channel.history_kwargs = kwargs
+        messages = []
+        for mid in message_ids:
+            msg = MagicMock()
+            msg.id = mid
+            messages.append(msg)
+        return _rest_members(*messages)
+    channel.history = MagicMock(side_effect=_history)
+    return channel
+
+
+def make_cog():
+    cog = DiscoveryCog(MagicMock())
+    cog.mirror = MagicMock()
+    cog.mirror.flush = AsyncMock()
+    return cog
+
+
+@pytest.mark.asyncio
+async def test_sweep_resumes_after_the_checkpoint_and_flushes_before_advancing():
+    cog = make_cog()
+    channel = make_channel(5, [101, 102, 103])
+    order = MagicMock()
+    cog.mirror.flush.side_effect = lambda: order.flush()
+    with patch.object(discovery_cog.db, 'set_sweep_checkpoint', AsyncMock(side_effect=order.checkpoint)):
+        assert await cog._sweep_channel(channel, 100) == 3
+
+    assert channel.history_kwargs['after'].id == 100
+    assert channel.history_kwargs['oldest_first'] is True
+    assert order.mock_calls == [call.flush(), call.checkpoint(5, 103)]
+
+
+@pytest.mark.asyncio
+async def test_unswept_channel_reads_only_the_recent_backfill():
+    cog = make_cog()
+    channel = make_channel(6, [])
+    with patch.object(discovery_cog.db, 'set_sweep_checkpoint', AsyncMock()) as checkpoint:
+        assert await cog._sweep_channel(channel, None) == 0
+    assert channel.history_kwargs == {'limit': discovery_cog.SWEEP_BACKFILL}
+    checkpoint.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_mirrored_oldest_first_so_the_checkpoint_only_moves_forward():
+    cog = make_cog()
+    channel = make_channel(7, [305, 304, 303, 302, 301])   # history() is newest first
+    with patch.object(discovery_cog, 'SWEEP_BATCH', 2), \
+         patch.object(discovery_cog.db, 'set_sweep_checkpoint', AsyncMock()) as checkpoint:
+        assert await cog._sweep_channel(channel, None) == 5
+    assert [c.args[0].id for c in cog.mirror.add_message.call_args_list] == [301, 302, 303, 304, 305]
+    assert [c.args[1] for c in checkpoint.call_args_list] == [302, 304, 305]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_does_not_advance_the_checkpoint():
+    cog = make_cog()
+    cog.mirror.flush.return_value = None
+    channel = make_channel(8, [801, 802, 803])
+    with patch.object(discovery_cog, 'SWEEP_BATCH', 2), \
+         patch.object(discovery_cog.db, 'set_sweep_checkpoint', AsyncMock()) as checkpoint:
+        assert await cog._sweep_channel(channel, 800) == 2   # stops at the failed batch
+    checkpoint.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sweep_covers_every_channel_with_its_own_checkpoint():
+    cog = make_cog()
+    guild = MagicMock()
+    guild.text_channels = [make_channel(1, [11]), make_channel(2, [21, 22])]
+    cog.bot.guilds = [guild]
+    with patch.object(discovery_cog.db, 'get_sweep_checkpoints', AsyncMock(return_value={2: 20})), \
+         patch.object(discovery_cog.db, 'set_sweep_checkpoint', AsyncMock()) as checkpoint:
+        await cog._sweep_messages()
+    assert sorted(c.args for c in checkpoint.call_args_list) == [(1, 11), (2, 22)]
+    assert cog.mirror.add_message.call_count == 3
+
+
+# ─── Readiness phases ─────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_structure_phase_is_published_before_members_are_fetched():
+    cog = make_cog()
+    guild = make_guild()
+    guild.categories, guild.channels, guild.roles, guild.scheduled_events = [], [], [], []
+    cog.bot.guilds = [guild]
+    phases = discovery_phases(cog.bot)
+    seen = {}
+
+    async def _members(g):
+        seen.update(phases.status())
+        return []
+
+    with patch.object(discovery_cog.db, 'sync_guild_snapshot', AsyncMock()) as sync, \
+         patch.object(discovery_cog.db, 'load_gateway_structure'), \
+         patch.object(cog, '_guild_members', side_effect=_members), \
+         patch.object(cog, '_sweep_messages', AsyncMock()), \
+         patch.object(cog, '_message_cleanup_engine', AsyncMock()):
+        await cog.on_ready()
+
+    assert seen == {'structure': True, 'members': False, 'history': False}
+    assert phases.members.is_set() and cog.bot.discovery_complete is phases.members
+    assert set(sync.call_args_list[0].kwargs) == {'categories', 'channels', 'roles'}
+    assert set(sync.call_args_list[1].kwargs) == {'members', 'scheduled_events', 'member_roles'}
+
+
+@pytest.mark.asyncio
+async def test_structure_is_served_from_the_gateway_while_the_db_warms():
+    cog = make_cog()
+    guild = make_guild()
+    guild.id = 1
+    channel = MagicMock(id=100, type='text', category_id=None)
+    channel.name = 'leave-hr'
+    guild.categories, guild.channels, guild.roles, guild.scheduled_events = [], [channel], [], []
+    cog.bot.guilds = [guild]
+    phases = discovery_phases(cog.bot)
+    warm = asyncio.Event()
+
+    with patch.object(discovery_cog.db, 'cache', DiscoveryCache()), \
+         patch.object(discovery_cog.db, '_gateway_structure', False), \
+         patch.object(discovery_cog.db, 'wait_until_warm', side_effect=warm.wait), \
+         patch.object(discovery_cog.db, 'sync_guild_snapshot', AsyncMock()) as sync, \
+         patch.object(cog, '_guild_members', AsyncMock(return_value=[])), \
+         patch.object(cog, '_sweep_messages', AsyncMock()), \
+         patch.object(cog, '_message_cleanup_engine', AsyncMock()):
+        ready = asyncio.create_task(cog.on_ready())
+        await phases.structure.wait()
+        assert await discovery_cog.db.get_channel_id_by_name('leave-hr') == 100
+        sync.assert_not_called()                     # DB reconcile still waiting on the warm-up
+
+        warm.set()
+        await ready
+        assert set(sync.call_args_list[0].kwargs) == {'categories', 'channels', 'roles'}
+
+
+@pytest.mark.asyncio
+async def test_history_phase_is_set_when_the_sweep_finishes():
+    cog = make_cog()
+    cog.bot.guilds = []
+    with patch.object(discovery_cog.db, 'get_sweep_checkpoints', AsyncMock(return_value={})):
+        await cog._sweep_messages()
+    assert discovery_phases(cog.bot).history.is_set()
+
+
+# ─── Message search ───────────────────────────────────────────────────────────
+
+def _search_ctx(readable_ids, channel_ids):
+    ctx = MagicMock()
+    ctx.author.id = 1
+    ctx.send = AsyncMock()
+    ctx.guild.id = 99
+    channels = []
+    for channel_id in channel_ids:
+        channel = MagicMock(id=channel_id)
+        channel.permissions_for.return_value.read_message_history = channel_id in readable_ids
+        channels.append(channel)
+    ctx.guild.text_channels = channels
+    return ctx
+
+
+def _hits(*ids):
+    return [
+        {'id': i, 'channel_id': 10, 'author_id': 1, 'content': 'x', 'snippet': '**x**', 'created_at': None}
+        for i in ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_only_covers_channels_the_caller_can_read():
+    ctx = _search_ctx(readable_ids={10}, channel_ids=[10, 11])
+    with patch.object(discovery_cog.db, 'search_messages', AsyncMock(return_value=_hits(1))) as search:
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='deploy')
+    assert search.call_args.kwargs['channel_id'] == [10]
+    assert search.call_args.kwargs['offset'] == 0
+    assert 'embed' in ctx.send.call_args.kwargs
+
+    with patch.object(discovery_cog.db, 'search_messages', AsyncMock()) as search:
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='<#11> deploy')
+    search.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_search_filters_are_leading_mentions_only():
+    ctx = _search_ctx(readable_ids={10}, channel_ids=[10])
+    with patch.object(discovery_cog.db, 'search_messages', AsyncMock(return_value=_hits(1))) as search:
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='general error')
+        assert search.call_args.args[0] == 'general error'
+        assert search.call_args.kwargs['channel_id'] == [10]
+        assert search.call_args.kwargs['author_id'] is None
+
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='<@!5> <#10> deploy <#11>')
+        assert search.call_args.args[0] == 'deploy <#11>'
+        assert search.call_args.kwargs['channel_id'] == 10
+        assert search.call_args.kwargs['author_id'] == 5
+
+        search.reset_mock()
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='<@5>')
+    search.assert_not_called()
+    assert 'Usage' in ctx.send.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_search_pages_fetch_one_extra_row_to_detect_the_next_page():
+    ctx = _search_ctx(readable_ids={10}, channel_ids=[10])
+    first = _hits(*range(discovery_cog.SEARCH_PAGE_SIZE + 1))
+    with patch.object(discovery_cog.db, 'search_messages', AsyncMock(return_value=first)) as search:
+        await DiscoveryCog.search.callback(make_cog(), ctx, query='deploy')
+        view = ctx.send.call_args.kwargs['view']
+        assert view.previous.disabled and not view.next.disabled
+        assert search.call_args.kwargs['limit'] == discovery_cog.SEARCH_PAGE_SIZE + 1
+
+        search.return_value = _hits(42)
+        interaction = MagicMock()
+        interaction.response.edit_message = AsyncMock()
+        await view._turn(interaction, 1)
+
+    assert search.call_args.kwargs['offset'] == discovery_cog.SEARCH_PAGE_SIZE
+    assert view.page == 1 and not view.previous.disabled and view.next.disabled
+    assert len(interaction.response.edit_message.call_args.kwargs['embed'].fields) == 1
@@ -0,0 +1,368 @@
+"""
+tests/test_discovery_db.py
+Discovery database manager unit tests mocking psycopg connection.
+"""
+
+import pytest
+import sys
+import os
+import inspect
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import discovery_db_manager as db_manager
+from Bots.db_managers import queries as Q
+from Bots.db_managers.message_retention import snowflake_for
+
+
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def patch_db_execute():
+    with patch('Bots.db_managers.discovery_db_manager.db_execute', side_effect=mock_db_execute):
+        yield
+
+
+@pytest.fixture
+def mock_conn():
+    with patch('Bots.db_managers.discovery_db_manager.get_conn') as get_conn_mock, \
+         patch('Bots.db_managers.discovery_db_manager.put_conn'):
+        conn = MagicMock()
+        get_conn_mock.return_value = conn
+        cur = MagicMock()
+        cur.rowcount = 0
+        conn.cursor.return_value.__enter__.return_value = cur
+        yield conn, cur
+
+
+# ─── Bulk Sync ────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_members_copies_merges_and_prunes(mock_conn):
+    conn, cur = mock_conn
+    copy = cur.copy.return_value.__enter__.return_value
+    rows = [(1, 'alice', 'Alice', '2024-01-01', ['HR']), (2, 'bob', 'Bob', '2024-02-01', [])]
+
+    await db_manager.bulk_upsert_members(rows)
+
+    assert 'COPY _stage_members' in cur.copy.call_args.args[0]
+    assert copy.write_row.call_count == 2
+    assert copy.write_row.call_args_list[0].args[0][4] == '["HR"]'
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert 'ON CONFLICT (id) DO UPDATE' in statements[1]
+    assert 'DELETE FROM members' in statements[2]
+    conn.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_without_prune_keeps_missing_rows(mock_conn):
+    conn, cur = mock_conn
+    await db_manager.bulk_upsert_categories([(10, 'Ops', 1)], prune=False)
+    assert not any('DELETE' in c.args[0] for c in cur.execute.call_args_list)
+    assert await db_manager.get_category_id_by_name('Ops', guild_id=1) == 10
+
+
+def test_diff_rows_classifies_inserts_updates_and_deletes():
+    current = {1: (1, 'general'), 2: (2, 'random'), 3: (3, 'old')}
+    live = [(1, 'general'), (2, 'off-topic'), (4, 'new')]
+    assert db_manager.diff_rows(current, live) == ([(4, 'new')], [(2, 'off-topic')], [3])
+
+
+def _mirror(cur, tables):
+    """Answer each mirror SELECT with the rows given for that table."""
+    def _fetchall():
+        sql = cur.execute.call_args.args[0]
+        table = sql.rsplit('FROM', 1)[1].strip()
+        columns = db_manager._BULK_TABLES.get(table, ('member_id', 'role_id'))
+        return [dict(zip(columns, row)) for row in tables.get(table, [])]
+    cur.fetchall.side_effect = _fetchall
+
+
+@pytest.mark.asyncio
+async def test_unchanged_snapshot_writes_nothing(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {
+        'categories': [(10, 'Ops', 1)],
+        'roles': [(30, 'HR', '#000000', 1, 1)],
+        'members': [(1, 'alice', 'Alice', '2024-01-01', ['HR'])],
+    })
+    changes = await db_manager.sync_guild_snapshot(
+        [(10, 'Ops', 1)], [], [(30, 'HR', '#000000', 1, 1)], [(1, 'alice', 'Alice', '2024-01-01', ['HR'])], [],
+    )
+    assert all(c == (0, 0, 0) for c in changes.values())
+    cur.executemany.assert_not_called()
+    assert all(c.args[0].startswith('SELECT') for c in cur.execute.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_writes_only_the_changes_in_one_transaction(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {
+        'channels': [(20, 'general', 'text', None, 1), (21, 'gone', 'text', None, 1)],
+        'members': [(1, 'alice', 'Alice', '2024-01-01', ['HR'])],
+    })
+    changes = await db_manager.sync_guild_snapshot(
+        [], [(20, 'general', 'text', None, 1)], [],
+        [(1, 'alice', 'Alice', '2024-01-01', ['HR', 'On Leave']), (2, 'bob', 'Bob', '2024-02-01', [])], [],
+    )
+    assert changes['channels'] == (0, 0, 1)
+    assert changes['members'] == (1, 1, 0)
+    written = cur.executemany.call_args.args[1]
+    assert [row[0] for row in written] == [2, 1]
+    assert written[1][4] == '["HR", "On Leave"]'
+    cur.execute.assert_any_call('DELETE FROM channels WHERE id = ANY(%s)', ([21],))
+    conn.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_large_change_sets_are_copied(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {})
+    roles = [(n, f'role-{n}', 0, n, 1) for n in range(db_manager.COPY_THRESHOLD + 1)]
+    await db_manager.sync_guild_snapshot([], [], roles, [], [])
+    assert 'COPY _stage_roles' in cur.copy.call_args.args[0]
+    cur.executemany.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_diffs_member_roles_by_id(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {
+        'members': [(1, 'alice', 'Alice', '2024-01-01', ['HR'])],
+        'member_roles': [(1, 30), (1, 31)],
+    })
+    changes = await db_manager.sync_guild_snapshot(
+        [], [], [], [(1, 'alice', 'Alice', '2024-01-01', ['HR'])], [], member_roles=[(1, 30), (1, 32)],
+    )
+    assert changes['member_roles'] == (1, 0, 1)
+    assert cur.executemany.call_args.args[1] == [(1, 32)]
+    cur.execute.assert_any_call(
+        'DELETE FROM member_roles WHERE (member_id, role_id) IN '
+        '(SELECT * FROM unnest(%s::bigint[], %s::bigint[]))',
+        ([1], [31]),
+    )
+
+
+# ─── Role membership ──────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_update_member_roles_writes_only_the_diff(mock_conn):
+    conn, cur = mock_conn
+    await db_manager.update_member_roles(1, added=[32], removed=[31])
+    assert cur.execute.call_args_list[0].args[:2] == (Q.MEMBER_ROLES_REMOVE, (1, [31]))
+    assert cur.execute.call_args_list[1].args[:2] == (Q.MEMBER_ROLES_ADD, (1, [32]))
+
+    cur.execute.reset_mock()
+    await db_manager.update_member_roles(1)
+    cur.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_role_index_follows_member_writes(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {'member_roles': [(50, 60)]})
+    await db_manager.sync_guild_snapshot(
+        [], [], [], [(50, 'carol', 'Carol', '2024-01-01', []), (51, 'dave', 'Dave', '2024-01-01', [])], [],
+        member_roles=[(50, 60)],
+    )
+    index = db_manager.role_index
+    assert index.members_with(none=[60]) >= {51}
+    assert 50 in index.members_with(all=[60])
+
+    await db_manager.update_member_roles(51, added=[60])
+    await db_manager.delete_member(50)
+    await db_manager.upsert_member(52, 'erin', 'Erin', '2024-01-01', role_ids=[60, 61])
+    assert index.members_with(all=[60]) == {51, 52}
+
+    await db_manager.delete_role(60)
+    assert index.members_with(all=[61]) == {52}
+    assert index.members_with(all=[60]) == set()
+
+
+@pytest.mark.asyncio
+async def test_role_lookups_resolve_names_to_ids(mock_conn):
+    conn, cur = mock_conn
+    await db_manager.upsert_role(40, 'On Leave', '#000000', 1, 1)
+    await db_manager.upsert_role(41, 'On Leave', '#000000', 1, 2)
+    cur.execute.reset_mock()
+
+    cur.fetchall.return_value = [{'id': 1, 'name': 'alice'}]
+    assert await db_manager.get_members_on_leave() == [{'id': 1, 'name': 'alice'}]
+    cur.execute.assert_called_once_with(Q.MEMBERS_WITH_ROLE, ([40, 41],), prepare=True)
+
+    cur.fetchone.return_value = (1,)
+    assert await db_manager.member_has_role(1, 40) is True
+    cur.execute.assert_called_with(Q.MEMBER_HAS_ROLE, (1, [40]), prepare=True)
+
+    # A renamed role is still found by id; the old name no longer matches anything.
+    await db_manager.upsert_role(40, 'Away', '#000000', 1, 1)
+    await db_manager.upsert_role(41, 'Away', '#000000', 1, 2)
+    cur.execute.reset_mock()
+    assert await db_manager.is_on_leave(1) is False
+    cur.execute.assert_not_called()
+
+
+# ─── Name lookups ─────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_channel_lookups_follow_renames_and_deletes(mock_conn):
+    await db_manager.upsert_channel(20, 'leave-application', 'text', None, 1)
+    await db_manager.upsert_channel(20, 'leave-requests', 'text', None, 1)
+    assert await db_manager.get_channel_id_by_name('leave-application') is None
+    assert await db_manager.get_channel_id_by_name('Leave-Requests', casefold=True) == 20
+
+    await db_manager.delete_channel(20)
+    assert await db_manager.get_channel_id_by_name('leave-requests') is None
+
+
+# ─── Change events ────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_live_changes_are_logged_and_published(mock_conn):
+    conn, cur = mock_conn
+    received = []
+    unsubscribe = db_manager.bus.subscribe(received.append, kinds={db_manager.CHANNEL})
+    try:
+        await db_manager.upsert_channel(70, 'leave-hr', 'text', None, 1)
+        await db_manager.upsert_channel(70, 'leave-hr', 'text', None, 1)     # no change
+        await db_manager.upsert_channel(70, 'leave-people', 'text', None, 1)
+        await db_manager.delete_channel(70)
+        await db_manager.upsert_role(71, 'Interns', '#000000', 1, 1)         # other kind
+    finally:
+        unsubscribe()
+
+    assert [(c.action, c.name, c.old_name) for c in received] == [
+        ('created', 'leave-hr', None), ('renamed', 'leave-people', 'leave-hr'), ('deleted', 'leave-people', None),
+    ]
+    logged = [c.args[1][:2] for c in cur.execute.call_args_list if c.args[0] == Q.DISCOVERY_CHANGE_LOG]
+    assert logged == [('channel', 'created'), ('channel', 'renamed'), ('channel', 'deleted'), ('role', 'created')]
+
+
+def test_remote_writes_patch_the_cache_and_role_index():
+    db_manager._remote_structure(db_manager.CHANNEL)('INSERT', {'id': 80, 'name': 'ops-log', 'guild_id': 1, 'category_id': None})
+    received = []
+    unsubscribe = db_manager.bus.subscribe(received.append)
+    try:
+        db_manager.listener.dispatch(
+            '{"table": "channels", "op": "UPDATE", "origin": "concord-other", '
+            '"id": 80, "name": "ops-journal", "guild_id": 1, "category_id": null}'
+        )
+        db_manager.listener.dispatch('{"table": "member_roles", "op": "INSERT", "origin": "x", "member_id": 81, "role_id": 82}')
+    finally:
+        unsubscribe()
+    assert db_manager.cache.id_by_name(db_manager.CHANNEL, 'ops-journal') == 80
+    assert [(c.action, c.old_name) for c in received] == [('renamed', 'ops-log')]
+    assert db_manager.role_index.members_with(all=[82]) == {81}
+
+
+# ─── Message queries ──────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_get_recent_messages_uses_the_channel_index_query(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchall.return_value = [{'id': 3}, {'id': 2}]
+    assert await db_manager.get_recent_messages(20, limit=2, before=4) == [{'id': 3}, {'id': 2}]
+    cur.execute.assert_called_once_with(Q.RECENT_MESSAGES, (20, 4, 2), prepare=True)
+
+
+@pytest.mark.asyncio
+async def test_count_messages_by_author_bounds_by_snowflake(mock_conn):
+    conn, cur = mock_conn
+    since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cur.fetchall.return_value = [{'author_id': 1, 'messages': 5}]
+    assert await db_manager.count_messages_by_author(since) == {1: 5}
+    cur.execute.assert_called_with(Q.MESSAGE_COUNTS_SINCE, (snowflake_for(since),), prepare=True)
+
+    cur.fetchone.return_value = {'messages': 2}
+    assert await db_manager.count_messages_by_author(since, author_id=7) == {7: 2}
+
+
+@pytest.mark.asyncio
+async def test_search_messages_scopes_by_channels_author_and_snowflake(mock_conn):
+    conn, cur = mock_conn
+    since = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    cur.fetchall.return_value = [{'id': 9, 'rank': 0.5, 'snippet': '**deploy** failed'}]
+
+    rows = await db_manager.search_messages('deploy', channel_id=20, author_id=7, since=since, limit=6, offset=5)
+    assert rows[0]['id'] == 9
+    cur.execute.assert_called_with(
+        Q.SEARCH_MESSAGES, ('deploy', snowflake_for(since), [20], [20], 7, 7, 6, 5), prepare=True,
+    )
+
+    await db_manager.search_messages('deploy', channel_id={20, 21})
+    assert sorted(cur.execute.call_args.args[1][2]) == [20, 21]
+    await db_manager.search_messages('deploy')
+    assert cur.execute.call_args.args[1][:4] == ('deploy', 0, None, None)
+
+
+@pytest.mark.asyncio
+async def test_search_messages_skips_the_db_when_nothing_can_match(mock_conn):
+    conn, cur = mock_conn
+    assert await db_manager.search_messages('   ') == []
+    assert await db_manager.search_messages('deploy', channel_id=[]) == []
+    cur.execute.assert_not_called()
+
+
+def test_rolled_back_batch_leaves_the_cache_for_the_retry_to_classify():
+    from Bots.db_managers import base_db
+    CHANNEL = db_manager.CHANNEL
+    db_manager.cache.put(CHANNEL, 500, 'ops', 1, 10)
+
+    def _reject():
+        raise RuntimeError("role insert rejected")
+
+    with patch.object(base_db, '_pool', MagicMock()):
+        with pytest.raises(RuntimeError):
+            base_db._run_in_transaction([
+                (db_manager._upsert_channel_sync, (500, 'ops-renamed', 'text', 10, 1), {}),
+                (_reject, (), {}),
+            ])
+        assert db_manager.cache.get(CHANNEL, 500).name == 'ops'
+
+        change = base_db._run_in_transaction([(db_manager._upsert_channel_sync, (500, 'ops-renamed', 'text', 10, 1), {})])[0]
+    assert (change.action, change.old_name) == ('renamed', 'ops')
+    assert db_manager.cache.get(CHANNEL, 500).name == 'ops-renamed'
+
+
+def test_writes_in_one_batch_see_each_other_before_the_commit():
+    from Bots.db_managers import base_db
+    CHANNEL = db_manager.CHANNEL
+    with patch.object(base_db, '_pool', MagicMock()):
+        changes = base_db._run_in_transaction([
+            (db_manager._upsert_channel_sync, (501, 'ops', 'text', None, 1), {}),
+            (db_manager._upsert_channel_sync, (501, 'ops-log', 'text', None, 1), {}),
+            (db_manager._delete_channel_sync, (501,), {}),
+            (db_manager._upsert_channel_sync, (501, 'ops-log', 'text', None, 1), {}),
+        ])
+    assert [(c.action, c.name, c.old_name) for c in changes] == [
+        ('created', 'ops', None), ('renamed', 'ops-log', 'ops'),
+        ('deleted', 'ops-log', None), ('created', 'ops-log', None),
+    ]
+    assert db_manager.cache.get(CHANNEL, 501).name == 'ops-log'
+    assert base_db.transaction_state() is None
+
+
+@pytest.mark.asyncio
+async def test_member_in_two_guilds_is_one_row_with_the_union_of_roles(mock_conn):
+    conn, cur = mock_conn
+    _mirror(cur, {'members': [(1, 'alice', 'Alice', '2024-01-01', ['HR', 'Ops'])]})
+    live = [
+        (1, 'alice', 'Alice', '2024-01-01', ['HR']),        # guild A
+        (2, 'bob', 'Bob', '2024-02-01', []),
+        (1, 'alice', 'Ali', '2024-03-01', ['Ops', 'HR']),   # guild B
+    ]
+    changes = await db_manager.sync_guild_snapshot(members=live)
+    # Alice's merged row matches the mirror, so only Bob is written.
+    assert changes['members'] == (1, 0, 0)
+
+    with patch.object(db_manager, 'COPY_THRESHOLD', 0):
+        _mirror(cur, {'members': []})
+        await db_manager.sync_guild_snapshot(members=live)
+    copy = cur.copy.return_value.__enter__.return_value
+    staged = [c.args[0][0] for c in copy.write_row.call_args_list]
+    assert staged == [1, 2]
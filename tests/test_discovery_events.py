@@ -0,0 +1,55 @@
+"""
+tests/test_discovery_events.py
+Discovery event bus tests.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers.discovery_events import EventBus, DiscoveryChange, CHANNEL, ROLE, RENAMED, DELETED
+
+
+@pytest.mark.asyncio
+async def test_handlers_receive_only_their_kinds():
+    bus = EventBus()
+    channels, everything = [], []
+    bus.subscribe(channels.append, kinds={CHANNEL})
+    bus.subscribe(everything.append)
+
+    renamed = DiscoveryChange(CHANNEL, RENAMED, 1, name='b', old_name='a')
+    deleted = DiscoveryChange(ROLE, DELETED, 2)
+    bus.publish(renamed)
+    bus.publish(deleted)
+    assert channels == [renamed]
+    assert everything == [renamed, deleted]
+
+
+@pytest.mark.asyncio
+async def test_async_handlers_run_and_failures_are_isolated():
+    bus = EventBus()
+    seen = asyncio.Event()
+
+    async def _broken(change):
+        raise RuntimeError("boom")
+
+    async def _ok(change):
+        seen.set()
+
+    bus.subscribe(_broken)
+    bus.subscribe(_ok)
+    bus.publish(DiscoveryChange(ROLE, DELETED, 3))
+    await bus.drain()
+    assert seen.is_set()
+
+
+def test_unsubscribe_stops_delivery():
+    bus = EventBus()
+    received = []
+    unsubscribe = bus.subscribe(received.append)
+    unsubscribe()
+    unsubscribe()   # idempotent
+    bus.publish(DiscoveryChange(ROLE, DELETED, 4))
+    assert received == []
@@ -0,0 +1,119 @@
+"""
+tests/test_discovery_snapshot.py
+Local discovery cache snapshot: round trip, atomic writes, unusable files and warm start.
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import discovery_db_manager as db_manager
+from Bots.db_managers import discovery_snapshot
+from Bots.db_managers.discovery_cache import DiscoveryCache, CHANNEL, ROLE
+from Bots.db_managers.role_index import RoleIndex
+
+
+@pytest.fixture
+def mock_warm_conn():
+    # DB rows: an older channel name, plus member 1 holding role 7
+    cur = MagicMock()
+    cur.fetchall.side_effect = [
+        [], [{'id': 100, 'name': 'old-name', 'guild_id': 1, 'category_id': None}], [],
+        [{'id': 1}], [{'member_id': 1, 'role_id': 7}],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cur
+    with patch.object(db_manager, 'get_conn', return_value=conn), patch.object(db_manager, 'put_conn'):
+        yield cur
+
+
+def _filled():
+    cache, index = DiscoveryCache(), RoleIndex()
+    cache.put(CHANNEL, 100, 'leave-hr', 1, 10)
+    cache.put(ROLE, 7, 'HR', 1)
+    index.replace([1, 2, 3], [(1, 7), (2, 7), (2, 8)])
+    return cache, index
+
+
+def test_round_trip_restores_cache_and_role_index(tmp_path):
+    path = str(tmp_path / 'snap.bin')
+    assert discovery_snapshot.save(*_filled(), path=path)
+    assert os.listdir(tmp_path) == ['snap.bin']     # temp file swapped in, not left behind
+
+    cache, index = DiscoveryCache(), RoleIndex()
+    assert discovery_snapshot.load(cache, index, path=path)
+    assert cache.get(CHANNEL, 100) == (100, 'leave-hr', 1, 10)
+    assert cache.id_by_name(ROLE, 'hr', casefold=True) == 7
+    assert len(index) == 3
+    assert index.members_with(all=[7], none=[8]) == {1}
+
+
+def test_unusable_snapshots_are_ignored(tmp_path):
+    cache, index = _filled()
+    path = tmp_path / 'snap.bin'
+    assert not discovery_snapshot.load(cache, index, path=str(path))   # missing
+
+    path.write_bytes(b'\x00not marshal')
+    assert not discovery_snapshot.load(cache, index, path=str(path))
+    assert cache.get(CHANNEL, 100) is not None                         # left untouched
+
+    assert not discovery_snapshot.save(cache, index, path='')          # disabled
+
+
+@pytest.mark.asyncio
+async def test_boot_serves_lookups_from_the_snapshot_while_the_db_warms():
+    discovery_snapshot.save(*_filled())
+    release = asyncio.Event()
+
+    async def _slow_warm():
+        await release.wait()
+
+    with patch.object(db_manager, 'cache', DiscoveryCache()), \
+         patch.object(db_manager, 'role_index', RoleIndex()), \
+         patch.object(db_manager, '_warm_task', None), \
+         patch.object(db_manager, 'ensure_schema', AsyncMock()), \
+         patch.object(db_manager, 'warm_discovery_cache', side_effect=_slow_warm) as warm:
+        await db_manager.initialize_discovery_db()
+
+        assert await db_manager.get_channel_id_by_name('leave-hr') == 100
+        assert db_manager.role_index.has(2, 8)
+        assert not db_manager._warm_task.done()
+
+        release.set()
+        await db_manager.wait_until_warm()
+        warm.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_boot_without_a_snapshot_warms_from_the_db_first():
+    with patch.object(db_manager, '_warm_task', None), \
+         patch.object(db_manager, 'ensure_schema', AsyncMock()), \
+         patch.object(db_manager, 'warm_discovery_cache', AsyncMock()) as warm:
+        await db_manager.initialize_discovery_db()
+        warm.assert_awaited_once()
+        assert db_manager._warm_task is None
+
+
+@pytest.mark.asyncio
+async def test_reconciliation_saves_the_snapshot():
+    with patch.object(db_manager, '_reconcile_snapshot_sync', return_value={'roles': (0, 0, 0)}), \
+         patch.object(db_manager, 'cache', _filled()[0]):
+        await db_manager.sync_guild_snapshot(roles=[])
+
+    cache, index = DiscoveryCache(), RoleIndex()
+    assert discovery_snapshot.load(cache, index)
+    assert cache.get(ROLE, 7).name == 'HR'
+
+
+def test_db_warm_up_keeps_structure_loaded_from_the_gateway(mock_warm_conn):
+    with patch.object(db_manager, 'cache', DiscoveryCache()), \
+         patch.object(db_manager, 'role_index', RoleIndex()), \
+         patch.object(db_manager, '_gateway_structure', False):
+        db_manager.load_gateway_structure([], [(100, 'leave-hr', 'text', None, 1)], [])
+        db_manager._warm_discovery_cache_sync()
+        assert db_manager.cache.get(CHANNEL, 100).name == 'leave-hr'
+        assert db_manager.role_index.has(1, 7)
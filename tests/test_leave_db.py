@@ -14,7 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from Bots.db_managers import leave_db_manager as db_manager
 
 # Make the queue worker run inline for easier testing
-async def mock_db_execute(func, *args, **kwargs):
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
     if inspect.iscoroutinefunction(func):
         return await func(*args, **kwargs)
     return func(*args, **kwargs)
@@ -118,3 +118,40 @@ async def test_confirm_withdraw_leave(mock_conn):
         (42,)
     )
     conn.commit.assert_called()
+
+@pytest.mark.asyncio
+async def test_withdraw_and_refund(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = {'max': '2026-03-09'}
+    with patch('Bots.db_managers.base_db.get_conn', return_value=conn), \
+         patch('Bots.db_managers.base_db.put_conn'):
+        await db_manager.withdraw_and_refund('testuser', 42, 123456789, 'CASUAL', 2.0,
+                                             cancelled_by='testuser', cancellation_reason='Plans changed')
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert "leave_status = 'Withdrawn'" in statements[0]
+    assert statements[1] == "UPDATE users SET total_casual_leave = total_casual_leave + %s WHERE user_id = %s"
+    assert statements[-1] == "UPDATE users SET last_leave_taken = %s WHERE user_id = %s"
+    conn.commit.assert_called()
+
+@pytest.mark.asyncio
+async def test_balance_transactions_are_keyed_on_the_user():
+    with patch('Bots.db_managers.base_db.db_execute') as execute:
+        await db_manager.withdraw_and_refund('testuser', 42, 123456789, 'CASUAL', 2.0)
+        await db_manager.accept_leave('testuser', 43, 'casual', 1.0, '2026-03-09', 123456789, 'footer')
+    assert [c.kwargs['key'] for c in execute.call_args_list] == [("leave_user", 123456789)] * 2
+
+@pytest.mark.asyncio
+async def test_leave_row_writes_share_the_owner_key(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = {'user_id': 123456789}
+    keys = []
+
+    async def _record(func, *args, key=None, **kwargs):
+        keys.append(key)
+        return await mock_db_execute(func, *args, **kwargs)
+
+    with patch('Bots.db_managers.leave_db_manager.db_execute', side_effect=_record):
+        await db_manager.update_footer_text('testuser', 42, 'footer', user_id=123456789)
+        await db_manager.confirm_withdraw_leave('testuser', 42)       # owner looked up
+    assert keys == [("leave_user", 123456789), None, ("leave_user", 123456789)]
+    assert cur.execute.call_args_list[1].args[:2] == (db_manager.Q.LEAVE_OWNER, (42,))
@@ -0,0 +1,157 @@
+"""
+tests/test_message_mirror.py
+Write-behind message mirror tests — DB writer mocked out.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import inspect
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import message_mirror, db_metrics, base_db
+from Bots.db_managers.message_mirror import MessageMirrorBuffer
+
+
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+@pytest.fixture
+def writer():
+    writer = MagicMock(side_effect=lambda rows: len(rows))
+    with patch('Bots.db_managers.message_mirror.db_execute', side_effect=mock_db_execute), \
+         patch('Bots.db_managers.message_mirror._upsert_messages_sync', writer):
+        yield writer
+
+
+@pytest.mark.asyncio
+async def test_edits_to_one_message_merge_into_a_single_row(writer):
+    buffer = MessageMirrorBuffer()
+    buffer.add(1, 10, 100, "draft", "t0")
+    buffer.add(1, 10, 100, "final", "t0")
+    buffer.add(2, 10, 100, "hello", "t1")
+
+    assert await buffer.flush() == 2
+    assert writer.call_args.args[0] == [(1, 10, 100, "final", "t0"), (2, 10, 100, "hello", "t1")]
+    assert len(buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_reaching_max_rows_triggers_a_flush(writer):
+    flushed = asyncio.Event()
+    writer.side_effect = lambda rows: flushed.set() or len(rows)
+    buffer = MessageMirrorBuffer(interval=60, max_rows=3)
+    buffer.start()
+    for n in range(3):
+        buffer.add(n, 10, 100, f"m{n}", "t")
+
+    await asyncio.wait_for(flushed.wait(), timeout=1)   # long before the 60s interval
+    assert buffer.flushed == 3
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_what_is_pending(writer):
+    buffer = MessageMirrorBuffer(interval=60)
+    buffer.start()
+    buffer.add(1, 10, 100, "bye", "t")
+    await buffer.close()
+    assert buffer.flushed == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_without_overwriting_newer_edits(writer):
+    db_metrics.reset()
+    buffer = MessageMirrorBuffer()
+    buffer.add(1, 10, 100, "old", "t")
+    writer.side_effect = RuntimeError("db down")
+
+    async def _edit_during_flush(func, *args, **kwargs):
+        buffer.add(1, 10, 100, "newer", "t")
+        return func(*args)
+
+    with patch('Bots.db_managers.message_mirror.db_execute', side_effect=_edit_during_flush):
+        assert await buffer.flush() is None
+    assert buffer._pending[1][3] == "newer"
+    assert db_metrics.snapshot()["message_mirror.flush"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_new_messages_but_merges_edits(writer):
+    buffer = MessageMirrorBuffer(max_rows=2, max_size=2)
+    assert buffer.add(1, 10, 100, "a", "t") and buffer.add(2, 10, 100, "b", "t")
+    assert not buffer.add(3, 10, 100, "c", "t")
+    assert buffer.add(1, 10, 100, "a (edited)", "t")
+    assert len(buffer) == 2 and buffer.dropped == 1
+    assert buffer._pending[1][3] == "a (edited)"
+
+
+@pytest.mark.asyncio
+async def test_live_messages_are_shed_while_the_db_queue_is_throttled(writer):
+    buffer = MessageMirrorBuffer()
+    with patch.object(base_db.db_queue, 'throttled', True):
+        assert not buffer.add(1, 10, 100, "live", "t")
+        assert buffer.add(2, 10, 100, "swept", "t", live=False)
+    assert list(buffer._pending) == [2]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_never_grows_the_buffer_past_its_limit(writer):
+    buffer = MessageMirrorBuffer(max_rows=2, max_size=2)
+    buffer.add(1, 10, 100, "a", "t")
+    buffer.add(2, 10, 100, "b", "t")
+    writer.side_effect = RuntimeError("db down")
+
+    async def _arrive_during_flush(func, *args, **kwargs):
+        buffer.add(3, 10, 100, "c", "t")
+        return func(*args)
+
+    with patch('Bots.db_managers.message_mirror.db_execute', side_effect=_arrive_during_flush):
+        assert await buffer.flush() is None
+    assert len(buffer) == 2 and buffer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_stats_report_buffered_and_dropped_rows(writer):
+    buffer = MessageMirrorBuffer(interval=60, max_rows=1, max_size=1)
+    before = base_db.queue_stats()
+    writer.side_effect = RuntimeError("db down")
+    buffer.start()
+    buffer.add(1, 10, 100, "a", "t")
+    buffer.add(2, 10, 100, "b", "t")
+    stats = base_db.queue_stats()
+    assert stats["buffered"] == before["buffered"] + 1
+    assert stats["dropped"] == before["dropped"] + 1
+    await buffer.close()
+    assert base_db.queue_stats()["buffered"] == before["buffered"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_are_serialized_so_success_covers_earlier_rows(writer):
+    buffer = MessageMirrorBuffer()
+    buffer.add(1, 10, 100, "a", "t")
+    started, release = asyncio.Event(), asyncio.Event()
+    calls = []
+
+    async def _slow_failing_then_ok(func, *args, **kwargs):
+        calls.append([r[0] for r in args[0]])
+        if len(calls) == 1:
+            started.set()
+            await release.wait()
+            raise RuntimeError("db down")
+        return func(*args)
+
+    with patch('Bots.db_managers.message_mirror.db_execute', side_effect=_slow_failing_then_ok):
+        first = asyncio.create_task(buffer.flush())
+        await started.wait()
+        buffer.add(2, 10, 100, "b", "t")
+        second = asyncio.create_task(buffer.flush())
+        release.set()
+        assert await first is None
+        assert await second == 2          # includes the row the first flush failed to write
+    assert calls == [[1], [2, 1]]
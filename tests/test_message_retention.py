@@ -0,0 +1,98 @@
+"""
+tests/test_message_retention.py
+Message retention engine tests mocking psycopg connection.
+"""
+
+import pytest
+import sys
+import os
+import inspect
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import message_retention as retention
+from Bots.db_managers.message_retention import RetentionRule
+
+
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def patch_db_execute():
+    with patch('Bots.db_managers.message_retention.db_execute', side_effect=mock_db_execute):
+        yield
+
+
+@pytest.fixture
+def mock_conn():
+    with patch('Bots.db_managers.message_retention.get_conn') as get_conn_mock, \
+         patch('Bots.db_managers.message_retention.put_conn'):
+        conn = MagicMock()
+        get_conn_mock.return_value = conn
+        cur = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cur
+        yield conn, cur
+
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_snowflake_cutoff_matches_discord_timestamps():
+    # Snowflake 175928847299117063 was created at 2016-04-30 11:18:25.796 UTC.
+    created = datetime(2016, 4, 30, 11, 18, 25, 796000, tzinfo=timezone.utc)
+    assert retention.snowflake_for(created) >> 22 == 175928847299117063 >> 22
+
+
+def test_parse_rules_accepts_days_and_counts():
+    assert retention.parse_rules("1234=30d, 5678=1000,") == [
+        RetentionRule(1234, max_age_days=30.0),
+        RetentionRule(5678, keep=1000),
+    ]
+
+
+def test_seconds_until_rolls_over_to_tomorrow():
+    assert retention.seconds_until(3, NOW.replace(hour=2)) == 3600
+    assert retention.seconds_until(3, NOW.replace(hour=4)) == 23 * 3600
+
+
+@pytest.mark.asyncio
+async def test_deletes_run_in_bounded_batches_until_a_short_one(mock_conn):
+    conn, cur = mock_conn
+    type(cur).rowcount = property(lambda self: next(counts))
+    counts = iter([100, 100, 37])
+
+    deleted = await retention.apply_rule(RetentionRule(None, max_age_days=30), [], NOW, batch=100)
+
+    assert deleted == 237
+    assert conn.commit.call_count == 3
+    cutoff, ruled, limit = cur.execute.call_args.args[1]
+    assert cutoff == retention.snowflake_for(NOW - timedelta(days=30))
+    assert limit == 100
+
+
+@pytest.mark.asyncio
+async def test_keep_count_cutoff_is_the_nth_newest_id(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = {'id': 9000}
+
+    assert retention._cutoff_sync(RetentionRule(5, keep=1000), [5], NOW) == 9000
+    sql, params = cur.execute.call_args.args
+    assert 'channel_id = %s' in sql and params == (5, 999)
+
+
+@pytest.mark.asyncio
+async def test_default_rule_skips_channels_with_their_own_rule(mock_conn):
+    conn, cur = mock_conn
+    cur.rowcount = 0
+    rules = [RetentionRule(None, max_age_days=90), RetentionRule(5, max_age_days=7)]
+
+    await retention.run_retention(rules, now=NOW)
+
+    default_delete, channel_delete = [c for c in cur.execute.call_args_list if 'DELETE' in c.args[0]]
+    assert 'channel_id <> ALL(%s)' in default_delete.args[0]
+    assert default_delete.args[1][1] == [5]
+    assert channel_delete.args[1][1] == 5
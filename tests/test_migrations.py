@@ -0,0 +1,82 @@
+"""
+tests/test_migrations.py
+Schema migration runner tests mocking psycopg connection.
+"""
+
+import pytest
+import sys
+import os
+import inspect
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import migrations
+
+
+async def mock_db_execute(func, *args, readonly=False, key=None, batch=False, priority=None, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return func(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def patch_db_execute():
+    with patch('Bots.db_managers.migrations.db_execute', side_effect=mock_db_execute), \
+         patch('Bots.db_managers.migrations._schema_version', None), \
+         patch('Bots.db_managers.migrations._schema_lock', None):
+        yield
+
+
+@pytest.fixture
+def mock_conn():
+    with patch('Bots.db_managers.migrations.get_conn') as get_conn_mock, \
+         patch('Bots.db_managers.migrations.put_conn'):
+        conn = MagicMock()
+        get_conn_mock.return_value = conn
+        cur = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cur
+        yield conn, cur
+
+
+def test_versions_are_unique_and_ordered():
+    versions = [m.version for m in migrations.MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+    assert migrations.LATEST_VERSION == versions[-1]
+
+
+
+def test_member_roles_backfill_skips_shared_role_names():
+    m6 = next(m for m in migrations.MIGRATIONS if m.version == 6)
+    backfill = next(step for step in m6.steps if 'INSERT INTO member_roles' in step)
+    assert 'HAVING count(*) = 1' in backfill
+@pytest.mark.asyncio
+async def test_up_to_date_schema_costs_one_query(mock_conn):
+    conn, cur = mock_conn
+    cur.fetchone.return_value = {'version': migrations.LATEST_VERSION}
+
+    assert await migrations.ensure_schema() == migrations.LATEST_VERSION
+    assert await migrations.ensure_schema() == migrations.LATEST_VERSION
+    cur.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_only_pending_migrations_are_applied(mock_conn):
+    conn, cur = mock_conn
+    applied = {m.version for m in migrations.MIGRATIONS[:-1]}
+
+    def _fetchone():
+        sql, params = cur.execute.call_args.args[0], cur.execute.call_args.args[1:]
+        if 'MAX(version)' in sql:
+            return {'version': max(applied)}
+        return (1,) if params and params[0][0] in applied else None
+
+    cur.fetchone.side_effect = _fetchone
+    assert await migrations.ensure_schema() == migrations.LATEST_VERSION
+
+    inserts = [c.args[1] for c in cur.execute.call_args_list if 'INSERT INTO schema_version' in c.args[0]]
+    latest = migrations.MIGRATIONS[-1]
+    assert inserts == [(latest.version, latest.name)]
+    for step in latest.steps:
+        if isinstance(step, str):
+            cur.execute.assert_any_call(step)
@@ -0,0 +1,46 @@
+"""
+tests/test_queries.py
+Named query registry tests. The EXPLAIN check needs a live PostgreSQL with the
+Concord schema; point CONCORD_TEST_DSN at it to enable, otherwise it is skipped.
+"""
+
+import pytest
+import sys
+import os
+import re
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers import queries as Q
+
+
+def test_registry_is_populated():
+    assert len(Q.QUERIES) >= 20
+    assert Q.QUERIES["task_by_id"] is Q.TASK_BY_ID
+
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError):
+        Q._q("task_by_id", "SELECT 1")
+
+
+@pytest.mark.parametrize("name", sorted(Q.QUERIES))
+def test_queries_use_positional_placeholders_only(name):
+    sql = Q.QUERIES[name]
+    assert "%(" not in sql
+    assert not re.search(r"\{\w*\}", sql), "looks like an unformatted f-string"
+
+
+@pytest.mark.skipif(not os.getenv("CONCORD_TEST_DSN"), reason="CONCORD_TEST_DSN not set")
+@pytest.mark.parametrize("name", sorted(Q.QUERIES))
+def test_explain_plans(name):
+    import psycopg
+    sql = Q.QUERIES[name]
+    n = iter(range(1, 100))
+    numbered = re.sub(r"%s", lambda _: f"${next(n)}", sql)
+    nulls = ", ".join(["NULL"] * sql.count("%s"))
+    with psycopg.connect(os.environ["CONCORD_TEST_DSN"]) as conn:
+        # PREPARE infers parameter types from the schema; EXPLAIN EXECUTE then
+        # plans the statement without running it.
+        conn.execute(f"PREPARE concord_explain AS {numbered}")
+        plan = conn.execute(f"EXPLAIN EXECUTE concord_explain{f'({nulls})' if nulls else ''}").fetchall()
+        assert plan
@@ -0,0 +1,34 @@
+"""
+tests/test_readiness.py
+Discovery readiness phase tests.
+"""
+
+import asyncio
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.utils.readiness import discovery_phases
+
+
+def test_phases_are_created_once_and_alias_discovery_complete():
+    bot = MagicMock()
+    phases = discovery_phases(bot)
+    assert discovery_phases(bot) is phases
+    assert bot.discovery_complete is phases.members
+
+
+def test_existing_discovery_complete_event_becomes_the_members_phase():
+    bot = MagicMock()
+    legacy = asyncio.Event()
+    bot.discovery_complete = legacy
+    assert discovery_phases(bot).members is legacy
+
+
+def test_clear_resets_every_phase():
+    phases = discovery_phases(MagicMock())
+    phases.structure.set()
+    phases.history.set()
+    phases.clear()
+    assert phases.status() == {'structure': False, 'members': False, 'history': False}
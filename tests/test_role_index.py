@@ -0,0 +1,66 @@
+"""
+tests/test_role_index.py
+RoleIndex set-query tests.
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Bots.db_managers.role_index import RoleIndex
+
+EMP, DAR, PA, LEAVE = 10, 11, 12, 13
+
+
+def _index():
+    index = RoleIndex()
+    index.replace([1, 2, 3, 4, 5], [(1, EMP), (2, EMP), (2, DAR), (3, EMP), (3, LEAVE), (4, PA)])
+    return index
+
+
+def test_members_with_combines_required_and_excluded_roles():
+    index = _index()
+    assert index.members_with(all=[EMP]) == {1, 2, 3}
+    assert index.members_with(all=[EMP], none=[DAR, PA, LEAVE]) == {1}
+    assert index.members_with(any=[DAR, PA]) == {2, 4}
+
+
+def test_exclusions_alone_cover_members_without_roles():
+    assert _index().members_with(none=[DAR, PA, LEAVE]) == {1, 5}
+
+
+def test_unknown_roles_match_nobody_but_exclude_nothing():
+    index = _index()
+    assert index.members_with(all=[EMP, 99]) == set()
+    assert index.members_with(any=[99]) == set()
+    assert index.members_with(all=[PA], none=[99]) == {4}
+
+
+def test_updates_keep_both_views_in_step():
+    index = _index()
+    index.update(1, added=[DAR])
+    index.update(2, removed=[DAR])
+    assert index.members_with(all=[DAR]) == {1}
+    assert index.roles_of(2) == {EMP}
+
+    index.set_member(3, [PA])
+    assert index.has(3, PA) and not index.has(3, EMP)
+    assert index.members_with(all=[EMP]) == {1, 2}
+
+
+def test_removed_role_frees_its_bit_for_reuse():
+    index = _index()
+    index.remove_role(DAR)
+    assert index.roles_of(1) == {EMP}
+    index.update(5, added=[99])
+    assert index.members_with(all=[99]) == {5}
+    assert index.members_with(all=[EMP], none=[99]) == {1, 2, 3}
+
+
+def test_removed_and_pruned_members_drop_out():
+    index = _index()
+    index.remove_member(1)
+    index.retain_members([2, 3])
+    assert 1 not in index and 4 not in index
+    assert index.members_with(all=[EMP]) == {2, 3}
+    assert len(index) == 2